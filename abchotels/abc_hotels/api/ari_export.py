@@ -0,0 +1,170 @@
+# abchotels/abc_hotels/api/ari_export.py
+"""
+Streaming ARI (availability, rates, inventory) export.
+
+Rows of room_type_inventory_rates are read through an unbuffered cursor on
+the request's own connection, CHUNK_ROWS at a time, and appended to the output (CSV rows, or one
+Parquet row group per chunk), so memory stays flat whatever the horizon.
+
+    /api/method/abchotels.abc_hotels.api.ari_export.download_ari?fmt=csv&start_date=2026-01-01
+    bench --site <site> export-ari --output ari.parquet --format parquet
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import tempfile
+from collections.abc import Iterator
+from itertools import islice
+from typing import Any
+
+import frappe
+from frappe.utils import cint, flt
+from werkzeug.wrappers import Response
+from werkzeug.wsgi import wrap_file
+
+from abchotels.abc_hotels.utils.inventory_events import to_for_date
+
+CHUNK_ROWS = 5000
+FORMATS = ("csv", "parquet")
+EXPORT_COLUMNS = (
+	"for_date",
+	"room_type",
+	"rate_code",
+	"rate_price",
+	"total_count",
+	"occupied_count",
+	"out_of_order_count",
+	"total_available_units",
+	"pay_master",
+)
+MIMETYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+def _export_query(start_date=None, end_date=None, room_type=None, rate_code=None):
+	conditions, params = [], {}
+	if start_date:
+		conditions.append("r.for_date >= %(start)s")
+		params["start"] = to_for_date(start_date)
+	if end_date:
+		conditions.append("r.for_date <= %(end)s")
+		params["end"] = to_for_date(end_date)
+	if room_type:
+		conditions.append("r.room_type = %(room_type)s")
+		params["room_type"] = room_type
+	if rate_code:
+		conditions.append("r.rate_code = %(rate_code)s")
+		params["rate_code"] = rate_code
+	sql = f"""
+        SELECT {", ".join("r." + c for c in EXPORT_COLUMNS)}
+        FROM room_type_inventory_rates r
+        {"WHERE " + " AND ".join(conditions) if conditions else ""}
+        ORDER BY r.for_date, r.room_type, r.rate_code
+    """
+	return sql, params
+
+
+def iter_ari_chunks(chunk_rows: int = CHUNK_ROWS, **filters) -> Iterator[list[tuple]]:
+	"""Lists of up to `chunk_rows` export rows (EXPORT_COLUMNS order), streamed from the server."""
+	sql, params = _export_query(**filters)
+	size = cint(chunk_rows) or CHUNK_ROWS
+	with frappe.db.unbuffered_cursor():  # restores the buffered cursor, even if abandoned midway
+		rows = iter(frappe.db.sql(sql, params, as_iterator=True))
+		while chunk := list(islice(rows, size)):
+			yield chunk
+
+
+class _CsvSink:
+	def __init__(self, fh):
+		self.text = io.TextIOWrapper(fh, encoding="utf-8", newline="")
+		self.writer = csv.writer(self.text)
+		self.writer.writerow(EXPORT_COLUMNS)
+
+	def write(self, rows: list[tuple]) -> None:
+		self.writer.writerows(rows)
+
+	def close(self) -> None:
+		self.text.flush()
+		self.text.detach()  # leave the caller's file open
+
+
+class _ParquetSink:
+	def __init__(self, fh):
+		try:
+			import pyarrow as pa
+			import pyarrow.parquet as pq
+		except ImportError:
+			frappe.throw("Parquet export needs pyarrow: bench pip install pyarrow")
+		self.pa = pa
+		self.schema = pa.schema(
+			[
+				("for_date", pa.int32()),
+				("room_type", pa.string()),
+				("rate_code", pa.string()),
+				("rate_price", pa.float64()),
+				("total_count", pa.int32()),
+				("occupied_count", pa.int32()),
+				("out_of_order_count", pa.int32()),
+				("total_available_units", pa.int32()),
+				("pay_master", pa.bool_()),
+			]
+		)
+		self.writer = pq.ParquetWriter(fh, self.schema)
+
+	def write(self, rows: list[tuple]) -> None:
+		columns = [list(col) for col in zip(*rows, strict=True)]
+		columns[3] = [None if v is None else flt(v) for v in columns[3]]  # DECIMAL -> float
+		columns[8] = [bool(v) for v in columns[8]]
+		self.writer.write_table(self.pa.Table.from_arrays(columns, schema=self.schema))
+
+	def close(self) -> None:
+		self.writer.close()
+
+
+def write_ari(fh, fmt: str = "csv", chunk_rows: int = CHUNK_ROWS, **filters) -> dict[str, Any]:
+	"""Stream the export into binary file object `fh`; returns the row / chunk counts."""
+	fmt = (fmt or "csv").lower()
+	if fmt not in FORMATS:
+		frappe.throw(f"Unsupported format {fmt!r}; use one of {', '.join(FORMATS)}")
+	sink = _CsvSink(fh) if fmt == "csv" else _ParquetSink(fh)
+	rows = chunks = 0
+	try:
+		for chunk in iter_ari_chunks(chunk_rows, **filters):
+			sink.write(chunk)
+			rows += len(chunk)
+			chunks += 1
+	finally:
+		sink.close()
+	return {"format": fmt, "rows": rows, "chunks": chunks}
+
+
+@frappe.whitelist(methods=["GET"])
+def download_ari(
+	fmt: str = "csv",
+	start_date=None,
+	end_date=None,
+	room_type: str | None = None,
+	rate_code: str | None = None,
+):
+	"""
+	ARI file download. The export is spooled to a temporary file first (the DB
+	connection is released when the request ends, before the body is sent),
+	then streamed back from disk. Needs export permission on Room Type Inventory.
+	"""
+	frappe.has_permission("Room Type Inventory", "export", throw=True)
+	fmt = (fmt or "csv").lower()
+	fh = tempfile.TemporaryFile()
+	try:
+		write_ari(fh, fmt, start_date=start_date, end_date=end_date, room_type=room_type, rate_code=rate_code)
+	except Exception:
+		fh.close()
+		raise
+	fh.seek(0)
+	filename = f"ari_{to_for_date(start_date) or 'all'}_{to_for_date(end_date) or 'all'}.{fmt}"
+	return Response(
+		wrap_file(frappe.local.request.environ, fh),
+		mimetype=MIMETYPES[fmt],
+		headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+		direct_passthrough=True,
+	)
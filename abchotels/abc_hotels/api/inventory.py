@@ -1,62 +1,178 @@
 # your_app/api/availability.py
+import datetime
+import time
+from collections import defaultdict
+
 import frappe
-from frappe.utils import getdate
+from frappe.utils import add_days, getdate
 from frappe.utils.data import cint
-import pymysql.cursors
-from collections import defaultdict
+
+from abchotels.abc_hotels.api.rates import apply_rate_rules
+from abchotels.abc_hotels.utils import availability_cache
+from abchotels.abc_hotels.utils.availability_grid import INVENTORY_FIELDS, load_grid
+from abchotels.abc_hotels.utils.date_calendar import days_between
+from abchotels.abc_hotels.utils.inventory_events import (
+    inventory_changed,
+    next_for_date,
+    reservation_changed,
+    to_for_date,
+)
+from abchotels.abc_hotels.utils.inventory_holds import (
+    drop_hold,
+    held_units,
+    next_hold_expiry,
+    short_nights,
+)
+from abchotels.abc_hotels.utils.inventory_ledger import append as append_ledger
+from abchotels.abc_hotels.utils.inventory_ledger import entries_for_stay
+from abchotels.abc_hotels.utils.stay_index import get_stay_indexes, index_rows
+
+MAX_BATCH_QUERIES = 500
 
 
 @frappe.whitelist(allow_guest=True, methods=["GET"])
 def get_availability(start, end, rooms, rate_codes_csv=None, room_types_csv=None):
     """
-    Query room_type_inventory_rates directly.
-    Returns: list[dict]
+    Answer from the cached stay-pricing index (utils/stay_index.py) instead of
+    aggregating room_type_inventory_rates night by night.
+    Returns: {'availability': list[dict], 'rates': list[dict]}
     """
 
     start_d = cint(start)
     end_d = cint(end)
     rooms_i = cint(rooms)
 
-    rate_codes_csv = (rate_codes_csv or "").strip()
-    room_types_csv = (room_types_csv or "").strip()
-
-    sql = """
-      SELECT
-        r.rate_code,
-        r.room_type,
-        r.total_count,
-        MAX(r.occupied_count)        AS max_occupied,
-        MIN(r.total_available_units) AS min_available_units,
-        AVG(r.rate_price)            AS rate_per_night,
-        SUM(r.rate_price)            AS total_stay
-      FROM room_type_inventory_rates r
-      WHERE r.for_date >= %s
-        AND r.for_date < %s
-        AND r.pay_master is false
-        AND (%s = '' OR FIND_IN_SET(r.rate_code, %s))
-        AND (%s = '' OR FIND_IN_SET(r.room_type, %s))
-      GROUP BY
-        r.room_type,
-        r.total_count,
-        r.rate_code
-      HAVING MIN(r.total_available_units) >= %s
-      AND SUM(r.rate_price) > 0
+    rate_codes = _split_csv(rate_codes_csv)
+    room_types = _split_csv(room_types_csv)
+
+    # versions are read before computing so a concurrent change leaves the entry stale
+    cache_key = availability_cache.entry_key(
+        start_d, end_d, rooms_i, ",".join(sorted(rate_codes)), ",".join(sorted(room_types))
+    )
+    versions = availability_cache.current_versions(room_types, start_d, end_d)
+    cached = availability_cache.lookup(cache_key, versions)
+    if cached is not None:
+        return cached
+
+    rows = []
+    ttl = None
+    if end_d > start_d:
+        indexes = get_stay_indexes(room_types)
+        held = held_units(indexes, start_d, end_d)
+        expiry = next_hold_expiry(indexes)
+        if expiry is not None:
+            ttl = expiry - time.time()
+        for room_type, index in indexes.items():
+            rows.extend(index.query(start_d, end_d, rate_codes, held.get(room_type)))
+
+    # same filters the old HAVING clause applied
+    rows = [
+        r for r in rows if r["min_available_units"] >= rooms_i and r["total_stay"] > 0
+    ]
+    rows.sort(key=lambda r: (r["room_type"], r["rate_code"]))
+    result = _shape_availability(rows)
+    availability_cache.store(cache_key, versions, result, ttl=ttl)
+    return result
+
+
+def _split_csv(value) -> list:
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+def _as_list(value) -> list:
+    """Accept either a list or a comma-separated string."""
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return _split_csv(value)
+
+
+@frappe.whitelist(methods=["POST"])
+def get_availability_batch(queries):
     """
+    Answer many stay queries (channel manager / OTA sync) from one scan of
+    room_type_inventory_rates over the union date span.
 
-    # Note: params need to match placeholders order
-    values = (
-        start_d,
-        end_d,
-        rate_codes_csv,
-        rate_codes_csv,
-        room_types_csv,
-        room_types_csv,
-        rooms_i,
+    queries: list (or JSON) of
+      {"start": 20250901, "end": 20250904, "rooms": 1,
+       "rate_codes": ["RACK"] | "RACK,BB", "room_types": [...] | "a,b"}
+    Returns: list of get_availability payloads, in the same order.
+    """
+    queries = frappe.parse_json(queries) or []
+    if len(queries) > MAX_BATCH_QUERIES:
+        frappe.throw(f"At most {MAX_BATCH_QUERIES} queries per batch")
+
+    parsed = []
+    for q in queries:
+        parsed.append(
+            {
+                "start": cint(q.get("start")),
+                "end": cint(q.get("end")),
+                "rooms": cint(q.get("rooms")),
+                "rate_codes": _as_list(q.get("rate_codes") or q.get("rate_codes_csv")),
+                "room_types": _as_list(q.get("room_types") or q.get("room_types_csv")),
+            }
+        )
+    valid = [q for q in parsed if q["end"] > q["start"]]
+    if not valid:
+        return [_shape_availability([]) for _ in parsed]
+
+    # one filter for the whole batch: a query without a filter widens it to "all"
+    conditions = ""
+    params = {
+        "start": min(q["start"] for q in valid),
+        "end": max(q["end"] for q in valid),
+    }
+    if all(q["room_types"] for q in valid):
+        conditions += " AND r.room_type IN %(room_types)s"
+        params["room_types"] = tuple({rt for q in valid for rt in q["room_types"]})
+    if all(q["rate_codes"] for q in valid):
+        conditions += " AND r.rate_code IN %(rate_codes)s"
+        params["rate_codes"] = tuple({rc for q in valid for rc in q["rate_codes"]})
+
+    rows = frappe.db.sql(
+        f"""
+        SELECT
+          r.room_type,
+          r.rate_code,
+          r.for_date,
+          r.total_count,
+          r.occupied_count,
+          r.total_available_units,
+          r.rate_price
+        FROM room_type_inventory_rates r
+        WHERE r.for_date >= %(start)s
+          AND r.for_date < %(end)s
+          AND r.pay_master is false
+          {conditions}
+        ORDER BY r.room_type, r.rate_code, r.for_date
+        """,
+        params,
+        as_dict=True,
     )
+    indexes = index_rows(rows)
+    held_by_query = [
+        held_units(indexes, q["start"], q["end"]) if q["end"] > q["start"] else {} for q in parsed
+    ]
+
+    results = []
+    for q, held in zip(parsed, held_by_query, strict=True):
+        out = []
+        if q["end"] > q["start"]:
+            wanted_types = set(q["room_types"])
+            for room_type, index in indexes.items():
+                if wanted_types and room_type not in wanted_types:
+                    continue
+                out.extend(index.query(q["start"], q["end"], q["rate_codes"], held.get(room_type)))
+        out = [
+            r for r in out if r["min_available_units"] >= q["rooms"] and r["total_stay"] > 0
+        ]
+        out.sort(key=lambda r: (r["room_type"], r["rate_code"]))
+        results.append(_shape_availability(out))
+    return results
 
-    rows = frappe.db.sql(sql, values, as_dict=True)
 
-    # Group rows by room_type
+def _shape_availability(rows):
+    """Group per-(room_type, rate_code) rows into the availability/rates payload."""
     availability = {}
     rates = []
 
@@ -92,148 +208,354 @@ def get_availability(start, end, rooms, rate_codes_csv=None, room_types_csv=None
     }
 
 
-@frappe.whitelist(allow_guest=True, methods=["POST"])
-def apply_reservation_inventory_api(reservation_name: str, target_docstatus: int):
-    """
-    Calls: CALL apply_reservation_inventory(p_reservation_name, p_target_docstatus)
-    Returns: {'rows_touched': int, 'total_delta': int}
-    """
-    params = (reservation_name, cint(target_docstatus))
+class InventoryConflictError(frappe.ValidationError):
+    pass
 
-    # Use a raw DictCursor so we can drain extra result sets safely
-    conn = frappe.db.get_connection()
-    cur = conn.cursor(pymysql.cursors.DictCursor)
-    cur.execute("CALL apply_reservation_inventory(%s, %s)", params)
-    result = cur.fetchall() or []
-    conn.commit()
-    cur.close()
-
-    # Your procedure returns one summary row; normalize the shape
-    if result:
-        row = result[0]
-        # Ensure keys exist even if NULL
-        return {
-            "rows_touched": int(row.get("rows_touched") or 0),
-            "total_delta": int(row.get("total_delta") or 0),
-        }
-    return {"rows_touched": 0, "total_delta": 0}
 
+def _raise_conflict(for_dates) -> None:
+    nights = [f"{str(d)[:4]}-{str(d)[4:6]}-{str(d)[6:]}" for d in for_dates]
+    frappe.throw(
+        f"Not enough rooms available on: {', '.join(nights)}",
+        InventoryConflictError,
+        title="Inventory Conflict",
+    )
 
-# Alternative version with more date info for advanced UI
-@frappe.whitelist(allow_guest=True, methods=["GET"])
-def get_availability_grid_detailed(
-    start_date: int, end_date: int, room_type: str = None
-):
-    """
-    Return availability grid with SQL doing heavy lifting.
+
+def apply_reservation_inventory(
+    reservation_name: str, target_docstatus: int, hold_id: str | None = None
+) -> dict:
     """
+    CALL apply_reservation_inventory inside the caller's transaction (no commit),
+    so a failed hold rolls back together with the document.
+    Raises InventoryConflictError listing the full nights when a hold would overbook.
 
-    # First, get columns from dim_date
-    columns_sql = """
-    WITH dates AS (
-        SELECT
-            for_date,
-            CONCAT(LEFT(day_name, 3), '<br/>', LPAD(day_of_month, 2, '0')) AS formatted_date,
-            day_name,
-            day_of_month,
-            weekend_indr
-        FROM dim_date
-        WHERE for_date BETWEEN %s AND %s
-        ORDER BY for_date
-    )
-    SELECT
-        for_date,
-        formatted_date,
-        weekend_indr
-    FROM dates
+    On submit, rooms tentatively held by other guests are respected, and the
+    reservation's own `hold_id` (if any) is released once the delta commits.
     """
+    if cint(target_docstatus) == 1:
+        res = frappe.db.get_value(
+            "Hotel Reservation",
+            reservation_name,
+            ["room_type", "check_in_date", "check_out_date", "number_of_rooms"],
+            as_dict=True,
+        )
+        if res and res.room_type and res.check_in_date and res.check_out_date:
+            start, end = to_for_date(res.check_in_date), to_for_date(res.check_out_date)
+            if held_units([res.room_type], start, end, exclude_hold=hold_id):
+                short = short_nights(res.room_type, start, end, cint(res.number_of_rooms), hold_id)
+                if short:
+                    _raise_conflict(
+                        [int(datetime.date.fromordinal(n).strftime("%Y%m%d")) for n in short]
+                    )
+
+    # on the request connection, so the hold commits or rolls back with the document
+    result = frappe.db.sql(
+        "CALL apply_reservation_inventory(%s, %s)",
+        (reservation_name, cint(target_docstatus)),
+        as_dict=True,
+    )
+    # drain the CALL status result so the connection is reusable
+    cur = frappe.db._cursor
+    while cur.nextset():
+        if cur.description:
+            cur.fetchall()
+
+    row = result[0] if result else {}
+    summary = {
+        "status": row.get("status") or "NOT_FOUND",
+        "rows_touched": int(row.get("rows_touched") or 0),
+        "total_delta": int(row.get("total_delta") or 0),
+    }
+    if summary["status"] == "CONFLICT":
+        _raise_conflict([d for d in (row.get("conflict_dates") or "").split(",") if d])
 
-    date_columns = frappe.db.sql(columns_sql, (start_date, end_date), as_dict=True)
+    reservation_changed(reservation_name, after_commit=True)
+    if hold_id and summary["status"] == "APPLIED":
+        frappe.db.after_commit.add(lambda: drop_hold(hold_id))
+    return summary
 
-    # Build room type condition
-    room_type_condition = ""
-    params = [start_date, end_date]
-    if room_type:
-        room_type_condition = "AND inv.room_type = %s"
-        params.append(room_type)
 
-    # Main data query with grouping
-    data_sql = f"""
-    WITH dates AS (
-        SELECT
-            for_date,
-            CONCAT(LEFT(day_name, 3), '<br/>', LPAD(day_of_month, 2, '0')) AS formatted_date,
-            day_name,
-            day_of_month,
-            weekend_indr
-        FROM dim_date
-        WHERE for_date BETWEEN %s AND %s
-    ),
-    inventory_data AS (
-        SELECT
-            inv.room_type,
-            inv.for_date,
-            inv.total_available_units,
-            inv.occupied_count,
-            inv.out_of_order_count,
-            (inv.total_available_units + inv.occupied_count + inv.out_of_order_count) AS total_count,
-            d.formatted_date,
-            d.weekend_indr
-        FROM room_type_inventory inv
-        JOIN dates d ON d.for_date = inv.for_date
-        WHERE 1=1 {room_type_condition}
-    )
-    SELECT
-        room_type,
-        JSON_ARRAYAGG(
-            JSON_OBJECT(
-                'for_date', for_date,
-                'total_count', total_count,
-                'occupied_count', occupied_count,
-                'out_of_order_count', out_of_order_count,
-                'total_available_units', total_available_units,
-                'formatted_date', formatted_date,
-                'weekend_indr', weekend_indr
-            ) ORDER BY for_date
-        ) AS days_data
-    FROM inventory_data
-    GROUP BY room_type
-    ORDER BY room_type
+@frappe.whitelist(allow_guest=True, methods=["POST"])
+def apply_reservation_inventory_api(reservation_name: str, target_docstatus: int):
+    """
+    Calls: CALL apply_reservation_inventory(p_reservation_name, p_target_docstatus)
+    Returns: {'status': str, 'rows_touched': int, 'total_delta': int}
     """
+    summary = apply_reservation_inventory(reservation_name, target_docstatus)
+    frappe.db.commit()
+    return summary
 
-    grouped_data = frappe.db.sql(data_sql, params, as_dict=True)
 
-    # Build columns structure
-    columns = [{"label": "Room Type", "fieldname": "room_type", "width": 200}]
+@frappe.whitelist(methods=["POST"])
+def apply_reservation_inventory_bulk(reservation_names, target_docstatus, update_documents=1):
+    """
+    Group variant of apply_reservation_inventory (e.g. a 40-room tour group):
+    hold deltas are aggregated per inventory night, every affected row is locked in
+    a single ordered pass, and everything is applied and committed once. Releases
+    only append pending rows to the inventory ledger.
+
+    Only drafts are held and only submitted reservations released; any other
+    reservation gets SKIPPED (already in the target state) or INVALID_STATE
+    and its inventory is left alone.
+
+    Holds are granted in the given order while rooms remain; the rest get
+    CONFLICT. With `update_documents`, accepted reservations are also
+    submitted / cancelled in the same transaction (their own hooks skip inventory).
+    Returns: {'results': [{'reservation', 'status', 'rows_touched', 'total_delta', 'conflict_dates'}], ...}
+    """
+    names = list(dict.fromkeys(frappe.parse_json(reservation_names) or []))
+    target = cint(target_docstatus)
+    if target not in (1, 2):
+        frappe.throw("target_docstatus must be 1 (submit / hold) or 2 (cancel / release)")
+    hold = target == 1
+    required = 0 if hold else 1  # docstatus a reservation must have to change its inventory
+    if not names:
+        return {"results": [], "applied": 0, "conflicts": 0}
+
+    reservations = {
+        r.name: r
+        for r in frappe.get_all(
+            "Hotel Reservation",
+            filters={"name": ("in", names)},
+            fields=["name", "room_type", "check_in_date", "check_out_date", "number_of_rooms", "docstatus"],
+        )
+    }
+    nights = {}
+    for name, r in reservations.items():
+        if r.docstatus != required or not (r.room_type and r.check_in_date and r.check_out_date):
+            continue
+        day, stay = getdate(r.check_in_date), []
+        while day < getdate(r.check_out_date):
+            stay.append(int(day.strftime("%Y%m%d")))
+            day = add_days(day, 1)
+        nights[name] = stay
+
+    room_types = tuple({reservations[n].room_type for n in nights})
+    all_nights = [d for stay in nights.values() for d in stay]
+    cells = {}
+    totals = {}
+    if all_nights and hold:
+        # one lock pass, in index order, over every night any reservation touches
+        for row in frappe.db.sql(
+            """
+            SELECT name, room_type, for_date, occupied_count, IFNULL(out_of_order_count, 0) AS ooo
+            FROM `tabRoom Type Inventory`
+            WHERE room_type IN %(room_types)s
+              AND for_date >= %(start)s AND for_date <= %(end)s
+            ORDER BY room_type, for_date
+            FOR UPDATE
+            """,
+            {"room_types": room_types, "start": min(all_nights), "end": max(all_nights)},
+            as_dict=True,
+        ):
+            cells[(row.room_type, row.for_date)] = row
+        # pending ledger releases free rooms too; shared-locked after the rows, like the hold guard
+        for rt, d, pending in frappe.db.sql(
+            """
+            SELECT room_type, for_date, SUM(delta)
+            FROM inventory_delta_ledger
+            WHERE applied = 0 AND room_type IN %(room_types)s
+              AND for_date >= %(start)s AND for_date <= %(end)s
+            GROUP BY room_type, for_date
+            LOCK IN SHARE MODE
+            """,
+            {"room_types": room_types, "start": min(all_nights), "end": max(all_nights)},
+        ):
+            if (rt, d) in cells:
+                cell = cells[(rt, d)]
+                cell.occupied_count = max(cell.occupied_count + cint(pending), 0)
+        totals = dict(
+            frappe.db.sql(
+                "SELECT room_type, total_count FROM room_type_room_count WHERE room_type IN %s",
+                (room_types,),
+            )
+        )
 
-    for col in date_columns:
-        columns.append(
+    deltas = defaultdict(int)  # inventory row name -> delta (holds only)
+    ledger = []
+    results = []
+    for name in names:
+        r = reservations.get(name)
+        if r and r.docstatus != required:
+            results.append(
+                {
+                    "reservation": name,
+                    "status": "SKIPPED" if r.docstatus == target else "INVALID_STATE",
+                    "rows_touched": 0,
+                    "total_delta": 0,
+                    "docstatus": r.docstatus,
+                }
+            )
+            continue
+        if not r or name not in nights:
+            results.append({"reservation": name, "status": "NOT_FOUND", "rows_touched": 0, "total_delta": 0})
+            continue
+        rooms = cint(r.number_of_rooms)
+        keys = [(r.room_type, d) for d in nights[name]]
+        if hold:
+            total = cint(totals.get(r.room_type))
+            full = [
+                d
+                for (rt, d) in keys
+                if (rt, d) not in cells
+                or total
+                - cells[(rt, d)].ooo
+                - cells[(rt, d)].occupied_count
+                - deltas[cells[(rt, d)].name]
+                < rooms
+            ]
+            if full:
+                results.append(
+                    {
+                        "reservation": name,
+                        "status": "CONFLICT",
+                        "rows_touched": 0,
+                        "total_delta": 0,
+                        "conflict_dates": full,
+                    }
+                )
+                continue
+        if hold:
+            touched = [cells[k].name for k in keys if k in cells]
+            for inv_name in touched:
+                deltas[inv_name] += rooms
+        else:
+            # releases are buffered in the ledger; no inventory row is locked
+            touched = nights[name]
+        delta, reason = (rooms, "bulk_submit") if hold else (-rooms, "bulk_cancel")
+        ledger.extend(entries_for_stay(name, r.room_type, nights[name], delta, reason))
+        results.append(
             {
-                "label": col["formatted_date"],
-                "fieldname": f"date_{col['for_date']}",
-                "width": 120,
-                "is_weekend": bool(col["weekend_indr"]),
+                "reservation": name,
+                "status": "APPLIED" if hold else "RELEASED",
+                "rows_touched": len(touched),
+                "total_delta": len(touched) * (rooms if hold else -rooms),
             }
         )
 
-    # Build data structure with pre-rendered HTML
-    data = {}
+    deltas = {k: v for k, v in deltas.items() if v}
+    if deltas:
+        case_sql = " ".join(["WHEN %s THEN %s"] * len(deltas))
+        params = [x for item in deltas.items() for x in item] + [tuple(deltas)]
+        frappe.db.sql(
+            f"""
+            UPDATE `tabRoom Type Inventory`
+            SET occupied_count = GREATEST(occupied_count + CASE name {case_sql} ELSE 0 END, 0)
+            WHERE name IN %s
+            """,
+            params,
+        )
+    append_ledger(ledger, applied=hold)
+
+    accepted = [x["reservation"] for x in results if x["status"] in ("APPLIED", "RELEASED")]
+    if cint(update_documents):
+        for name in accepted:
+            doc = frappe.get_doc("Hotel Reservation", name)
+            doc.flags.skip_inventory = True
+            if hold:
+                doc.submit()
+            else:
+                doc.cancel()
+
+    stays = [d for n in accepted for d in nights[n]]
+    if stays:
+        touched_types = {reservations[n].room_type for n in accepted}
+        start, end = min(stays), next_for_date(max(stays))
+        frappe.db.after_commit.add(lambda: inventory_changed(touched_types, start, end))
+    frappe.db.commit()
+
+    return {
+        "results": results,
+        "applied": len(accepted),
+        "conflicts": sum(1 for x in results if x["status"] == "CONFLICT"),
+    }
+
 
-    for room_row in grouped_data:
-        room_type = room_row["room_type"]
-        days_data = (
-            frappe.parse_json(room_row["days_data"]) if room_row["days_data"] else []
+def _grid_window(
+    start_date,
+    end_date,
+    room_type: str | None = None,
+    room_type_offset: int = 0,
+    room_type_limit: int = 0,
+    day_offset: int = 0,
+    day_limit: int = 0,
+):
+    """
+    One block of a grid: the date columns in the day slice
+    [day_offset, day_offset + day_limit) of start..end, and the room types to
+    load: [room_type] when one is asked for, the page of room types in name
+    order when room_type_limit is set, else None (all). Limits of 0 mean
+    "everything". Returns (date_columns, room_types or None, window meta).
+    """
+    all_days = days_between(start_date, end_date)
+    day_offset, day_limit = max(cint(day_offset), 0), max(cint(day_limit), 0)
+    days = all_days[day_offset : day_offset + day_limit] if day_limit else all_days[day_offset:]
+    window = {"day_offset": day_offset, "day_limit": day_limit, "total_days_in_range": len(all_days)}
+
+    if room_type:
+        return days, [room_type], window
+
+    room_types = None
+    room_type_limit = max(cint(room_type_limit), 0)
+    if room_type_limit:
+        room_type_offset = max(cint(room_type_offset), 0)
+        room_types = frappe.get_all(
+            "Room Type",
+            pluck="name",
+            order_by="name asc",
+            limit_start=room_type_offset,
+            limit_page_length=room_type_limit,
         )
+        window.update(
+            room_type_offset=room_type_offset,
+            room_type_limit=room_type_limit,
+            total_room_types_in_range=frappe.db.count("Room Type"),
+        )
+    return days, room_types, window
 
-        # Create room type entry
-        data[room_type] = []
 
-        for day in days_data:
-            available = day["total_available_units"]
-            occupied = day["occupied_count"]
-            out_of_order = day["out_of_order_count"]
-            total = day["total_count"]
-            is_weekend = day["weekend_indr"]
+def _date_columns(grid) -> list:
+    return [
+        {
+            "label": day["label_html"],
+            "fieldname": f"date_{day['for_date']}",
+            "width": 120,
+            "is_weekend": bool(day["weekend_indr"]),
+        }
+        for day in grid.columns
+    ]
+
+
+def _compact_grid(grid) -> dict:
+    """
+    Columnar payload for the availability grids: date columns are sent once
+    and each room type carries parallel arrays (0 where a night has no row).
+    Cells are rendered on the client, so nothing per-cell is built here.
+    """
+    return {
+        "format": "compact",
+        "fields": list(INVENTORY_FIELDS),
+        "columns": [
+            {"for_date": d["for_date"], "label": d["label_html"], "is_weekend": d["weekend_indr"]}
+            for d in grid.columns
+        ],
+        "data": grid.inventory,
+        "total_room_types": len(grid.inventory),
+        "total_days": grid.width,
+    }
+
+
+def _html_grid(grid) -> dict:
+    """Per-night cells with a pre-rendered HTML block, for the classic grid payload."""
+    data = {}
+    for room_type in grid.inventory:
+        data[room_type] = []
+        for i, day in grid.nights(room_type):
+            cell = grid.cell(room_type, i)
+            available = cell["total_available_units"]
+            occupied = cell["occupied_count"]
+            out_of_order = cell["out_of_order_count"]
+            total = available + occupied + out_of_order
 
             # Calculate availability percentage for color coding
             availability_pct = (available / total * 100) if total > 0 else 0
@@ -245,7 +567,7 @@ def get_availability_grid_detailed(
             else:
                 color_class = "bg-success text-white"
 
-            weekend_style = "border: 2px dashed #6c757d;" if is_weekend else ""
+            weekend_style = "border: 2px dashed #6c757d;" if day["weekend_indr"] else ""
 
             # Pre-render HTML cell
             html_cell = f"""
@@ -270,91 +592,47 @@ def get_availability_grid_detailed(
             )
 
     return {
-        "columns": columns,
+        "columns": [{"label": "Room Type", "fieldname": "room_type", "width": 200}, *_date_columns(grid)],
         "data": data,
         "total_room_types": len(data),
-        "total_days": len(date_columns),
+        "total_days": grid.width,
     }
 
 
-# Alternative simpler version that just returns raw data for custom rendering
+# Alternative version with more date info for advanced UI
 @frappe.whitelist(allow_guest=True, methods=["GET"])
-def get_availability_raw_data(start_date: int, end_date: int, room_type: str = None):
+def get_availability_grid_detailed(
+    start_date: int, end_date: int, room_type: str | None = None, compact: int = 0
+):
     """
-    Return raw availability data grouped by room type.
+    Return the availability grid with pre-rendered cells.
+    Pass compact=1 for the columnar payload (see _compact_grid).
     """
+    date_columns, room_types, _ = _grid_window(start_date, end_date, room_type)
+    grid = load_grid(date_columns, room_types)
+    return _compact_grid(grid) if cint(compact) else _html_grid(grid)
 
-    room_type_condition = ""
-    params = [start_date, end_date]
-    if room_type:
-        room_type_condition = "AND inv.room_type = %s"
-        params.append(room_type)
 
-    sql = f"""
-    WITH dates AS (
-        SELECT
-            for_date,
-            CONCAT(LEFT(day_name, 3), '<br/>', LPAD(day_of_month, 2, '0')) AS formatted_date,
-            weekend_indr
-        FROM dim_date
-        WHERE for_date BETWEEN %s AND %s
-        ORDER BY for_date
-    )
-    SELECT
-        -- Columns
-        (SELECT JSON_ARRAYAGG(
-            JSON_OBJECT(
-                'label', formatted_date,
-                'fieldname', CONCAT('date_', for_date),
-                'for_date', for_date,
-                'is_weekend', weekend_indr
-            ) ORDER BY for_date
-        ) FROM dates) AS columns_json,
-
-        -- Data grouped by room type
-        JSON_OBJECTAGG(
-            inv.room_type,
-            (SELECT JSON_ARRAYAGG(
-                JSON_OBJECT(
-                    'total_count', inv2.total_available_units + inv2.occupied_count + inv2.out_of_order_count,
-                    'occupied_count', inv2.occupied_count,
-                    'out_of_order_count', inv2.out_of_order_count,
-                    'total_available_units', inv2.total_available_units,
-                    'for_date', inv2.for_date
-                ) ORDER BY inv2.for_date
-            ) FROM room_type_inventory inv2
-              JOIN dates d2 ON d2.for_date = inv2.for_date
-              WHERE inv2.room_type = inv.room_type)
-        ) AS data_json
-    FROM room_type_inventory inv
-    JOIN dates d ON d.for_date = inv.for_date
-    WHERE 1=1 {room_type_condition}
+# Alternative simpler version that just returns raw data for custom rendering
+@frappe.whitelist(allow_guest=True, methods=["GET"])
+def get_availability_raw_data(start_date: int, end_date: int, room_type: str | None = None):
     """
+    Return raw availability data grouped by room type.
+    """
+    date_columns, room_types, _ = _grid_window(start_date, end_date, room_type)
+    grid = load_grid(date_columns, room_types)
 
-    result = frappe.db.sql(sql, params, as_dict=True)
-
-    if not result:
-        return {"columns": [], "data": {}}
-
-    row = result[0]
-    columns_data = frappe.parse_json(row["columns_json"]) if row["columns_json"] else []
-    grouped_data = frappe.parse_json(row["data_json"]) if row["data_json"] else {}
-
-    # Add Room Type column
-    columns = [{"label": "Room Type", "fieldname": "room_type", "width": 200}]
-    columns.extend(
-        [
-            {
-                "label": col["label"],
-                "fieldname": col["fieldname"],
-                "width": 120,
-                "is_weekend": bool(col["is_weekend"]),
-            }
-            for col in columns_data
-        ]
-    )
+    data = {}
+    for rt in grid.inventory:
+        data[rt] = []
+        for i, day in grid.nights(rt):
+            cell = grid.cell(rt, i)
+            cell["total_count"] = sum(cell.values())
+            cell["for_date"] = day["for_date"]
+            data[rt].append(cell)
 
-    return {"columns": columns, "data": grouped_data}
+    columns = [{"label": "Room Type", "fieldname": "room_type", "width": 200}, *_date_columns(grid)]
+    return {"columns": columns, "data": data}
 
 
 @frappe.whitelist(allow_guest=True, methods=["GET"])
@@ -367,7 +645,7 @@ def get_availability_grid_grouped(start_date: int, end_date: int):
 
     Payload shape:
     {
-      "columns": [  # from dim_date (ordered), includes label_html for <br/>
+      "columns": [  # calendar days (ordered), includes label_html for <br/>
         { "for_date": 20250826, "label_text": "Tue 26", "label_html": "Tue<br/>26", ...},
         ...
       ],
@@ -384,493 +662,108 @@ def get_availability_grid_grouped(start_date: int, end_date: int):
       ]
     }
     """
-    # 1) Columns (rich header info) directly from dim_date
-    columns = frappe.db.sql(
-        """
-        SELECT
-          d.for_date,
-          CONCAT(LEFT(d.day_name, 3), ' ', LPAD(d.day_of_month, 2, '0')) AS label_text,
-          CONCAT(LEFT(d.day_name, 3), '<br/>', LPAD(d.day_of_month, 2, '0')) AS label_html,
-          d.day_name, d.day_of_month, d.day_of_week, d.week_of_month, d.weekend_indr,
-          d.month_name_abbreviated
-        FROM dim_date d
-        WHERE d.for_date BETWEEN %s AND %s
-        ORDER BY d.for_date
-    """,
-        (start_date, end_date),
-        as_dict=True,
-    )
-
-    if not columns:
+    grid = load_grid(days_between(start_date, end_date))
+    if not grid.columns:
         return {"columns": [], "data": []}
 
-    # 2) Inventory (no pricing) for the same range
-    rows = frappe.db.sql(
-        """
-        SELECT
-          inv.room_type,
-          inv.for_date,
-          inv.total_count,
-          inv.occupied_count,
-          inv.out_of_order_count,
-          inv.total_available_units
-        FROM room_type_inventory inv
-        WHERE inv.for_date BETWEEN %s AND %s
-        ORDER BY inv.room_type, inv.for_date
-    """,
-        (start_date, end_date),
-        as_dict=True,
-    )
-
-    # 3) Group per room_type, align values to the columns order, fill missing with 0
-    col_dates = [c["for_date"] for c in columns]
-    # map: room_type -> { for_date -> row }
-    buckets = defaultdict(dict)
-    for r in rows:
-        buckets[r["room_type"]][r["for_date"]] = r
-
-    payload_rows = []
-    for room_type, by_date in buckets.items():
-        # Build parallel arrays aligned with col_dates
-        available = []
-        occupied = []
-        ooo = []
-        for fd in col_dates:
-            rec = by_date.get(fd)
-            if rec:
-                available.append(int(rec["total_available_units"] or 0))
-                occupied.append(int(rec["occupied_count"] or 0))
-                ooo.append(int(rec["out_of_order_count"] or 0))
-            else:
-                available.append(0)
-                occupied.append(0)
-                ooo.append(0)
-
-        payload_rows.append(
-            {
-                "room_type": room_type,
-                "rows": [
-                    {
-                        "label": "Available",
-                        "key": "total_available_units",
-                        "values": available,
-                    },
-                    {"label": "Occupied", "key": "occupied_count", "values": occupied},
-                    {
-                        "label": "Out of Order",
-                        "key": "out_of_order_count",
-                        "values": ooo,
-                    },
-                ],
-            }
-        )
-
-    return {"columns": columns, "data": payload_rows}
+    labels = {
+        "total_available_units": "Available",
+        "occupied_count": "Occupied",
+        "out_of_order_count": "Out of Order",
+    }
+    payload_rows = [
+        {
+            "room_type": room_type,
+            "rows": [
+                {"label": labels[key], "key": key, "values": values}
+                for key, values in series.items()
+            ],
+        }
+        for room_type, series in grid.inventory.items()
+    ]
+    return {"columns": [dict(d) for d in grid.columns], "data": payload_rows}
 
 
 @frappe.whitelist()
 def get_room_type_rates_grid(
-    start_date_int: int, end_date_int: int, rate_code: str = None, room_type: str = None
+    start_date_int: int,
+    end_date_int: int,
+    rate_code: str | None = None,
+    room_type: str | None = None,
+    room_type_offset: int = 0,
+    room_type_limit: int = 0,
+    day_offset: int = 0,
+    day_limit: int = 0,
 ):
     """
-    Return room type rates grid with SQL doing heavy lifting.
-    Data is now grouped by room_type first, then by rate_code.
+    Return the room type rates grid, grouped by room_type first, then by rate_code.
+    The window arguments (see _grid_window) restrict it to one block.
     """
-    # First, get columns from dim_date
-    columns_sql = """
-    WITH dates AS (
-        SELECT
-            for_date,
-            CONCAT(LEFT(day_name, 3), '<br/>', LPAD(day_of_month, 2, '0')) AS formatted_date,
-            day_name,
-            day_of_month,
-            weekend_indr
-        FROM dim_date
-        WHERE for_date BETWEEN %s AND %s
-        ORDER BY for_date
-    )
-    SELECT
-        for_date,
-        formatted_date,
-        weekend_indr
-    FROM dates
-    """
-    date_columns = frappe.db.sql(
-        columns_sql, (start_date_int, end_date_int), as_dict=True
+    date_columns, room_types, window = _grid_window(
+        start_date_int, end_date_int, room_type, room_type_offset, room_type_limit, day_offset, day_limit
     )
+    grid = load_grid(date_columns, room_types, rate_code, inventory=False, rates=True)
 
-    # Build room type condition
-    room_type_condition = ""
-    rate_code_condition = ""
-    params = [start_date_int, end_date_int]
-    if room_type:
-        room_type_condition = "AND inv.room_type = %s"
-        params.append(room_type)
-
-    if rate_code:
-        rate_code_condition = "AND rate_code = %s"
-        params.append(rate_code)
-    # Main data query with grouping by room_type first, then rate_code
-    data_sql = f"""
-    WITH dates AS (
-        SELECT
-            for_date,
-            CONCAT(LEFT(day_name, 3), '<br/>', LPAD(day_of_month, 2, '0')) AS formatted_date,
-            day_name,
-            day_of_month,
-            weekend_indr
-        FROM dim_date
-        WHERE for_date BETWEEN %s AND %s
-    ),
-    rates_data AS (
-        SELECT
-            inv.room_type,
-            irc.rate_code,
-            inv.for_date,
-            irc.rate_price,
-            d.formatted_date,
-            d.weekend_indr
-        FROM `tabRoom Type Inventory` inv
-        JOIN `tabRoom Type Inventory Rate Code` irc ON inv.name = irc.parent
-        JOIN dates d ON d.for_date = inv.for_date
-        WHERE 1=1 {room_type_condition}
-    )
-    SELECT
-        room_type,
-        rate_code,
-        JSON_ARRAYAGG(
-            JSON_OBJECT(
-                'for_date', for_date,
-                'rate_price', rate_price,
-                'room_type', room_type,
-                'rate_code', rate_code,
-                'formatted_date', formatted_date,
-                'weekend_indr', weekend_indr
-            ) ORDER BY for_date
-        ) AS days_data
-    FROM rates_data
-    WHERE 1=1 {rate_code_condition}
-    GROUP BY room_type, rate_code
-    ORDER BY room_type, rate_code
-    """
-
-    grouped_data = frappe.db.sql(data_sql, params, as_dict=True)
+    columns = [{"label": "Room Type", "fieldname": "room_type", "width": 200}, {"label": "Rate Code", "fieldname": "rate_code", "width": 100}, *_date_columns(grid)]
 
-    # Build columns structure
-    columns = [
-        {"label": "Room Type", "fieldname": "room_type", "width": 200},
-        {"label": "Rate Code", "fieldname": "rate_code", "width": 100},
-    ]
-
-    for col in date_columns:
-        columns.append(
-            {
-                "label": col["formatted_date"],
-                "fieldname": f"date_{col['for_date']}",
-                "width": 120,
-                "is_weekend": bool(col["weekend_indr"]),
-            }
-        )
-
-    # Build data structure grouped by room type
     data = {}
-
-    for rate_row in grouped_data:
-        room_type_name = rate_row["room_type"]
-        rate_code = rate_row["rate_code"]
-        days_data = (
-            frappe.parse_json(rate_row["days_data"]) if rate_row["days_data"] else []
-        )
-
-        # Create room type entry if it doesn't exist
-        if room_type_name not in data:
-            data[room_type_name] = {}
-
-        # Create rate code entry under room type
-        data[room_type_name][rate_code] = []
-
-        for day in days_data:
-            rate_price = day["rate_price"] or 0
-            is_weekend = day["weekend_indr"]
-
-            data[room_type_name][rate_code].append(
+    for room_type_name, by_code in grid.rates.items():
+        data[room_type_name] = {}
+        for code, prices in by_code.items():
+            data[room_type_name][code] = [
                 {
                     "for_date": day["for_date"],
-                    "rate_price": rate_price,
+                    "rate_price": price or 0,
                     "room_type": room_type_name,
-                    "rate_code": rate_code,
-                    "formatted_date": day["formatted_date"],
-                    "is_weekend": bool(is_weekend),
+                    "rate_code": code,
+                    "formatted_date": day["label_html"],
+                    "is_weekend": bool(day["weekend_indr"]),
                 }
-            )
-
-    # Count totals
-    total_room_types = len(data)
-    total_rate_codes = sum(len(rate_codes) for rate_codes in data.values())
+                for day, price in zip(grid.columns, prices, strict=True)
+                if price is not None
+            ]
 
     return {
         "columns": columns,
         "data": data,
-        "total_room_types": total_room_types,
-        "total_rate_codes": total_rate_codes,
-        "total_days": len(date_columns),
+        "total_room_types": len(data),
+        "total_rate_codes": sum(len(rate_codes) for rate_codes in data.values()),
+        "total_days": grid.width,
+        "window": window,
     }
 
 
 @frappe.whitelist(allow_guest=True, methods=["GET"])
 def get_availability_grid_simple(
-    start_date: int, end_date: int, room_type: str = None, rate_code: str = None
+    start_date: int,
+    end_date: int,
+    room_type: str | None = None,
+    rate_code: str | None = None,
+    compact: int = 0,
+    room_type_offset: int = 0,
+    room_type_limit: int = 0,
+    day_offset: int = 0,
+    day_limit: int = 0,
 ):
     """
-    Return availability grid with SQL doing heavy lifting.
-    Added rate_code filter parameter (nullable).
+    Return the availability grid, optionally limited to nights sold under rate_code.
+    Pass compact=1 for the columnar payload (see _compact_grid), and the
+    window arguments (see _grid_window) to query only the visible block.
     """
-
-    # First, get columns from dim_date
-    columns_sql = """
-    WITH dates AS (
-        SELECT
-            for_date,
-            CONCAT(LEFT(day_name, 3), '<br/>', LPAD(day_of_month, 2, '0')) AS formatted_date,
-            day_name,
-            day_of_month,
-            weekend_indr
-        FROM dim_date
-        WHERE for_date BETWEEN %s AND %s
-        ORDER BY for_date
-    )
-    SELECT
-        for_date,
-        formatted_date,
-        weekend_indr
-    FROM dates
-    """
-
-    date_columns = frappe.db.sql(columns_sql, (start_date, end_date), as_dict=True)
-
-    # Build conditions
-    room_type_condition = ""
-    rate_code_condition = ""
-    params = [start_date, end_date]
-
-    if room_type:
-        room_type_condition = "AND inv.room_type = %s"
-        params.append(room_type)
-
-    if rate_code:
-        rate_code_condition = """
-        AND EXISTS (
-            SELECT 1 FROM `tabRoom Type Inventory Rate Code` irc
-            WHERE irc.parent = inv.name
-            AND irc.rate_code = %s
-        )
-        """
-        params.append(rate_code)
-
-    # Main data query with grouping
-    data_sql = f"""
-    WITH dates AS (
-        SELECT
-            for_date,
-            CONCAT(LEFT(day_name, 3), '<br/>', LPAD(day_of_month, 2, '0')) AS formatted_date,
-            day_name,
-            day_of_month,
-            weekend_indr
-        FROM dim_date
-        WHERE for_date BETWEEN %s AND %s
-    ),
-    inventory_data AS (
-        SELECT
-            inv.room_type,
-            inv.for_date,
-            inv.total_available_units,
-            inv.occupied_count,
-            inv.out_of_order_count,
-            (inv.total_available_units + inv.occupied_count + inv.out_of_order_count) AS total_count,
-            d.formatted_date,
-            d.weekend_indr
-        FROM room_type_inventory inv
-        JOIN dates d ON d.for_date = inv.for_date
-        WHERE 1=1 {room_type_condition} {rate_code_condition}
+    date_columns, room_types, window = _grid_window(
+        start_date, end_date, room_type, room_type_offset, room_type_limit, day_offset, day_limit
     )
-    SELECT
-        room_type,
-        JSON_ARRAYAGG(
-            JSON_OBJECT(
-                'for_date', for_date,
-                'total_count', total_count,
-                'occupied_count', occupied_count,
-                'out_of_order_count', out_of_order_count,
-                'total_available_units', total_available_units,
-                'formatted_date', formatted_date,
-                'weekend_indr', weekend_indr
-            ) ORDER BY for_date
-        ) AS days_data
-    FROM inventory_data
-    GROUP BY room_type
-    ORDER BY room_type
-    """
-
-    grouped_data = frappe.db.sql(data_sql, params, as_dict=True)
-
-    # Build columns structure
-    columns = [{"label": "Room Type", "fieldname": "room_type", "width": 200}]
-
-    for col in date_columns:
-        columns.append(
-            {
-                "label": col["formatted_date"],
-                "fieldname": f"date_{col['for_date']}",
-                "width": 120,
-                "is_weekend": bool(col["weekend_indr"]),
-            }
-        )
-
-    # Build data structure with pre-rendered HTML
-    data = {}
-
-    for room_row in grouped_data:
-        room_type = room_row["room_type"]
-        days_data = (
-            frappe.parse_json(room_row["days_data"]) if room_row["days_data"] else []
-        )
-
-        # Create room type entry
-        data[room_type] = []
-
-        for day in days_data:
-            available = day["total_available_units"]
-            occupied = day["occupied_count"]
-            out_of_order = day["out_of_order_count"]
-            total = day["total_count"]
-            is_weekend = day["weekend_indr"]
-
-            # Calculate availability percentage for color coding
-            availability_pct = (available / total * 100) if total > 0 else 0
-
-            if available == 0:
-                color_class = "bg-danger text-white"
-            elif availability_pct <= 30:
-                color_class = "bg-warning text-dark"
-            else:
-                color_class = "bg-success text-white"
-
-            weekend_style = "border: 2px dashed #6c757d;" if is_weekend else ""
-
-            # Pre-render HTML cell
-            html_cell = f"""
-            <div class="availability-cell {color_class}" style="padding: 8px; border-radius: 6px; text-align: center; min-height: 55px; {weekend_style}">
-                <div style="font-size: 18px; font-weight: bold; line-height: 1.2;">{available}</div>
-                <div style="font-size: 11px; margin-top: 4px; opacity: 0.9;">
-                    Occ: {occupied}<br/>OOO: {out_of_order}
-                </div>
-            </div>
-            """
-
-            data[room_type].append(
-                {
-                    "total_count": total,
-                    "occupied_count": occupied,
-                    "out_of_order_count": out_of_order,
-                    "total_available_units": available,
-                    "for_date": day["for_date"],
-                    "html_cell": html_cell,
-                    "availability_pct": round(availability_pct, 1),
-                }
-            )
-
-    return {
-        "columns": columns,
-        "data": data,
-        "total_room_types": len(data),
-        "total_days": len(date_columns),
-        "filters_applied": {
-            "room_type": room_type,
-            "rate_code": rate_code,
-            "start_date": start_date,
-            "end_date": end_date,
-        },
+    grid = load_grid(date_columns, room_types, rate_code)
+
+    payload = _compact_grid(grid) if cint(compact) else _html_grid(grid)
+    payload["window"] = window
+    payload["filters_applied"] = {
+        "room_type": room_type,
+        "rate_code": rate_code,
+        "start_date": start_date,
+        "end_date": end_date,
     }
-
-
-# Alternative simpler version that just returns raw data for custom rendering
-@frappe.whitelist(allow_guest=True, methods=["GET"])
-def get_availability_raw_data(start_date: int, end_date: int, room_type: str = None):
-    """
-    Return raw availability data grouped by room type.
-    """
-
-    room_type_condition = ""
-    params = [start_date, end_date]
-    if room_type:
-        room_type_condition = "AND inv.room_type = %s"
-        params.append(room_type)
-
-    sql = f"""
-    WITH dates AS (
-        SELECT
-            for_date,
-            CONCAT(LEFT(day_name, 3), '<br/>', LPAD(day_of_month, 2, '0')) AS formatted_date,
-            weekend_indr
-        FROM dim_date
-        WHERE for_date BETWEEN %s AND %s
-        ORDER BY for_date
-    )
-    SELECT
-        -- Columns
-        (SELECT JSON_ARRAYAGG(
-            JSON_OBJECT(
-                'label', formatted_date,
-                'fieldname', CONCAT('date_', for_date),
-                'for_date', for_date,
-                'is_weekend', weekend_indr
-            ) ORDER BY for_date
-        ) FROM dates) AS columns_json,
-
-        -- Data grouped by room type
-        JSON_OBJECTAGG(
-            inv.room_type,
-            (SELECT JSON_ARRAYAGG(
-                JSON_OBJECT(
-                    'total_count', inv2.total_available_units + inv2.occupied_count + inv2.out_of_order_count,
-                    'occupied_count', inv2.occupied_count,
-                    'out_of_order_count', inv2.out_of_order_count,
-                    'total_available_units', inv2.total_available_units,
-                    'for_date', inv2.for_date
-                ) ORDER BY inv2.for_date
-            ) FROM room_type_inventory inv2
-              JOIN dates d2 ON d2.for_date = inv2.for_date
-              WHERE inv2.room_type = inv.room_type)
-        ) AS data_json
-    FROM room_type_inventory inv
-    JOIN dates d ON d.for_date = inv.for_date
-    WHERE 1=1 {room_type_condition}
-    """
-
-    result = frappe.db.sql(sql, params, as_dict=True)
-
-    if not result:
-        return {"columns": [], "data": {}}
-
-    row = result[0]
-    columns_data = frappe.parse_json(row["columns_json"]) if row["columns_json"] else []
-    grouped_data = frappe.parse_json(row["data_json"]) if row["data_json"] else {}
-
-    # Add Room Type column
-    columns = [{"label": "Room Type", "fieldname": "room_type", "width": 200}]
-    columns.extend(
-        [
-            {
-                "label": col["label"],
-                "fieldname": col["fieldname"],
-                "width": 120,
-                "is_weekend": bool(col["is_weekend"]),
-            }
-            for col in columns_data
-        ]
-    )
-
-    return {"columns": columns, "data": grouped_data}
+    return payload
 
 
 @frappe.whitelist(allow_guest=False, methods=["POST"])
@@ -891,6 +784,7 @@ def reallocate_inventory_from_assignments(reservation_name: str):
         conn.commit()
     finally:
         cur.close()
+    reservation_changed(reservation_name)
     return result  # e.g. [{'status':'REALLOCATED'}] / [{'status':'NO_CHANGE'}] / [{'status':'NO_ASSIGNMENTS'}]
 
 
@@ -910,7 +804,7 @@ def get_room_type_inventory_rates(room_type=None, start_date=None, end_date=None
             irc.rate_price
         FROM `tabRoom Type Inventory` inv
         JOIN `tabRoom Type Inventory Rate Code` irc
-          ON inv.name = irc.parent
+          ON irc.inv_key = inv.inv_key
         WHERE inv.room_type = COALESCE(%(room_type)s, inv.room_type)
           AND inv.for_date BETWEEN COALESCE(%(start_date)s, inv.for_date)
                                AND COALESCE(%(end_date)s, inv.for_date)
@@ -927,11 +821,17 @@ def get_room_type_inventory_rates(room_type=None, start_date=None, end_date=None
 def seed_room_type_inventory_rate_codes(
     rate_code, room_type, start_date, end_date, price
 ):
-    params = (rate_code, room_type, start_date, end_date, price)
-    query = "CALL seed_room_type_inventory_rate_codes(%s, %s, %s, %s, %s)"
-    conn = frappe.db.get_connection()
-    cur = conn.cursor(pymysql.cursors.DictCursor)  # new cursor
-    cur.execute(query, params)
-    conn.commit()
-    cur.close()
-    return {"ok": True}
+    """Single flat-price rule; see api.rates.load_rate_rules for the bulk form."""
+    summary = apply_rate_rules(
+        [
+            {
+                "rate_code": rate_code,
+                "room_type": room_type,
+                "start_date": start_date,
+                "end_date": end_date,
+                "price": price,
+            }
+        ]
+    )
+    frappe.db.commit()
+    return {"ok": True, **summary}
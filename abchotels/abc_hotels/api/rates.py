@@ -0,0 +1,193 @@
+# abchotels/abc_hotels/api/rates.py
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+from typing import Any
+
+import frappe
+from frappe.utils import cint, flt
+
+from abchotels.abc_hotels.utils.date_calendar import days_between
+from abchotels.abc_hotels.utils.inventory_events import inventory_changed, next_for_date, to_for_date
+
+INSERT_CHUNK = 1000
+PRICE_PRECISION = 6
+
+# (room_type, for_date, rate_code) -> price
+NightlyPrices = dict[tuple[str, int, str], float]
+
+
+def _rule_room_types(rule: dict[str, Any]) -> list[str]:
+	room_types = rule.get("room_types") or ([rule["room_type"]] if rule.get("room_type") else [])
+	return list(dict.fromkeys(room_types))
+
+
+def normalize_rules(rules: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+	"""Validate rules and convert their dates to inclusive YYYYMMDD bounds."""
+	out = []
+	for i, rule in enumerate(rules, start=1):
+		rule = frappe._dict(rule)
+		room_types = _rule_room_types(rule)
+		if not rule.get("rate_code") or not room_types:
+			frappe.throw(f"Rule {i}: rate_code and room_type(s) are required")
+		if not (rule.get("start_date") and rule.get("end_date")):
+			frappe.throw(f"Rule {i}: start_date and end_date are required")
+		prices = [rule.get(k) for k in ("price", "weekday_price", "weekend_price")]
+		if all(p in (None, "") for p in prices) and not rule.get("day_prices"):
+			frappe.throw(f"Rule {i}: no price given")
+		start, end = to_for_date(rule.start_date), to_for_date(rule.end_date)
+		if end < start:
+			frappe.throw(f"Rule {i}: end_date is before start_date")
+		out.append(
+			{
+				"rate_code": rule.rate_code,
+				"room_types": room_types,
+				"start": start,
+				"end": end,
+				"price": rule.get("price"),
+				"weekday_price": rule.get("weekday_price"),
+				"weekend_price": rule.get("weekend_price"),
+				"day_prices": dict(rule.get("day_prices") or {}),
+			}
+		)
+	return out
+
+
+def expand_rate_rules(rules: list[dict[str, Any]], calendar: Iterable[dict[str, Any]]) -> NightlyPrices:
+	"""
+	Final price per (room_type, for_date, rate_code). `calendar` rows carry
+	for_date / weekend_indr / day_name (date_calendar). For a night the most specific
+	price of a rule wins: day_prices[day_name] > weekend/weekday_price > price.
+	Rules apply in order, so a seasonal override listed after a base rule wins.
+	"""
+	calendar = sorted(calendar, key=lambda d: d["for_date"])
+	prices: NightlyPrices = {}
+	for rule in rules:
+		for day in calendar:
+			if day["for_date"] < rule["start"]:
+				continue
+			if day["for_date"] > rule["end"]:
+				break
+			price = rule["day_prices"].get(day["day_name"])
+			if price in (None, ""):
+				price = rule["weekend_price"] if cint(day["weekend_indr"]) else rule["weekday_price"]
+			if price in (None, ""):
+				price = rule["price"]
+			if price in (None, ""):
+				continue
+			for room_type in rule["room_types"]:
+				prices[(room_type, day["for_date"], rule["rate_code"])] = flt(price)
+	return prices
+
+
+def _existing(room_types, rate_codes, start: int, end: int) -> list[dict[str, Any]]:
+	"""Inventory nights in the span with their current rows for the given rate codes."""
+	return frappe.db.sql(
+		"""
+        SELECT inv.name AS parent, inv.room_type, inv.for_date,
+               irc.name AS irc_name, irc.rate_code, irc.rate_price
+        FROM `tabRoom Type Inventory` inv
+        LEFT JOIN `tabRoom Type Inventory Rate Code` irc
+          ON irc.inv_key = inv.inv_key AND irc.rate_code IN %(rate_codes)s
+        WHERE inv.room_type IN %(room_types)s
+          AND inv.for_date BETWEEN %(start)s AND %(end)s
+        """,
+		{"room_types": tuple(room_types), "rate_codes": tuple(rate_codes), "start": start, "end": end},
+		as_dict=True,
+	)
+
+
+def diff_prices(prices: NightlyPrices, existing: list[dict[str, Any]]) -> dict[str, Any]:
+	"""Split target prices into rows to insert / update; unchanged rows are left alone."""
+	parents = {}
+	current = {}
+	for row in existing:
+		parents[(row.room_type, row.for_date)] = row.parent
+		if row.irc_name:
+			current[(row.room_type, row.for_date, row.rate_code)] = (row.irc_name, flt(row.rate_price))
+
+	inserts, updates = [], defaultdict(list)  # updates: price -> [irc names]
+	unchanged = missing = 0
+	for (room_type, for_date, rate_code), price in prices.items():
+		have = current.get((room_type, for_date, rate_code))
+		if have:
+			if flt(have[1], PRICE_PRECISION) == flt(price, PRICE_PRECISION):
+				unchanged += 1
+			else:
+				updates[price].append(have[0])
+			continue
+		parent = parents.get((room_type, for_date))
+		if not parent:
+			missing += 1  # no inventory night to attach to
+			continue
+		inserts.append((f"{parent}-{rate_code}", parent, rate_code, price))
+	return {"inserts": inserts, "updates": dict(updates), "unchanged": unchanged, "missing": missing}
+
+
+def _write(diff: dict[str, Any]) -> None:
+	inserts = diff["inserts"]
+	for i in range(0, len(inserts), INSERT_CHUNK):
+		chunk = inserts[i : i + INSERT_CHUNK]
+		frappe.db.sql(
+			f"""
+            INSERT INTO `tabRoom Type Inventory Rate Code`
+              (name, parent, parenttype, parentfield, rate_code, rate_price)
+            VALUES {", ".join(["(%s, %s, 'Room Type Inventory', 'rate_codes', %s, %s)"] * len(chunk))}
+            """,
+			[x for row in chunk for x in row],
+		)
+	# prices come from a handful of rules, so one UPDATE per distinct price
+	for price, names in diff["updates"].items():
+		for i in range(0, len(names), INSERT_CHUNK):
+			frappe.db.sql(
+				"UPDATE `tabRoom Type Inventory Rate Code` SET rate_price = %s WHERE name IN %s",
+				(price, tuple(names[i : i + INSERT_CHUNK])),
+			)
+
+
+def apply_rate_rules(rules: Iterable[dict[str, Any]], dry_run: bool = False) -> dict[str, Any]:
+	"""Expand, diff and write `rules` in a single transaction (no commit here)."""
+	rules = normalize_rules(rules)
+	if not rules:
+		return {"nights": 0, "inserted": 0, "updated": 0, "unchanged": 0, "missing_inventory": 0}
+
+	start = min(r["start"] for r in rules)
+	end = max(r["end"] for r in rules)
+	prices = expand_rate_rules(rules, days_between(start, end))
+	room_types = {rt for rt, _, _ in prices}
+	rate_codes = {rc for _, _, rc in prices}
+	diff = (
+		diff_prices(prices, _existing(room_types, rate_codes, start, end))
+		if prices
+		else {"inserts": [], "updates": {}, "unchanged": 0, "missing": 0}
+	)
+	if not dry_run:
+		_write(diff)
+		if diff["inserts"] or diff["updates"]:
+			frappe.db.after_commit.add(lambda: inventory_changed(room_types, start, next_for_date(end)))
+	return {
+		"nights": len(prices),
+		"inserted": len(diff["inserts"]),
+		"updated": sum(len(v) for v in diff["updates"].values()),
+		"unchanged": diff["unchanged"],
+		"missing_inventory": diff["missing"],
+		"dry_run": bool(dry_run),
+	}
+
+
+@frappe.whitelist(methods=["POST"])
+def load_rate_rules(rules, dry_run: int = 0):
+	"""
+	Load many rate rules in one call, e.g.
+	  [{"rate_code": "BAR", "room_types": ["DBL", "TWN"], "start_date": "2026-01-01",
+	    "end_date": "2026-12-31", "weekday_price": 90, "weekend_price": 120},
+	   {"rate_code": "BAR", "room_type": "DBL", "start_date": "2026-07-01",
+	    "end_date": "2026-08-31", "price": 150, "day_prices": {"Saturday": 170}}]
+	Later rules override earlier ones night by night; only rows whose price
+	actually changes are written, all in one transaction.
+	"""
+	summary = apply_rate_rules(frappe.parse_json(rules) or [], dry_run=bool(cint(dry_run)))
+	if not cint(dry_run):
+		frappe.db.commit()
+	return summary
@@ -6,6 +6,16 @@ from frappe.utils import nowdate
 from frappe.utils import today
 from frappe.utils import today, getdate, add_days
 
+from abchotels.abc_hotels.utils.daily_kpi import (
+    finalize_daily_kpi,
+    get_daily_kpi,
+    kpi_series,
+    schedule_kpi_refresh,
+)
+from abchotels.abc_hotels.utils.inventory_events import next_for_date, to_for_date
+from abchotels.abc_hotels.utils.otb_pace import capture_otb_snapshot, last_snapshot_date, pace_report
+from abchotels.abc_hotels.utils.progress import ProgressReporter
+
 
 @frappe.whitelist()
 def check_in(reservation_id):
@@ -56,6 +66,10 @@ def check_in(reservation_id):
                 "Room Type Room", reservation.room_type_room, "room_status", "Occupied"
             )
 
+        # flag the arrival as done here, so the snapshot refresh below stops counting it
+        frappe.db.set_value("Hotel Reservation", reservation.name, "check_in_completed", 1)
+        arrival = to_for_date(reservation.check_in_date)
+        schedule_kpi_refresh(arrival, next_for_date(arrival))
         frappe.db.commit()
     except Exception as e:
         raise e
@@ -100,61 +114,46 @@ def get_dashboard_data(as_of_date):
     as_of_date_int = int(as_of_date)
     as_of_date_str = f"{str(as_of_date_int)[:4]}-{str(as_of_date_int)[4:6]}-{str(as_of_date_int)[6:]}"
 
-    # --- Room Inventory Aggregates ---
-    total_rooms, in_house, available, out_of_order = frappe.db.sql(
-        """
-        SELECT
-            COALESCE(SUM(total_count),0)      AS total_rooms,
-            COALESCE(SUM(occupied_count),0)   AS in_house,
-            COALESCE(SUM(total_available_units),0) AS available,
-            COALESCE(SUM(out_of_order_count),0)    AS out_of_order
-        FROM room_type_inventory
-        WHERE for_date = %s
-    """,
-        as_of_date_int,
-    )[0]
-
-    # --- ADR from Rate Codes ---
-    adr = (
-        frappe.db.sql(
-            """
-        SELECT COALESCE(AVG(rate_price),0)
-        FROM room_type_inventory_rates
-        WHERE for_date = %s
-    """,
-            as_of_date_int,
-        )[0][0]
-        or 0
-    )
-
-    # --- Arrivals / Departures ---
-    arrivals = frappe.db.count(
-        "Hotel Reservation",
-        {"check_in_completed": 0, "check_in_date": as_of_date_str, "docstatus": 1},
-    )
-    departures = frappe.db.count(
-        "Hotel Reservation",
-        {"check_out_completed": 0, "check_out_date": as_of_date_str, "docstatus": 1},
-    )
-
-    # --- Occupancy % ---
-    occupancy_pct = round((in_house / available) * 100, 2) if available else 0
+    # --- Precomputed snapshot (see utils/daily_kpi.py) ---
+    kpi = get_daily_kpi(as_of_date_int) or {}
 
     return {
         "as_of_date": as_of_date_str,
         "kpis": {
-            "total_rooms": total_rooms,
-            "out_of_order": out_of_order,
-            "available": available,
-            "in_house": in_house,
-            "occupancy_pct": occupancy_pct,
-            "adr": adr,
-            "arrivals": arrivals,
-            "departures": departures,
+            "total_rooms": kpi.get("total_rooms", 0),
+            "out_of_order": kpi.get("out_of_order", 0),
+            "available": kpi.get("available", 0),
+            "in_house": kpi.get("in_house", 0),
+            "occupancy_pct": kpi.get("occupancy_pct", 0),
+            "adr": kpi.get("adr", 0),
+            "revpar": kpi.get("revpar", 0),
+            "arrivals": kpi.get("arrivals", 0),
+            "departures": kpi.get("departures", 0),
         },
+        "is_final": bool(kpi.get("is_final")),
     }
 
 
+@frappe.whitelist()
+def get_dashboard_series(start_date, end_date, rollup=None):
+    """
+    Dashboard KPIs for nights start_date..end_date in one call: per-KPI arrays
+    (occupancy_pct, adr, revpar, arrivals, ...) aligned with `period`, per
+    night or rolled up by "week" / "month" (see daily_kpi.kpi_series).
+    """
+    return kpi_series(start_date, end_date, rollup)
+
+
+@frappe.whitelist()
+def get_pace_report(start_date, end_date, as_of=None, room_type=None, pickup_days=7):
+    """
+    On-the-books rooms / revenue per stay date as of `as_of` (default: the last
+    capture), with pickup over `pickup_days` and last year at the same lead
+    time, rebuilt from the OTB snapshots (see utils/otb_pace.py).
+    """
+    return pace_report(start_date, end_date, as_of=as_of, room_type=room_type, pickup_days=pickup_days)
+
+
 @frappe.whitelist()
 def get_night_audit_candidates(audit_date=None):
     audit_date = audit_date or today()
@@ -199,7 +198,8 @@ def run_night_audit(audit_date=None):
     cur.close()
 
     processed = []
-    for row in rows:
+    reporter = ProgressReporter("Night Audit", user=frappe.session.user, done_event="night_audit_done")
+    for i, row in enumerate(rows, start=1):
         invoice = frappe.get_doc("POS Invoice", row["invoice_id"])
 
         # check if ROOM-ACCOM for this date already exists
@@ -231,13 +231,22 @@ def run_night_audit(audit_date=None):
         frappe.db.commit()
 
         processed.append(invoice.name)
+        reporter.update(i / len(rows) * 100.0, f"Posted {invoice.name}", processed=i, total=len(rows))
+    # freeze the audited night's KPIs before the business date moves on
+    finalize_daily_kpi(audit_date_int)
+    # record the audited day's on-the-books for pace / pickup
+    if audit_date_int >= last_snapshot_date():
+        capture_otb_snapshot(audit_date_int)
+
     # 3. Advance business_date by 1 day
     settings.business_date = add_days(getdate(audit_date), 1)
     settings.save(ignore_permissions=True)
     frappe.db.commit()
+    reporter.finish({"audit_date": audit_date, "count": len(processed)})
     return {
         "ok": True,
         "audit_date": audit_date,
         "processed": processed,
         "count": len(processed),
+        "job_id": reporter.job_id,
     }
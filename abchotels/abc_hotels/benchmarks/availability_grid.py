@@ -0,0 +1,65 @@
+# abchotels/abc_hotels/benchmarks/availability_grid.py
+"""
+Payload size and server time of the availability grids, HTML vs compact:
+
+    bench --site <site> execute abchotels.abc_hotels.benchmarks.availability_grid.run \
+        --kwargs "{'start_date': 20260101, 'days': 90, 'repeat': 5}"
+"""
+
+from __future__ import annotations
+
+import gzip
+import statistics
+import time
+from typing import Any
+
+import frappe
+from frappe.utils import add_days, cint, today
+
+from abchotels.abc_hotels.api.inventory import get_availability_grid_detailed, get_availability_grid_simple
+from abchotels.abc_hotels.utils.inventory_events import from_for_date, to_for_date
+
+ENDPOINTS = {
+	"simple": get_availability_grid_simple,
+	"detailed": get_availability_grid_detailed,
+}
+
+
+def _measure(fn, kwargs: dict[str, Any], repeat: int) -> dict[str, Any]:
+	timings = []
+	result = None
+	for _ in range(repeat):
+		t0 = time.perf_counter()
+		result = fn(**kwargs)
+		timings.append((time.perf_counter() - t0) * 1000)
+	body = frappe.as_json(result, indent=None).encode()
+	return {
+		"ms_median": round(statistics.median(timings), 2),
+		"ms_min": round(min(timings), 2),
+		"bytes": len(body),
+		"gzip_bytes": len(gzip.compress(body)),
+		"room_types": result.get("total_room_types"),
+		"days": result.get("total_days"),
+	}
+
+
+def run(start_date=None, days: int = 90, repeat: int = 5, room_type: str | None = None) -> dict[str, Any]:
+	"""Time each grid endpoint in both modes over the same range; prints and returns the table."""
+	start = to_for_date(start_date or today())
+	end = to_for_date(add_days(from_for_date(start), max(cint(days), 1) - 1))
+	repeat = max(cint(repeat), 1)
+
+	report = {"start_date": start, "end_date": end, "repeat": repeat, "results": {}}
+	for name, fn in ENDPOINTS.items():
+		for compact in (0, 1):
+			kwargs = {"start_date": start, "end_date": end, "room_type": room_type, "compact": compact}
+			report["results"][f"{name}:{'compact' if compact else 'html'}"] = _measure(fn, kwargs, repeat)
+
+	for name in ENDPOINTS:
+		html, compact = report["results"][f"{name}:html"], report["results"][f"{name}:compact"]
+		report["results"][f"{name}:ratio"] = {
+			"bytes": round(html["bytes"] / max(compact["bytes"], 1), 1),
+			"ms_median": round(html["ms_median"] / max(compact["ms_median"], 0.01), 1),
+		}
+	print(frappe.as_json(report))
+	return report
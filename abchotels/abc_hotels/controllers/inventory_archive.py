@@ -0,0 +1,64 @@
+# abchotels/abc_hotels/controllers/inventory_archive.py
+"""
+Hot/cold split for inventory: nights older than ARCHIVE_KEEP_DAYS before the
+business date move from the Frappe tables to the RANGE-partitioned history
+tables (see sql/tables.sql); reporting reads both through
+room_type_inventory_all / room_type_rates_all.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import frappe
+from frappe.utils import add_days, cint, getdate, today
+
+from abchotels.abc_hotels.utils.inventory_events import from_for_date, inventory_changed, to_for_date
+
+ARCHIVE_KEEP_DAYS = 60  # past nights kept live for night audit / recent reports
+ARCHIVE_CHUNK_DAYS = 31  # nights moved per transaction
+HISTORY_TABLES = ("room_type_inventory_history", "room_type_rate_history")
+
+
+def ensure_history_partitions(through_year: int | None = None) -> None:
+	"""Give every year up to `through_year` (default: next year) its own partition."""
+	through_year = cint(through_year) or getdate(today()).year + 1
+	for table in HISTORY_TABLES:
+		frappe.db.sql("CALL ensure_history_partitions(%s, %s)", (table, through_year))
+
+
+def archive_cutoff() -> int:
+	"""First night that stays live (YYYYMMDD)."""
+	business_date = frappe.db.get_single_value("ABC Hotels Settings", "business_date") or today()
+	return to_for_date(add_days(getdate(business_date), -ARCHIVE_KEEP_DAYS))
+
+
+def archive_inventory(before: int | None = None, chunk_days: int = ARCHIVE_CHUNK_DAYS) -> dict[str, Any]:
+	"""Move every night before `before` (default: archive_cutoff()) to history, chunk by chunk."""
+	before = cint(before) or archive_cutoff()
+	first = frappe.db.sql("SELECT MIN(for_date) FROM `tabRoom Type Inventory` WHERE for_date < %s", before)[
+		0
+	][0]
+	if not first:
+		return {"archived_nights": 0, "archived_rates": 0, "before": before}
+
+	ensure_history_partitions(max(getdate(today()).year + 1, before // 10000))
+	nights = rates = 0
+	lo = cint(first)
+	while lo < before:
+		hi = min(to_for_date(add_days(from_for_date(lo), cint(chunk_days) or ARCHIVE_CHUNK_DAYS)), before)
+		row = frappe.db.sql("CALL archive_inventory_range(%s, %s)", (lo, hi), as_dict=True)
+		frappe.db.commit()
+		if row:
+			nights += cint(row[0].archived_nights)
+			rates += cint(row[0].archived_rates)
+		lo = hi
+
+	if nights:
+		inventory_changed(None, cint(first), before)
+	return {"archived_nights": nights, "archived_rates": rates, "before": before}
+
+
+def archive_past_inventory() -> None:
+	"""scheduler_events entry point (daily)."""
+	archive_inventory()
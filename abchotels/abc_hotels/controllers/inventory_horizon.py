@@ -0,0 +1,138 @@
+# abchotels/abc_hotels/controllers/inventory_horizon.py
+"""
+Keep `tabRoom Type Inventory` seeded over the rolling horizon configured in
+ABC Hotels Settings. Only each room type's missing tail is inserted (plus its
+rate-code rows, priced like the last seeded night), so a run with nothing to do
+costs one grouped index scan. dim_date is extended first whenever the horizon
+outgrows it.
+"""
+
+from __future__ import annotations
+
+import datetime as _dt
+from collections.abc import Iterable
+from typing import Any
+
+import frappe
+from frappe.utils import add_days, cint, getdate, today
+
+from abchotels.abc_hotels.utils.date_calendar import ensure_dim_date
+from abchotels.abc_hotels.utils.inventory_events import from_for_date, inventory_changed, to_for_date
+from abchotels.abc_hotels.utils.inventory_helpers import BULK_WINDOW_DAYS, NAME_PREFIX, _window_slices
+
+
+def _settings():
+	return frappe.get_cached_doc("ABC Hotels Settings")
+
+
+def current_horizon() -> dict[str, _dt.date] | None:
+	settings = _settings()
+	if not (settings.horizon_start_date and settings.horizon_end_date):
+		return None
+	return {"start": getdate(settings.horizon_start_date), "end": getdate(settings.horizon_end_date)}
+
+
+def roll_horizon_dates(as_of: _dt.date | None = None) -> dict[str, _dt.date] | None:
+	"""
+	Slide [horizon_start_date, horizon_end_date] forward to start at `as_of`
+	(keeping its length). Never moves backwards; returns the resulting horizon.
+	"""
+	horizon = current_horizon()
+	if not horizon:
+		return None
+	start, end = horizon["start"], horizon["end"]
+	as_of = getdate(as_of or today())
+	if as_of > start:
+		shift = (as_of - start).days
+		start, end = as_of, add_days(end, shift)
+		frappe.db.set_single_value(
+			"ABC Hotels Settings", {"horizon_start_date": start, "horizon_end_date": end}
+		)
+	return {"start": start, "end": getdate(end)}
+
+
+def missing_tails(
+	start: _dt.date, end: _dt.date, room_types: Iterable[str] | None = None
+) -> list[dict[str, Any]]:
+	"""[{'room_type', 'start', 'end'}] (inclusive dates) still to seed up to `end`."""
+	filters = ""
+	params: dict[str, Any] = {}
+	if room_types:
+		filters = "WHERE rt.name IN %(room_types)s"
+		params["room_types"] = tuple(room_types)
+	rows = frappe.db.sql(
+		f"""
+        SELECT rt.name AS room_type, MAX(inv.for_date) AS last_night
+        FROM `tabRoom Type` rt
+        LEFT JOIN `tabRoom Type Inventory` inv ON inv.room_type = rt.name
+        {filters}
+        GROUP BY rt.name
+        """,
+		params,
+		as_dict=True,
+	)
+	tails = []
+	for r in rows:
+		first = start if not r.last_night else max(start, add_days(from_for_date(r.last_night), 1))
+		first = getdate(first)
+		if first <= end:
+			tails.append({"room_type": r.room_type, "start": first, "end": end})
+	return tails
+
+
+def seed_tail(room_type: str, start: _dt.date, end: _dt.date, chunk_days: int) -> dict[str, int]:
+	"""Seed one room type's tail chunk by chunk, committing each chunk."""
+	created = rates = 0
+	for w_start, w_end in _window_slices(start, end, chunk_days):
+		row = frappe.db.sql(
+			"CALL seed_inventory_tail(%s, %s, %s, %s)",
+			(room_type, to_for_date(w_start), to_for_date(w_end), NAME_PREFIX),
+			as_dict=True,
+		)
+		frappe.db.commit()
+		if row:
+			created += cint(row[0].created_rows)
+			rates += cint(row[0].created_rate_rows)
+	return {"created": created, "created_rate_rows": rates}
+
+
+def extend_inventory(room_types: Iterable[str] | None = None, roll: bool = True) -> dict[str, Any]:
+	"""Roll the horizon (optionally) and seed whatever is missing at its end."""
+	horizon = roll_horizon_dates() if roll else current_horizon()
+	if not horizon:
+		return {"ok": False, "reason": "Horizon dates are not set in ABC Hotels Settings"}
+
+	# tails are seeded from dim_date: it has to reach the horizon end first
+	ensure_dim_date(horizon["end"])
+	chunk_days = cint(_settings().inventory_chunk_size) or BULK_WINDOW_DAYS
+	seeded = {}
+	for tail in missing_tails(horizon["start"], horizon["end"], room_types):
+		seeded[tail["room_type"]] = seed_tail(tail["room_type"], tail["start"], tail["end"], chunk_days)
+		inventory_changed([tail["room_type"]], tail["start"], add_days(tail["end"], 1))
+	return {
+		"ok": True,
+		"horizon_start": str(horizon["start"]),
+		"horizon_end": str(horizon["end"]),
+		"seeded": seeded,
+	}
+
+
+def roll_inventory_horizon() -> None:
+	"""scheduler_events entry point (daily); a no-op unless inventory_auto_reflect is on."""
+	if not cint(_settings().inventory_auto_reflect):
+		return
+	extend_inventory()
+
+
+def on_room_type_insert(doc, method=None) -> None:
+	"""doc_events hook: give a new Room Type its inventory over the current horizon."""
+	if not cint(_settings().inventory_auto_reflect):
+		return
+	frappe.enqueue(
+		"abchotels.abc_hotels.controllers.inventory_horizon.extend_inventory",
+		queue="long",
+		job_name=f"Seed Inventory {doc.name}",
+		enqueue_after_commit=True,
+		room_types=[doc.name],
+		roll=False,
+	)
@@ -1,38 +1,36 @@
 # abchotels/abc_hotels/controllers/inventory_jobs.py
 from __future__ import annotations
-from typing import Dict, Any, Optional
+
+from typing import Any
+
 import frappe
 from frappe.utils import getdate
+
 from abchotels.abc_hotels.utils.inventory_helpers import (
-    bulk_insert_by_date_windows,
     BULK_WINDOW_DAYS,
+    bulk_insert_by_date_windows,
+    dispatch_parallel_windows,
+    inventory_progress,
 )
 
 BACKGROUND_WINDOW_DAYS = 7  # smaller chunks in background for more frequent updates
 
-def _publish_done(created: int, target_user: Optional[str]) -> None:
-    """Final event the UI listens to; flips the bar to 100% and shows totals."""
-    try:
-        payload = {"created": created, "existing": None, "failed": 0, "pairs": None}
-        if target_user:
-            frappe.publish_realtime("inventory_job_done", payload, user=target_user)
-        else:
-            frappe.publish_realtime("inventory_job_done", payload)
-    except Exception:
-        pass
-
 @frappe.whitelist()
 def populate_inventory_window(
     start_date: str,
     end_date: str,
     run_now: int = 1,
-    notify_user: Optional[str] = None,        # FE session to receive progress + final
-    days_per_window: Optional[int] = None,    # optional override
-) -> Dict[str, Any]:
+    notify_user: str | None = None,        # FE session to receive progress + final
+    days_per_window: int | None = None,    # optional override
+    parallel_workers: int | None = None,   # >1: split windows across that many background jobs
+    progress_id: str | None = None,        # job id stamped on every progress event
+) -> dict[str, Any]:
     """
     Populate inventory for all pairs in [start_date..end_date].
     - Immediate path runs now and publishes progress to `notify_user` (or current user).
     - Background path enqueues the same function with run_now=1, preserving the initiating user.
+    - Parallel path enqueues groups of windows on several workers; their progress is
+      merged into the same events and the last one sends the final event.
     """
     start = getdate(start_date)
     end = getdate(end_date)
@@ -40,18 +38,51 @@ def populate_inventory_window(
         raise ValueError("Start and end dates are required")
 
     initiator = notify_user or frappe.session.user
+    progress_id = progress_id or frappe.generate_hash(length=10)
+
+    if int(parallel_workers or 0) > 1:
+        dispatched = dispatch_parallel_windows(
+            str(start),
+            str(end),
+            workers=int(parallel_workers),
+            days_per_window=int(days_per_window or BACKGROUND_WINDOW_DAYS),
+            target_user=initiator,
+            run_id=progress_id,
+        )
+        return {
+            "ok": True,
+            "ran_now": False,
+            "enqueued": True,
+            "progress_id": progress_id,
+            "run_id": dispatched["run_id"],
+            "job_ids": dispatched["jobs"],
+            "windows": dispatched["windows"],
+            "created": None,
+            "existing": None,
+            "failed": 0,
+        }
     window_days = int(days_per_window or (BULK_WINDOW_DAYS if int(run_now) == 1 else BACKGROUND_WINDOW_DAYS))
 
     if int(run_now) == 1:
         # Run now; send progress to the initiator
+        reporter = inventory_progress(initiator, job_id=progress_id)
         created = bulk_insert_by_date_windows(
             str(start),
             str(end),
             days_per_window=window_days,
-            target_user=initiator
+            target_user=initiator,
+            reporter=reporter,
         )
-        _publish_done(created, target_user=initiator)
-        return {"ok": True, "ran_now": True, "created": created, "existing": None, "failed": 0}
+        # final event the UI listens to; flips the bar to 100% and shows totals
+        reporter.finish({"created": created, "existing": None, "failed": 0, "pairs": None})
+        return {
+            "ok": True,
+            "ran_now": True,
+            "progress_id": progress_id,
+            "created": created,
+            "existing": None,
+            "failed": 0,
+        }
 
     # Background: re-enqueue with run_now=1 so workers execute the same logic above
     job = frappe.enqueue(
@@ -63,11 +94,13 @@ def populate_inventory_window(
         run_now=1,
         notify_user=initiator,                 # <— make sure events are targeted to the browser user
         days_per_window=BACKGROUND_WINDOW_DAYS,
+        progress_id=progress_id,
     )
     return {
         "ok": True,
         "ran_now": False,
         "enqueued": True,
+        "progress_id": progress_id,
         "job_id": job.get_id(),
         "created": None,
         "existing": None,
@@ -0,0 +1,357 @@
+# abchotels/abc_hotels/controllers/occupancy_reconciliation.py
+"""
+Recompute occupied_count per (room_type, for_date) from submitted Hotel
+Reservations and correct the drift.
+
+- rooms assigned to a reservation (assigned_rooms, which also sets
+  room_type_assigned) count against their own room's room type, as moved there
+  by reallocate_inventory_from_assignments; only the unassigned remainder
+  stays on the booked room type
+
+- incremental: only room types / date spans of reservations modified since the
+  room type's checkpoint (inventory_reconcile_checkpoint); `full=1` scans the horizon
+- one background job per room type, each walking its span in small windows
+- corrections are written in one CASE update per window and logged to the
+  inventory ledger (reason 'reconcile'); `dry_run=1` only reports the diff
+- every shard writes its timings to a Redis report read by get_reconciliation_report
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+import frappe
+from frappe.utils import add_days, add_to_date, cint, get_datetime
+
+from abchotels.abc_hotels.utils import inventory_ledger
+from abchotels.abc_hotels.utils.inventory_events import from_for_date, inventory_changed, to_for_date
+
+RECONCILE_WINDOW_DAYS = 31  # nights locked / committed at a time
+CHECKPOINT_OVERLAP_SEC = 300  # re-read recent edits whose transactions committed late
+REPORT_PREFIX = "abchotels:reconcile:"
+REPORT_TTL = 86400
+MAX_REPORTED_DIFFS = 200  # per shard
+
+DIFF_SQL = """
+    SELECT
+      inv.name,
+      inv.for_date,
+      inv.occupied_count + IFNULL(p.pending, 0) AS current,
+      IFNULL(t.expected, 0) AS expected
+    FROM `tabRoom Type Inventory` inv
+    LEFT JOIN (
+      SELECT l.for_date, SUM(l.delta) AS pending
+      FROM inventory_delta_ledger l
+      WHERE l.applied = 0 AND l.room_type = %(room_type)s
+        AND l.for_date >= %(lo)s AND l.for_date < %(hi)s
+      GROUP BY l.for_date
+    ) p ON p.for_date = inv.for_date
+    LEFT JOIN (
+      SELECT d.for_date, SUM(s.rooms) AS expected
+      FROM (
+        -- booked here and not (yet) assigned to a room
+        SELECT r.check_in_date, r.check_out_date,
+               GREATEST(IFNULL(r.number_of_rooms, 0) - IFNULL(a.assigned, 0), 0) AS rooms
+        FROM `tabHotel Reservation` r
+        LEFT JOIN (
+          SELECT ra.parent, COUNT(*) AS assigned
+          FROM `tabReservation Room Assignment` ra
+          JOIN `tabRoom Type Room` rr ON rr.name = ra.room_type_room
+          WHERE ra.parenttype = 'Hotel Reservation'
+          GROUP BY ra.parent
+        ) a ON a.parent = r.name
+        WHERE r.docstatus = 1
+          AND r.room_type = %(room_type)s
+          AND r.check_in_date < %(hi_date)s
+          AND r.check_out_date > %(lo_date)s
+        UNION ALL
+        -- rooms of this room type assigned to any reservation
+        SELECT r.check_in_date, r.check_out_date, COUNT(*) AS rooms
+        FROM `tabHotel Reservation` r
+        JOIN `tabReservation Room Assignment` ra
+          ON ra.parent = r.name AND ra.parenttype = 'Hotel Reservation'
+        JOIN `tabRoom Type Room` rr ON rr.name = ra.room_type_room
+        WHERE r.docstatus = 1
+          AND rr.room_type = %(room_type)s
+          AND r.check_in_date < %(hi_date)s
+          AND r.check_out_date > %(lo_date)s
+        GROUP BY r.name, r.check_in_date, r.check_out_date
+      ) s
+      JOIN dim_date d
+        ON d.date_actual >= s.check_in_date AND d.date_actual < s.check_out_date
+      WHERE d.for_date >= %(lo)s AND d.for_date < %(hi)s
+      GROUP BY d.for_date
+    ) t ON t.for_date = inv.for_date
+    WHERE inv.room_type = %(room_type)s
+      AND inv.for_date >= %(lo)s AND inv.for_date < %(hi)s
+    ORDER BY inv.for_date
+"""
+
+
+def plan_shards(full: int = 0, room_types: list[str] | None = None) -> list[dict[str, Any]]:
+	"""One shard per room type: {'room_type', 'start', 'end' (exclusive), 'watermark'}."""
+	if cint(full):
+		rows = frappe.db.sql(
+			"""
+            SELECT inv.room_type, MIN(inv.for_date) AS first_night, MAX(inv.for_date) AS last_night,
+                   (SELECT MAX(r.modified) FROM `tabHotel Reservation` r
+                    WHERE r.room_type = inv.room_type) AS watermark
+            FROM `tabRoom Type Inventory` inv
+            GROUP BY inv.room_type
+            """,
+			as_dict=True,
+		)
+		shards = [
+			{
+				"room_type": r.room_type,
+				"start": cint(r.first_night),
+				"end": to_for_date(add_days(from_for_date(r.last_night), 1)),
+				"watermark": r.watermark,
+			}
+			for r in rows
+		]
+	else:
+		# a reservation edit concerns its booked room type and its assigned rooms' types
+		rows = frappe.db.sql(
+			"""
+            SELECT s.room_type, MIN(s.check_in_date) AS stay_start, MAX(s.check_out_date) AS stay_end,
+                   MAX(s.modified) AS watermark
+            FROM (
+              SELECT r.room_type, r.check_in_date, r.check_out_date, r.modified
+              FROM `tabHotel Reservation` r
+              WHERE r.room_type IS NOT NULL
+              UNION ALL
+              SELECT rr.room_type, r.check_in_date, r.check_out_date, r.modified
+              FROM `tabHotel Reservation` r
+              JOIN `tabReservation Room Assignment` ra
+                ON ra.parent = r.name AND ra.parenttype = 'Hotel Reservation'
+              JOIN `tabRoom Type Room` rr ON rr.name = ra.room_type_room
+            ) s
+            LEFT JOIN inventory_reconcile_checkpoint c ON c.room_type = s.room_type
+            WHERE s.check_out_date > s.check_in_date
+              AND s.modified > IFNULL(c.last_modified, '1900-01-01')
+            GROUP BY s.room_type
+            """,
+			as_dict=True,
+		)
+		shards = [
+			{
+				"room_type": r.room_type,
+				"start": to_for_date(r.stay_start),
+				"end": to_for_date(r.stay_end),
+				"watermark": r.watermark,
+			}
+			for r in rows
+		]
+	if room_types:
+		wanted = set(room_types)
+		shards = [s for s in shards if s["room_type"] in wanted]
+	return shards
+
+
+def _windows(start: int, end: int):
+	lo = start
+	while lo < end:
+		hi = min(to_for_date(add_days(from_for_date(lo), RECONCILE_WINDOW_DAYS)), end)
+		yield lo, hi
+		lo = hi
+
+
+def _lock_nights(room_type: str, lo: int, hi: int) -> None:
+	"""
+	Lock the window's inventory rows before reading reservations: holds wait
+	behind us, and the diff's snapshot is taken after every in-flight hold committed.
+	"""
+	frappe.db.sql(
+		"""
+        SELECT name FROM `tabRoom Type Inventory`
+        WHERE room_type = %s AND for_date >= %s AND for_date < %s
+        FOR UPDATE
+        """,
+		(room_type, lo, hi),
+	)
+
+
+def _apply_corrections(room_type: str, diffs: list[dict[str, Any]]) -> None:
+	case_sql = " ".join(["WHEN %s THEN %s"] * len(diffs))
+	params = [x for d in diffs for x in (d["name"], d["delta"])] + [tuple(d["name"] for d in diffs)]
+	frappe.db.sql(
+		f"""
+        UPDATE `tabRoom Type Inventory`
+        SET occupied_count = occupied_count + CASE name {case_sql} ELSE 0 END
+        WHERE name IN %s
+        """,
+		params,
+	)
+	inventory_ledger.append(
+		[(None, room_type, d["for_date"], d["delta"], "reconcile") for d in diffs], applied=True
+	)
+
+
+def _advance_checkpoint(room_type: str, watermark) -> None:
+	mark = add_to_date(get_datetime(watermark), seconds=-CHECKPOINT_OVERLAP_SEC)
+	frappe.db.sql(
+		"""
+        INSERT INTO inventory_reconcile_checkpoint (room_type, last_modified)
+        VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE last_modified = GREATEST(last_modified, VALUES(last_modified))
+        """,
+		(room_type, mark),
+	)
+
+
+def _report_key(run_id: str) -> str:
+	return REPORT_PREFIX + run_id
+
+
+def reconcile_room_type(
+	room_type: str,
+	start: int,
+	end: int,
+	dry_run: int = 1,
+	watermark=None,
+	run_id: str | None = None,
+) -> dict[str, Any]:
+	"""One shard. Each window is diffed (and corrected) in its own transaction."""
+	dry_run = cint(dry_run)
+	started = time.monotonic()
+	nights = corrected = 0
+	diffs: list[dict[str, Any]] = []
+	if not dry_run:
+		frappe.db.commit()  # the first window's snapshot must start after its lock
+	for lo, hi in _windows(cint(start), cint(end)):
+		if not dry_run:
+			_lock_nights(room_type, lo, hi)
+		rows = frappe.db.sql(
+			DIFF_SQL,
+			{
+				"room_type": room_type,
+				"lo": lo,
+				"hi": hi,
+				"lo_date": from_for_date(lo),
+				"hi_date": from_for_date(hi),
+			},
+			as_dict=True,
+		)
+		nights += len(rows)
+		window = [
+			{
+				"name": r.name,
+				"for_date": r.for_date,
+				"current": cint(r.current),
+				"expected": cint(r.expected),
+				"delta": cint(r.expected) - cint(r.current),
+			}
+			for r in rows
+			if cint(r.current) != cint(r.expected)
+		]
+		diffs.extend(window)
+		if dry_run:
+			frappe.db.rollback()  # fresh snapshot per window, nothing to keep
+			continue
+		if window:
+			_apply_corrections(room_type, window)
+			corrected += len(window)
+		frappe.db.commit()
+
+	if not dry_run:
+		if watermark:
+			_advance_checkpoint(room_type, watermark)
+			frappe.db.commit()
+		if corrected:
+			inventory_changed([room_type], cint(start), cint(end))
+
+	result = {
+		"room_type": room_type,
+		"start": cint(start),
+		"end": cint(end),
+		"dry_run": dry_run,
+		"nights_checked": nights,
+		"diffs": len(diffs),
+		"corrected": corrected,
+		"seconds": round(time.monotonic() - started, 3),
+		"finished_at": time.time(),
+		"sample": [{k: v for k, v in d.items() if k != "name"} for d in diffs[:MAX_REPORTED_DIFFS]],
+	}
+	if run_id:
+		frappe.cache.hset(_report_key(run_id), room_type, result)
+	return result
+
+
+def start_reconciliation(
+	dry_run: int = 1, full: int = 0, room_types: list[str] | None = None, run_now: int = 0
+) -> dict[str, Any]:
+	run_id = frappe.generate_hash(length=10)
+	shards = plan_shards(full, room_types)
+	key = _report_key(run_id)
+	frappe.cache.hset(
+		key,
+		"_meta",
+		{
+			"started_at": time.time(),
+			"dry_run": cint(dry_run),
+			"full": cint(full),
+			"shards": [s["room_type"] for s in shards],
+		},
+	)
+	frappe.cache.expire(frappe.cache.make_key(key), REPORT_TTL)
+
+	for shard in shards:
+		if cint(run_now):
+			reconcile_room_type(**shard, dry_run=dry_run, run_id=run_id)
+		else:
+			frappe.enqueue(
+				"abchotels.abc_hotels.controllers.occupancy_reconciliation.reconcile_room_type",
+				queue="long",
+				job_name=f"Reconcile Occupancy {shard['room_type']}",
+				job_id=f"reconcile_occupancy::{shard['room_type']}",
+				deduplicate=True,  # never two writers on one room type
+				**shard,
+				dry_run=dry_run,
+				run_id=run_id,
+			)
+	return {"run_id": run_id, "shards": len(shards), "dry_run": cint(dry_run), "ran_now": bool(cint(run_now))}
+
+
+@frappe.whitelist(methods=["POST"])
+def reconcile_occupancy(dry_run: int = 1, full: int = 0, room_types=None, run_now: int = 0):
+	"""
+	Start a reconciliation run; poll get_reconciliation_report(run_id) for the
+	diff and timings. Dry run by default.
+	"""
+	frappe.only_for("System Manager")
+	return start_reconciliation(dry_run, full, frappe.parse_json(room_types) if room_types else None, run_now)
+
+
+@frappe.whitelist()
+def get_reconciliation_report(run_id: str) -> dict[str, Any]:
+	"""Per-shard timings and diffs plus run totals (shards still running are listed as pending)."""
+	frappe.only_for("System Manager")
+	entries = frappe.cache.hgetall(_report_key(run_id)) or {}
+	entries = {(k.decode() if isinstance(k, bytes) else k): v for k, v in entries.items()}
+	meta = entries.pop("_meta", None)
+	if not meta:
+		frappe.throw(f"Unknown or expired reconciliation run {run_id}")
+
+	shards = sorted(entries.values(), key=lambda s: s["seconds"], reverse=True)
+	finished = [s["finished_at"] for s in shards]
+	return {
+		"run_id": run_id,
+		"dry_run": meta["dry_run"],
+		"full": meta["full"],
+		"planned": len(meta["shards"]),
+		"done": len(shards),
+		"pending": [rt for rt in meta["shards"] if rt not in entries],
+		"nights_checked": sum(s["nights_checked"] for s in shards),
+		"diffs": sum(s["diffs"] for s in shards),
+		"corrected": sum(s["corrected"] for s in shards),
+		"worker_seconds": round(sum(s["seconds"] for s in shards), 3),
+		"wall_seconds": round(max(finished) - meta["started_at"], 3) if finished else None,
+		"shards": shards,
+	}
+
+
+def scheduled_reconciliation() -> None:
+	"""scheduler_events entry point: incremental, corrections applied."""
+	start_reconciliation(dry_run=0)
@@ -62,14 +62,19 @@ function startInventoryUI(frm) {
 
     // -- 3) realtime listeners (fresh every click)
     detachRealtime();
+    // events of other managers' concurrent jobs carry other job ids
+    const progress_id = frappe.utils.get_random(10);
+    const isOtherJob = (data) => data && data.job_id && data.job_id !== progress_id;
     onProgress = (data) => {
         if (!data || !String(data.title || "").includes("Inventory")) return;
+        if (isOtherJob(data)) return;
         setBar(data.percent || 0);
         setStatus(data.title, data.description || "");
         if (data.created_so_far != null)
             showResults(data.created_so_far, data.failed_so_far || 0, true);
     };
     onDone = (payload) => {
+        if (isOtherJob(payload)) return;
         const created = payload?.created ?? 0;
         const failed = payload?.failed ?? 0;
         setBar(100);
@@ -91,12 +96,16 @@ function startInventoryUI(frm) {
 
     // -- 4) kick off
     const run_now = days <= 30 ? 1 : 0;
+    // long horizons: spread windows over several workers (progress events are merged server-side)
+    const parallel_workers = days > 365 ? 4 : 0;
     frappe
         .xcall("abchotels.abc_hotels.controllers.inventory_jobs.populate_inventory_window", {
             start_date: start, // <-- string from Docfield, e.g. "2025-08-21"
             end_date: end, // <-- string from Docfield
             run_now: run_now,
             notify_user: frappe.session.user,
+            parallel_workers: parallel_workers,
+            progress_id: progress_id,
         })
         .then((res) => {
             if (!res || res.ok !== true)
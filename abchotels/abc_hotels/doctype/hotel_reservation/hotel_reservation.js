@@ -70,6 +70,7 @@ frappe.ui.form.on("Hotel Reservation", {
     refresh(frm) {
         // Optional: hide the HTML placeholder until needed
         hide_availability(frm);
+        subscribe_availability_deltas(frm);
         console.log("frm status", frm.doc, frm.doc, frm.docroom_type_room);
         const isSubmitted = frm.doc.docstatus === 1;
         const isToday = frm.doc.check_in_date === frappe.datetime.get_today();
@@ -573,12 +574,41 @@ function apply_selection_to_form(frm, row, ctx) {
     frm.set_value("check_in_date", ctx.start);
     frm.set_value("check_out_date", ctx.end);
     frm.set_value("base_rate_per_night", row.rate_per_night || 0);
+    hold_selected_rooms(frm, row.room_type, ctx);
 
     frappe.show_alert({
         message: `Selected ${row.rate_code} · ${row.room_type}`,
         indicator: "green",
     });
 }
+
+// Keep the selected rooms tentatively held until submit converts the hold
+// into real inventory (or it expires); a new selection replaces the old hold.
+function hold_selected_rooms(frm, room_type, ctx) {
+    const previous = frm.doc.inventory_hold;
+    if (previous) {
+        frappe.call({
+            method: "abchotels.abc_hotels.utils.inventory_holds.release_inventory_hold",
+            args: { hold_id: previous },
+        });
+        frm.set_value("inventory_hold", "");
+    }
+    if (!room_type || frm.doc.docstatus !== 0) return;
+    frappe.call({
+        method: "abchotels.abc_hotels.utils.inventory_holds.place_inventory_hold",
+        args: {
+            room_type: room_type,
+            start: toIntDate(ctx.start),
+            end: toIntDate(ctx.end),
+            rooms: ctx.rooms,
+        },
+        callback: (r) => {
+            if (r.message && r.message.hold_id) {
+                frm.set_value("inventory_hold", r.message.hold_id);
+            }
+        },
+    });
+}
 const AVAILABILITY_CSS = `
 <style>
 #availability-wrapper {
@@ -714,6 +744,25 @@ color:var(--heading-color);
 let activeRoomFilter = null;
 let selectedRateKey = null;
 
+// Re-run the (server-cached) availability query when another desk changes
+// inventory for the shown stay; see utils/availability_push.py.
+function subscribe_availability_deltas(frm) {
+    if (frm._availability_delta_handler) return;
+    let timer = null;
+    frm._availability_delta_handler = (delta) => {
+        const ctx = window.lastCtx;
+        if (!ctx || !window.lastAvailabilityData || cur_frm !== frm) return;
+        const start = toIntDate(ctx.start);
+        const end = toIntDate(ctx.end);
+        if ((delta.start && delta.start >= end) || (delta.end && delta.end <= start)) return;
+        const shown = window.lastAvailabilityData.availability.map((room) => room.room_type);
+        if (delta.room_types && !delta.room_types.some((rt) => shown.includes(rt))) return;
+        clearTimeout(timer);
+        timer = setTimeout(() => fetch_and_render_availability(frm), 1000);
+    };
+    frappe.realtime.on("abc_availability_delta", frm._availability_delta_handler);
+}
+
 function render_availability_table(frm, data, ctx) {
     let html = AVAILABILITY_CSS;
 
@@ -1,16 +1,30 @@
 import frappe
-from abchotels.abc_hotels.api.inventory import apply_reservation_inventory_api
+from abchotels.abc_hotels.api.inventory import apply_reservation_inventory
+from abchotels.abc_hotels.utils.daily_kpi import schedule_kpi_refresh
+from abchotels.abc_hotels.utils.inventory_events import next_for_date, to_for_date
 from frappe.model.document import Document
 
 class HotelReservation(Document):
+    # inventory is applied inside the submit/cancel transaction: an overbooking
+    # conflict raises and rolls the docstatus change back with it
+    # (skip_inventory is set by apply_reservation_inventory_bulk, which already applied it)
     def on_submit(self):
-        frappe.db.commit()  # close current txn first
-        apply_reservation_inventory_api(self.name, 1)
-        frappe.db.commit()
+        if self.flags.skip_inventory:
+            return
+        apply_reservation_inventory(self.name, 1, hold_id=self.get("inventory_hold"))
+
     def on_cancel(self):
+        if self.flags.skip_inventory:
+            return
         # 2 = release inventory
-        frappe.db.commit()
-        apply_reservation_inventory_api(self.name, 2)
-        frappe.db.commit()
-        pass
+        apply_reservation_inventory(self.name, 2)
 
+    def on_update_after_submit(self):
+        # arrivals / departures on the daily_kpi snapshot count the pending ones
+        nights = []
+        if self.has_value_changed("check_in_completed") and self.check_in_date:
+            nights.append(to_for_date(self.check_in_date))
+        if self.has_value_changed("check_out_completed") and self.check_out_date:
+            nights.append(to_for_date(self.check_out_date))
+        if nights:
+            schedule_kpi_refresh(min(nights), next_for_date(max(nights)))
@@ -1,9 +1,451 @@
 # Copyright (c) 2025, Your Name and Contributors
 # See license.txt
 
-# import frappe
+import threading
+
+import frappe
+import pymysql
+import pymysql.cursors
 from frappe.tests.utils import FrappeTestCase
 
+from abchotels.abc_hotels.api.inventory import apply_reservation_inventory_bulk
+from abchotels.abc_hotels.controllers.occupancy_reconciliation import reconcile_room_type
+from abchotels.abc_hotels.utils import inventory_ledger
+from abchotels.abc_hotels.utils.daily_kpi import finalize_daily_kpi, kpi_rows, kpi_series, refresh_daily_kpi
+from abchotels.abc_hotels.utils.inventory_events import next_for_date
+from abchotels.abc_hotels.utils.inventory_holds import HOLD_PREFIX, get_hold, release_inventory_hold
+from abchotels.abc_hotels.utils.otb_pace import capture_otb_snapshot, last_snapshot_date, pace_report
+
+TEST_ROOM_TYPE = "_Test Oversell Room Type"
+ROOMS = 5
+PARALLEL_SUBMITS = 20
+CHECK_IN = "2026-03-10"
+CHECK_OUT = "2026-03-13"
+NIGHTS = (20260310, 20260311, 20260312)
+
+
+def _connect():
+	"""A separate MariaDB session per thread, like concurrent web workers."""
+	return pymysql.connect(
+		host=frappe.conf.db_host or "127.0.0.1",
+		port=int(frappe.conf.db_port or 3306),
+		user=frappe.conf.db_user or frappe.conf.db_name,
+		password=frappe.conf.db_password,
+		database=frappe.conf.db_name,
+		autocommit=False,
+		cursorclass=pymysql.cursors.DictCursor,
+	)
+
 
 class TestHotelReservation(FrappeTestCase):
-	pass
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls._cleanup()
+		frappe.get_doc({"doctype": "Room Type", "name": TEST_ROOM_TYPE}).db_insert()
+		for i in range(ROOMS):
+			frappe.get_doc(
+				{"doctype": "Room Type Room", "name": f"{TEST_ROOM_TYPE}-{i}", "room_type": TEST_ROOM_TYPE}
+			).db_insert()
+		for night in NIGHTS:
+			frappe.get_doc(
+				{
+					"doctype": "Room Type Inventory",
+					"name": f"INVE-{TEST_ROOM_TYPE}-{night}",
+					"room_type": TEST_ROOM_TYPE,
+					"for_date": night,
+					"occupied_count": 0,
+					"out_of_order_count": 0,
+				}
+			).db_insert()
+		cls.reservations = []
+		for i in range(PARALLEL_SUBMITS):
+			name = f"_T-OVERSELL-{i:03d}"
+			frappe.get_doc(
+				{
+					"doctype": "Hotel Reservation",
+					"name": name,
+					"room_type": TEST_ROOM_TYPE,
+					"check_in_date": CHECK_IN,
+					"check_out_date": CHECK_OUT,
+					"number_of_rooms": 1,
+				}
+			).db_insert()
+			cls.reservations.append(name)
+		frappe.db.commit()
+
+	@classmethod
+	def tearDownClass(cls):
+		cls._cleanup()
+		frappe.db.commit()
+		super().tearDownClass()
+
+	@staticmethod
+	def _cleanup():
+		frappe.db.delete("Hotel Reservation", {"name": ("like", "_T-OVERSELL-%")})
+		frappe.db.delete("Room Type Inventory", {"room_type": TEST_ROOM_TYPE})
+		frappe.db.delete("Room Type Room", {"room_type": TEST_ROOM_TYPE})
+		frappe.db.delete("Room Type", {"name": TEST_ROOM_TYPE})
+		frappe.db.sql("DELETE FROM room_type_room_count WHERE room_type = %s", TEST_ROOM_TYPE)
+		frappe.db.sql("DELETE FROM inventory_delta_ledger WHERE room_type = %s", TEST_ROOM_TYPE)
+		frappe.db.sql("DELETE FROM otb_current WHERE room_type = %s", TEST_ROOM_TYPE)
+		frappe.db.sql("DELETE FROM otb_snapshot_delta WHERE room_type = %s", TEST_ROOM_TYPE)
+
+	def test_bulk_apply_only_touches_reservations_in_the_expected_state(self):
+		submitted, draft = self.reservations[:2]
+		frappe.db.sql("UPDATE `tabHotel Reservation` SET docstatus = 1 WHERE name = %s", submitted)
+		frappe.db.sql(
+			"UPDATE `tabRoom Type Inventory` SET occupied_count = 0 WHERE room_type = %s", TEST_ROOM_TYPE
+		)
+		frappe.db.commit()
+		try:
+			held = apply_reservation_inventory_bulk([submitted, draft], 1, update_documents=0)
+			self.assertEqual([r["status"] for r in held["results"]], ["SKIPPED", "APPLIED"])
+
+			released = apply_reservation_inventory_bulk([draft], 2, update_documents=0)
+			self.assertEqual(released["results"][0]["status"], "INVALID_STATE")
+			self.assertRaises(frappe.ValidationError, apply_reservation_inventory_bulk, [draft], 0)
+
+			occupied = frappe.db.sql(
+				"SELECT DISTINCT occupied_count FROM room_type_inventory WHERE room_type = %s", TEST_ROOM_TYPE
+			)
+			self.assertEqual(occupied, ((1,),))  # only the draft was held, nothing released
+		finally:
+			frappe.db.sql("UPDATE `tabHotel Reservation` SET docstatus = 0 WHERE name = %s", submitted)
+			frappe.db.sql(
+				"UPDATE `tabRoom Type Inventory` SET occupied_count = 0 WHERE room_type = %s", TEST_ROOM_TYPE
+			)
+			frappe.db.sql("DELETE FROM inventory_delta_ledger WHERE room_type = %s", TEST_ROOM_TYPE)
+			frappe.db.commit()
+
+	def test_submit_and_cancel_apply_inventory_with_the_document(self):
+		def occupied():
+			return frappe.db.sql(
+				"SELECT DISTINCT occupied_count FROM room_type_inventory WHERE room_type = %s", TEST_ROOM_TYPE
+			)
+
+		def new_reservation():
+			doc = frappe.get_doc(
+				{
+					"doctype": "Hotel Reservation",
+					"naming_series": "RES-.YYYY.-.MM.-.#####",
+					"room_type": TEST_ROOM_TYPE,
+					"check_in_date": CHECK_IN,
+					"check_out_date": CHECK_OUT,
+					"number_of_nights": len(NIGHTS),
+					"number_of_rooms": 1,
+				}
+			)
+			doc.flags.ignore_mandatory = doc.flags.ignore_links = True
+			return doc.insert()
+
+		doc = new_reservation()
+		try:
+			doc.submit()
+			self.assertEqual(occupied(), ((1,),))
+			frappe.db.rollback()  # the hold goes with the uncommitted submit
+			self.assertEqual(occupied(), ((0,),))
+
+			doc = new_reservation()
+			doc.submit()
+			frappe.db.commit()
+			self.assertEqual(occupied(), ((1,),))
+			doc.cancel()
+			frappe.db.commit()
+			self.assertEqual(occupied(), ((0,),))
+		finally:
+			frappe.db.rollback()
+			frappe.db.delete("Hotel Reservation", {"room_type": TEST_ROOM_TYPE, "name": ("like", "RES-%")})
+			frappe.db.sql(
+				"UPDATE `tabRoom Type Inventory` SET occupied_count = 0 WHERE room_type = %s", TEST_ROOM_TYPE
+			)
+			frappe.db.sql("DELETE FROM inventory_delta_ledger WHERE room_type = %s", TEST_ROOM_TYPE)
+			frappe.db.commit()
+
+	def test_only_the_owner_releases_a_hold(self):
+		hold_id = frappe.generate_hash(length=16)
+		payload = {"room_type": TEST_ROOM_TYPE, "start": NIGHTS[0], "end": NIGHTS[-1], "rooms": 1, "owner": "Administrator"}
+		frappe.cache.set(frappe.cache.make_key(HOLD_PREFIX + hold_id), frappe.as_json(payload), ex=60)
+		try:
+			frappe.set_user("Guest")
+			self.assertRaises(frappe.PermissionError, release_inventory_hold, hold_id)
+			frappe.set_user("Administrator")
+			self.assertEqual(release_inventory_hold(hold_id), {"released": True})
+			self.assertIsNone(get_hold(hold_id))
+		finally:
+			frappe.set_user("Administrator")
+			frappe.cache.delete(frappe.cache.make_key(HOLD_PREFIX + hold_id))
+
+	def test_parallel_holds_never_oversell(self):
+		barrier = threading.Barrier(PARALLEL_SUBMITS)
+		statuses = []
+		errors = []
+		lock = threading.Lock()
+
+		def submit(reservation_name):
+			conn = _connect()
+			try:
+				with conn.cursor() as cur:
+					barrier.wait()
+					cur.execute("CALL apply_reservation_inventory(%s, 1)", (reservation_name,))
+					row = cur.fetchone()
+					while cur.nextset():
+						pass
+				if row["status"] == "APPLIED":
+					conn.commit()
+				else:
+					conn.rollback()
+				with lock:
+					statuses.append(row["status"])
+			except Exception as e:
+				conn.rollback()
+				with lock:
+					errors.append(e)
+			finally:
+				conn.close()
+
+		threads = [threading.Thread(target=submit, args=(name,)) for name in self.reservations]
+		for t in threads:
+			t.start()
+		for t in threads:
+			t.join()
+
+		self.assertEqual(errors, [])
+		self.assertEqual(statuses.count("APPLIED"), ROOMS)
+		self.assertEqual(statuses.count("CONFLICT"), PARALLEL_SUBMITS - ROOMS)
+
+		frappe.db.rollback()  # fresh snapshot
+		occupied = frappe.db.get_all(
+			"Room Type Inventory",
+			filters={"room_type": TEST_ROOM_TYPE},
+			fields=["for_date", "occupied_count"],
+		)
+		self.assertEqual(len(occupied), len(NIGHTS))
+		for row in occupied:
+			self.assertEqual(row.occupied_count, ROOMS, row)
+
+	def test_release_is_buffered_until_compaction(self):
+		def raw():
+			return frappe.db.sql(
+				"SELECT for_date, occupied_count FROM `tabRoom Type Inventory` WHERE room_type = %s",
+				TEST_ROOM_TYPE,
+			)
+
+		def view():
+			return frappe.db.sql(
+				"SELECT for_date, occupied_count FROM room_type_inventory WHERE room_type = %s",
+				TEST_ROOM_TYPE,
+			)
+
+		frappe.db.sql(
+			"UPDATE `tabRoom Type Inventory` SET occupied_count = 2 WHERE room_type = %s", TEST_ROOM_TYPE
+		)
+		frappe.db.sql("CALL apply_reservation_inventory(%s, 2)", self.reservations[0])
+		frappe.db.commit()
+
+		self.assertEqual({c for _, c in raw()}, {2})  # inventory rows untouched
+		self.assertEqual({c for _, c in view()}, {1})  # pending delta read through
+		pending = frappe.db.sql(
+			"SELECT COUNT(*) FROM inventory_delta_ledger WHERE room_type = %s AND applied = 0",
+			TEST_ROOM_TYPE,
+		)[0][0]
+		self.assertEqual(pending, len(NIGHTS))
+
+		inventory_ledger.compact()
+
+		self.assertEqual({c for _, c in raw()}, {1})
+		self.assertEqual({c for _, c in view()}, {1})
+
+		frappe.db.sql(
+			"UPDATE `tabRoom Type Inventory` SET occupied_count = 0 WHERE room_type = %s", TEST_ROOM_TYPE
+		)
+		frappe.db.sql("DELETE FROM inventory_delta_ledger WHERE room_type = %s", TEST_ROOM_TYPE)
+		frappe.db.commit()
+
+	def test_reconciliation_counts_assigned_rooms_on_their_room_type(self):
+		other = f"{TEST_ROOM_TYPE} B"
+		reservation = self.reservations[0]
+
+		def cleanup():
+			frappe.db.delete("Reservation Room Assignment", {"parent": reservation})
+			frappe.db.delete("Room Type Inventory", {"room_type": other})
+			frappe.db.delete("Room Type Room", {"room_type": other})
+			frappe.db.delete("Room Type", {"name": other})
+			frappe.db.sql("DELETE FROM room_type_room_count WHERE room_type = %s", other)
+			frappe.db.sql("UPDATE `tabHotel Reservation` SET docstatus = 0 WHERE name = %s", reservation)
+			frappe.db.commit()
+
+		cleanup()
+		frappe.get_doc({"doctype": "Room Type", "name": other}).db_insert()
+		frappe.get_doc({"doctype": "Room Type Room", "name": f"{other}-0", "room_type": other}).db_insert()
+		for night in NIGHTS:
+			frappe.get_doc(
+				{
+					"doctype": "Room Type Inventory",
+					"name": f"INVE-{other}-{night}",
+					"room_type": other,
+					"for_date": night,
+					"occupied_count": 1,
+					"out_of_order_count": 0,
+				}
+			).db_insert()
+		frappe.get_doc(
+			{
+				"doctype": "Reservation Room Assignment",
+				"name": f"{reservation}-room",
+				"parent": reservation,
+				"parenttype": "Hotel Reservation",
+				"parentfield": "assigned_rooms",
+				"room_type_room": f"{other}-0",
+			}
+		).db_insert()
+		frappe.db.sql("UPDATE `tabHotel Reservation` SET docstatus = 1 WHERE name = %s", reservation)
+		frappe.db.sql(
+			"UPDATE `tabRoom Type Inventory` SET occupied_count = 0 WHERE room_type = %s", TEST_ROOM_TYPE
+		)
+		frappe.db.commit()
+		try:
+			# the room was moved to the other room type: neither side drifts
+			for room_type in (TEST_ROOM_TYPE, other):
+				report = reconcile_room_type(room_type, NIGHTS[0], next_for_date(NIGHTS[-1]), dry_run=1)
+				self.assertEqual(report["nights_checked"], len(NIGHTS), room_type)
+				self.assertEqual(report["diffs"], 0, room_type)
+		finally:
+			cleanup()
+
+	def test_reconciliation_dry_run_then_correct(self):
+		# none of the fixture reservations is submitted, so every night should be 0
+		frappe.db.sql(
+			"UPDATE `tabRoom Type Inventory` SET occupied_count = 3 WHERE room_type = %s", TEST_ROOM_TYPE
+		)
+		frappe.db.commit()
+
+		report = reconcile_room_type(TEST_ROOM_TYPE, NIGHTS[0], next_for_date(NIGHTS[-1]), dry_run=1)
+		self.assertEqual(report["nights_checked"], len(NIGHTS))
+		self.assertEqual(report["diffs"], len(NIGHTS))
+		self.assertEqual(report["corrected"], 0)
+		self.assertEqual({d["delta"] for d in report["sample"]}, {-3})
+		occupied = frappe.db.sql(
+			"SELECT DISTINCT occupied_count FROM `tabRoom Type Inventory` WHERE room_type = %s", TEST_ROOM_TYPE
+		)
+		self.assertEqual(occupied, ((3,),))  # dry run wrote nothing
+
+		report = reconcile_room_type(TEST_ROOM_TYPE, NIGHTS[0], next_for_date(NIGHTS[-1]), dry_run=0)
+		self.assertEqual(report["corrected"], len(NIGHTS))
+		frappe.db.rollback()
+		occupied = frappe.db.sql(
+			"SELECT DISTINCT occupied_count FROM `tabRoom Type Inventory` WHERE room_type = %s", TEST_ROOM_TYPE
+		)
+		self.assertEqual(occupied, ((0,),))
+
+		frappe.db.sql("DELETE FROM inventory_delta_ledger WHERE room_type = %s", TEST_ROOM_TYPE)
+		frappe.db.commit()
+
+	def test_daily_kpi_snapshot_matches_views_and_freezes_on_audit(self):
+		# nothing here commits: the snapshot rows written below are rolled back at the end
+		def live(night):
+			return frappe.db.sql(
+				"""
+				SELECT SUM(total_count), SUM(occupied_count), SUM(total_available_units), SUM(out_of_order_count)
+				FROM room_type_inventory WHERE for_date = %s
+				""",
+				night,
+			)[0]
+
+		refresh_daily_kpi(NIGHTS[0], next_for_date(NIGHTS[-1]))
+		rows = kpi_rows(NIGHTS[0], NIGHTS[-1])
+		self.assertEqual([r.for_date for r in rows], list(NIGHTS))
+		for r in rows:
+			self.assertEqual((r.total_rooms, r.in_house, r.available, r.out_of_order), tuple(int(v or 0) for v in live(r.for_date)))
+
+		finalize_daily_kpi(NIGHTS[0])
+		frozen = kpi_rows(NIGHTS[0], NIGHTS[0])[0]
+		frappe.db.sql(
+			"UPDATE `tabRoom Type Inventory` SET occupied_count = 2 WHERE room_type = %s", TEST_ROOM_TYPE
+		)
+		refresh_daily_kpi(NIGHTS[0], next_for_date(NIGHTS[-1]))
+
+		rows = {r.for_date: r for r in kpi_rows(NIGHTS[0], NIGHTS[-1])}
+		self.assertEqual(rows[NIGHTS[0]].in_house, frozen.in_house)
+		self.assertTrue(rows[NIGHTS[0]].is_final)
+		self.assertEqual(rows[NIGHTS[1]].in_house, int(live(NIGHTS[1])[1]))
+
+		frappe.db.rollback()
+
+	def test_dashboard_series_is_computed_live_without_writing(self):
+		# deleted inside the test's transaction only: the rollback below restores the site's rows
+		frappe.db.sql("DELETE FROM daily_kpi WHERE for_date BETWEEN %s AND %s", (NIGHTS[0], NIGHTS[-1]))
+
+		daily = kpi_series(NIGHTS[0], NIGHTS[-1])
+		month = kpi_series(NIGHTS[0], NIGHTS[-1], rollup="month")
+		written = frappe.db.sql(
+			"SELECT COUNT(*) FROM daily_kpi WHERE for_date BETWEEN %s AND %s", (NIGHTS[0], NIGHTS[-1])
+		)[0][0]
+		self.assertEqual(written, 0)
+
+		# a non-final refresh computes the same per-night figures
+		refresh_daily_kpi(NIGHTS[0], next_for_date(NIGHTS[-1]))
+		rows = kpi_rows(NIGHTS[0], NIGHTS[-1])
+		self.assertEqual(daily["period"], list(NIGHTS))
+		self.assertEqual(daily["in_house"], [r.in_house for r in rows])
+		self.assertEqual(daily["available"], [r.available for r in rows])
+		self.assertEqual([float(v) for v in daily["occupancy_pct"]], [float(r.occupancy_pct) for r in rows])
+
+		self.assertEqual(month["period"], [202603])
+		self.assertEqual(month["start_for_date"], [NIGHTS[0]])
+		self.assertEqual(month["end_for_date"], [NIGHTS[-1]])
+		self.assertEqual(month["in_house"], [sum(r.in_house for r in rows)])
+		self.assertEqual(month["arrivals"], [sum(r.arrivals for r in rows)])
+
+		# audited nights keep their frozen figures; the rest follow the inventory
+		finalize_daily_kpi(NIGHTS[0])
+		frappe.db.sql(
+			"UPDATE `tabRoom Type Inventory` SET occupied_count = occupied_count + 1 WHERE room_type = %s",
+			TEST_ROOM_TYPE,
+		)
+		after = kpi_series(NIGHTS[0], NIGHTS[-1])
+		self.assertEqual(after["in_house"][0], daily["in_house"][0])
+		self.assertEqual(after["is_final"][0], 1)
+		self.assertEqual(after["in_house"][1:], [v + 1 for v in daily["in_house"][1:]])
+
+		self.assertRaises(frappe.ValidationError, kpi_series, NIGHTS[0], NIGHTS[-1], "quarter")
+		frappe.db.rollback()
+
+	def test_otb_snapshots_store_deltas_and_rebuild_pace(self):
+		if last_snapshot_date() > 20260301:
+			self.skipTest("site already holds later on-the-books captures")
+
+		def book(names, docstatus):
+			frappe.db.sql(
+				"UPDATE `tabHotel Reservation` SET docstatus = %s, base_rate_per_night = 100 WHERE name IN %s",
+				(docstatus, tuple(names)),
+			)
+
+		book(self.reservations[:3], 1)
+		capture_otb_snapshot(20260301, next_for_date(NIGHTS[-1]))
+		book(self.reservations[:1], 2)
+		book(self.reservations[3:5], 1)
+		capture_otb_snapshot(20260308, next_for_date(NIGHTS[-1]))
+		capture_otb_snapshot(20260308, next_for_date(NIGHTS[-1]))  # same day again: nothing new
+
+		deltas = frappe.db.sql(
+			"""
+			SELECT snapshot_date, rooms_delta FROM otb_snapshot_delta
+			WHERE room_type = %s ORDER BY snapshot_date, stay_date
+			""",
+			TEST_ROOM_TYPE,
+		)
+		self.assertEqual([tuple(d) for d in deltas], [(20260301, 3)] * 3 + [(20260308, 1)] * 3)
+
+		report = pace_report(NIGHTS[0], NIGHTS[-1], as_of=20260308, room_type=TEST_ROOM_TYPE)
+		self.assertEqual(report["pickup_from"], 20260301)
+		self.assertEqual([r["stay_date"] for r in report["rows"]], list(NIGHTS))
+		for r in report["rows"]:
+			self.assertEqual((r["rooms"], r["pickup_rooms"]), (4, 1))
+			self.assertEqual((r["revenue"], r["pickup_revenue"]), (400.0, 100.0))
+			self.assertEqual(r["ly_rooms"], 0)
+
+		before = pace_report(NIGHTS[0], NIGHTS[-1], as_of=20260305, room_type=TEST_ROOM_TYPE)
+		self.assertEqual([r["rooms"] for r in before["rows"]], [3, 3, 3])
+		self.assertRaises(frappe.ValidationError, capture_otb_snapshot, 20260302, next_for_date(NIGHTS[-1]))
+		frappe.db.rollback()
@@ -1,9 +1,432 @@
 # Copyright (c) 2025, Your Name and Contributors
 # See license.txt
 
-# import frappe
+import csv
+import io
+from unittest.mock import patch
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from abchotels.abc_hotels.api.ari_export import EXPORT_COLUMNS, write_ari
+from abchotels.abc_hotels.api.inventory import get_availability_grid_simple, get_availability_raw_data
+from abchotels.abc_hotels.api.rates import expand_rate_rules, normalize_rules
+from abchotels.abc_hotels.utils import availability_cache, availability_push
+from abchotels.abc_hotels.utils.availability_grid import INVENTORY_FIELDS, load_grid
+from abchotels.abc_hotels.utils.availability_push import _delta_payload
+from abchotels.abc_hotels.utils.date_calendar import (
+	calendar_version,
+	days_between,
+	ensure_dim_date,
+	invalidate_calendar,
+)
+from abchotels.abc_hotels.utils.inventory_events import next_for_date
+from abchotels.abc_hotels.utils.inventory_keys import inventory_key
+from abchotels.abc_hotels.utils.stay_index import (
+	CACHE_KEY,
+	INDEX_SCAN_SQL,
+	RoomTypeStayIndex,
+	_generations,
+	get_stay_indexes,
+	invalidate_stay_index,
+)
+
+# grid / push / export fixture: A has every night and a price on each, B is sparse
+GRID_ROOMS = {"_Test Grid Room Type A": 3, "_Test Grid Room Type B": 2}
+GRID_A, GRID_B = GRID_ROOMS
+GRID_NIGHTS = (20260105, 20260106, 20260107, 20260108, 20260109, 20260110, 20260111)
+GRID_B_NIGHTS = GRID_NIGHTS[:4]
+GRID_B_PRICED = GRID_NIGHTS[:2]
+GRID_RATE_CODE = "_Test Grid BAR"
+GRID_POLICY = "_Test Grid Policy"
+
+
+def _grid_cell(room_type, night):
+	"""(total_available_units, occupied_count, out_of_order_count) the fixture gives a night."""
+	i = GRID_NIGHTS.index(night)
+	if room_type == GRID_A:
+		occupied, out_of_order = i % 3, 1 if i == 0 else 0
+	else:
+		occupied, out_of_order = 1, 0
+	return GRID_ROOMS[room_type] - occupied - out_of_order, occupied, out_of_order
+
+
+def _grid_nights(room_type):
+	return GRID_NIGHTS if room_type == GRID_A else GRID_B_NIGHTS
+
+
+def _grid_price(room_type, night):
+	if room_type == GRID_B and night not in GRID_B_PRICED:
+		return None
+	return 100.0 + GRID_NIGHTS.index(night)
+
 
 class TestRoomTypeInventory(FrappeTestCase):
-	pass
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls._cleanup_grid_fixture()
+		frappe.get_doc({"doctype": "Cancelation Policy", "name": GRID_POLICY}).db_insert()
+		frappe.get_doc({"doctype": "Rate Code", "name": GRID_RATE_CODE, "cacnelation_policy": GRID_POLICY}).db_insert()
+		for room_type, rooms in GRID_ROOMS.items():
+			frappe.get_doc({"doctype": "Room Type", "name": room_type}).db_insert()
+			for i in range(rooms):
+				frappe.get_doc(
+					{"doctype": "Room Type Room", "name": f"{room_type}-{i}", "room_type": room_type}
+				).db_insert()
+			for night in _grid_nights(room_type):
+				_, occupied, out_of_order = _grid_cell(room_type, night)
+				inv = frappe.get_doc(
+					{
+						"doctype": "Room Type Inventory",
+						"name": f"INVE-{room_type}-{night}",
+						"room_type": room_type,
+						"for_date": night,
+						"occupied_count": occupied,
+						"out_of_order_count": out_of_order,
+					}
+				)
+				inv.db_insert()
+				price = _grid_price(room_type, night)
+				if price is not None:
+					frappe.db.sql(
+						"""
+						INSERT INTO `tabRoom Type Inventory Rate Code`
+							(name, parent, parenttype, parentfield, rate_code, rate_price)
+						VALUES (%s, %s, 'Room Type Inventory', 'rate_codes', %s, %s)
+						""",
+						(f"{inv.name}-{GRID_RATE_CODE}", inv.name, GRID_RATE_CODE, price),
+					)
+		frappe.db.commit()
+
+	@classmethod
+	def tearDownClass(cls):
+		cls._cleanup_grid_fixture()
+		frappe.db.commit()
+		super().tearDownClass()
+
+	@staticmethod
+	def _cleanup_grid_fixture():
+		for room_type in GRID_ROOMS:
+			frappe.db.sql(
+				"""
+				DELETE irc FROM `tabRoom Type Inventory Rate Code` irc
+				JOIN `tabRoom Type Inventory` inv ON inv.name = irc.parent
+				WHERE inv.room_type = %s
+				""",
+				room_type,
+			)
+			frappe.db.delete("Room Type Inventory", {"room_type": room_type})
+			frappe.db.delete("Room Type Room", {"room_type": room_type})
+			frappe.db.delete("Room Type", {"name": room_type})
+			frappe.db.sql("DELETE FROM room_type_room_count WHERE room_type = %s", room_type)
+		frappe.db.delete("Rate Code", {"name": GRID_RATE_CODE})
+		frappe.db.delete("Cancelation Policy", {"name": GRID_POLICY})
+
+	def _plan(self, sql, values):
+		return {row.table: row for row in frappe.db.sql(f"EXPLAIN {sql}", values, as_dict=True)}
+
+	def test_stay_index_scan_is_index_driven(self):
+		"""A FIND_IN_SET style predicate leaves possible_keys empty and plans a full scan."""
+		plan = self._plan(INDEX_SCAN_SQL, (("Regression Room A", "Regression Room B"),))
+
+		inv = plan.get("inv")
+		self.assertIsNotNone(inv, plan)
+		self.assertIn("idx_room_type_for_date", inv.possible_keys or "")
+
+		irc = plan.get("irc")
+		self.assertIsNotNone(irc, plan)
+		self.assertIn("idx_inv_key_rate_code", irc.possible_keys or "")
+		self.assertNotEqual(irc.type, "ALL")
+
+	def test_stay_index_built_before_an_invalidation_is_not_served(self):
+		# a reader scanned its rows, then a write committed and invalidated before it stored them
+		generation = _generations([GRID_A])[GRID_A]
+		invalidate_stay_index([GRID_A])
+		frappe.cache.hset(CACHE_KEY, GRID_A, (generation, RoomTypeStayIndex(GRID_A)))
+
+		index = get_stay_indexes([GRID_A])[GRID_A]
+		self.assertEqual(index.total_count, GRID_ROOMS[GRID_A])
+		invalidate_stay_index([GRID_A])
+
+	def test_available_inventory_filters_through_temp_tables(self):
+		def call(start, end, rooms, rate_codes, room_types):
+			rows = frappe.db.sql(
+				"CALL get_available_inventory(%s, %s, %s, %s, %s)",
+				(start, end, rooms, rate_codes, room_types),
+				as_dict=True,
+			)
+			return {r.room_type: r for r in rows}
+
+		end = next_for_date(GRID_NIGHTS[-1])
+		rows = call(GRID_NIGHTS[0], end, 1, GRID_RATE_CODE, GRID_A)
+		self.assertEqual(list(rows), [GRID_A])
+		row = rows[GRID_A]
+		self.assertEqual(row.rate_code, GRID_RATE_CODE)
+		self.assertEqual(row.min_available_units, min(_grid_cell(GRID_A, n)[0] for n in GRID_NIGHTS))
+		self.assertEqual(float(row.total_stay), sum(_grid_price(GRID_A, n) for n in GRID_NIGHTS))
+
+		# rooms above the tightest night, or a rate code nobody sells, match nothing
+		self.assertEqual(call(GRID_NIGHTS[0], end, row.min_available_units + 1, GRID_RATE_CODE, GRID_A), {})
+		self.assertEqual(call(GRID_NIGHTS[0], end, 1, "_Test No Such Rate", GRID_A), {})
+
+		# CSV items are trimmed; B only sells its priced nights
+		priced_end = next_for_date(GRID_B_PRICED[-1])
+		rows = call(GRID_NIGHTS[0], priced_end, 1, f" {GRID_RATE_CODE} ", f"{GRID_A} , {GRID_B}")
+		self.assertEqual(set(rows), {GRID_A, GRID_B})
+		self.assertEqual(float(rows[GRID_B].total_stay), sum(_grid_price(GRID_B, n) for n in GRID_B_PRICED))
+
+		# the filter temp tables outlive the CALL in this session: plan the procedure's query
+		plan = self._plan(
+			"""
+			SELECT r.rate_code, r.room_type, MIN(r.total_available_units)
+			FROM room_type_inventory_rates r
+			JOIN tmp_filter_room_type frt ON frt.room_type = r.room_type
+			JOIN tmp_filter_rate_code frc ON frc.rate_code = r.rate_code
+			WHERE r.for_date >= %s AND r.for_date < %s
+			GROUP BY r.room_type, r.total_count, r.rate_code
+			""",
+			(GRID_NIGHTS[0], priced_end),
+		)
+		self.assertIn("frt", plan)
+		self.assertIn("frc", plan)
+		self.assertIn("idx_room_type_for_date", plan["inv"].possible_keys or "")
+		self.assertNotEqual(plan["inv"].type, "ALL")
+		self.assertNotEqual(plan["irc"].type, "ALL")
+
+	def test_date_range_by_room_type_is_index_driven(self):
+		plan = self._plan(
+			"""
+			SELECT inv.name FROM `tabRoom Type Inventory` inv
+			WHERE inv.room_type IN %s AND inv.for_date >= %s AND inv.for_date < %s
+			""",
+			(("Regression Room A",), 20250101, 20250201),
+		)
+		self.assertIn("idx_room_type_for_date", plan["inv"].possible_keys or "")
+
+	def test_rate_rules_weekend_and_season_precedence(self):
+		calendar = [
+			{"for_date": 20260703, "weekend_indr": 1, "day_name": "Friday"},
+			{"for_date": 20260704, "weekend_indr": 1, "day_name": "Saturday"},
+			{"for_date": 20260706, "weekend_indr": 0, "day_name": "Monday"},
+			{"for_date": 20260801, "weekend_indr": 1, "day_name": "Saturday"},
+		]
+		rules = normalize_rules(
+			[
+				{
+					"rate_code": "BAR",
+					"room_types": ["DBL", "TWN"],
+					"start_date": "2026-07-01",
+					"end_date": "2026-08-31",
+					"weekday_price": 90,
+					"weekend_price": 120,
+				},
+				{
+					"rate_code": "BAR",
+					"room_type": "DBL",
+					"start_date": "2026-07-04",
+					"end_date": "2026-07-31",
+					"price": 150,
+					"day_prices": {"Saturday": 170},
+				},
+			]
+		)
+		prices = expand_rate_rules(rules, calendar)
+
+		self.assertEqual(prices[("TWN", 20260703, "BAR")], 120)
+		self.assertEqual(prices[("TWN", 20260706, "BAR")], 90)
+		self.assertEqual(prices[("DBL", 20260703, "BAR")], 120)  # before the season
+		self.assertEqual(prices[("DBL", 20260704, "BAR")], 170)  # season, day override
+		self.assertEqual(prices[("DBL", 20260706, "BAR")], 150)  # season flat price
+		self.assertEqual(prices[("DBL", 20260801, "BAR")], 120)  # after the season
+		self.assertEqual(len(prices), 8)
+
+	def test_inventory_key_is_set_on_insert(self):
+		room_type = "_Test Key Room Type"
+		frappe.get_doc({"doctype": "Room Type", "name": room_type}).db_insert()
+		inv = frappe.get_doc(
+			{
+				"doctype": "Room Type Inventory",
+				"name": f"INVE-{room_type}-20260101",
+				"room_type": room_type,
+				"for_date": 20260101,
+				"occupied_count": 0,
+				"out_of_order_count": 0,
+			}
+		)
+		inv.db_insert()
+		frappe.db.sql(
+			"""
+			INSERT INTO `tabRoom Type Inventory Rate Code` (name, parent, parenttype, parentfield, rate_code, rate_price)
+			VALUES (%s, %s, 'Room Type Inventory', 'rate_codes', 'BAR', 100)
+			""",
+			(f"{inv.name}-BAR", inv.name),
+		)
+
+		type_id = frappe.db.sql("SELECT id FROM room_type_key WHERE room_type = %s", room_type)[0][0]
+		inv_key = frappe.db.sql("SELECT inv_key FROM `tabRoom Type Inventory` WHERE name = %s", inv.name)[0][0]
+		self.assertEqual(inv_key, inventory_key(type_id, 20260101))
+		rate_key = frappe.db.sql(
+			"SELECT inv_key FROM `tabRoom Type Inventory Rate Code` WHERE name = %s", f"{inv.name}-BAR"
+		)[0][0]
+		self.assertEqual(rate_key, inv_key)
+		frappe.db.rollback()
+
+	def test_cached_availability_never_outlives_the_first_hold_expiry(self):
+		key = availability_cache.entry_key("test", frappe.generate_hash(length=8))
+		availability_cache.store(key, {}, {"availability": []}, ttl=4.2)
+		ttl = frappe.cache.ttl(frappe.cache.make_key(key))
+		self.assertTrue(0 < ttl <= 5, ttl)
+		availability_cache.store(key, {}, {"availability": []})
+		self.assertGreater(frappe.cache.ttl(frappe.cache.make_key(key)), 5)
+		frappe.cache.delete_value(key)
+
+	def test_failed_version_bump_flushes_cached_availability(self):
+		key = availability_cache.entry_key("test", frappe.generate_hash(length=8))
+		availability_cache.store(key, {}, {"availability": []})
+		with patch.object(frappe.cache, "pipeline", side_effect=ConnectionError("redis down")):
+			availability_cache.bump_versions(["Any Room Type"], 20260101, 20260102)
+		self.assertIsNone(availability_cache.lookup(key, {}))
+
+	def test_invalidating_the_calendar_moves_its_shared_version(self):
+		before = calendar_version()
+		invalidate_calendar()
+		self.assertEqual(calendar_version(), before + 1)
+
+	def test_calendar_labels_match_dim_date(self):
+		invalidate_calendar()
+		expected = frappe.db.sql(
+			"""
+			SELECT for_date, CONCAT(LEFT(day_name, 3), '<br/>', LPAD(day_of_month, 2, '0')) AS label_html,
+			       weekend_indr
+			FROM dim_date WHERE for_date BETWEEN %s AND %s ORDER BY for_date
+			""",
+			(20260101, 20260131),
+			as_dict=True,
+		)
+		days = days_between(20260101, 20260131)
+		self.assertEqual(
+			[(d["for_date"], d["label_html"], d["weekend_indr"]) for d in days],
+			[(r.for_date, r.label_html, r.weekend_indr) for r in expected],
+		)
+
+	def test_ensure_dim_date_only_seeds_past_the_calendar_end(self):
+		last = frappe.db.sql("SELECT MAX(date_actual) FROM dim_date")[0][0]
+		self.assertIsNotNone(last)
+		self.assertFalse(ensure_dim_date(last))
+		self.assertEqual(frappe.db.sql("SELECT MAX(date_actual) FROM dim_date")[0][0], last)
+
+	def test_compact_grid_matches_html_grid(self):
+		start, end = GRID_NIGHTS[0], GRID_NIGHTS[-1]
+		for room_type in GRID_ROOMS:
+			html = get_availability_grid_simple(start, end, room_type=room_type)
+			compact = get_availability_grid_simple(start, end, room_type=room_type, compact=1)
+
+			self.assertEqual([c["for_date"] for c in compact["columns"]], list(GRID_NIGHTS))
+			self.assertEqual(set(html["data"]), {room_type})
+			self.assertEqual(set(compact["data"]), {room_type})
+			cells = html["data"][room_type]
+			self.assertEqual([c["for_date"] for c in cells], list(_grid_nights(room_type)))
+			series = compact["data"][room_type]
+			self.assertNotIn("html_cell", series)
+			for i, night in enumerate(GRID_NIGHTS):
+				expected = _grid_cell(room_type, night) if night in _grid_nights(room_type) else (0, 0, 0)
+				self.assertEqual(
+					(
+						series["total_available_units"][i],
+						series["occupied_count"][i],
+						series["out_of_order_count"][i],
+					),
+					expected,
+					(room_type, night),
+				)
+			for cell in cells:
+				self.assertEqual(
+					(cell["total_available_units"], cell["occupied_count"], cell["out_of_order_count"]),
+					_grid_cell(room_type, cell["for_date"]),
+				)
+
+	def test_grid_window_returns_only_the_requested_block(self):
+		start, end = GRID_NIGHTS[0], GRID_NIGHTS[-1]
+		full = get_availability_grid_simple(start, end, room_type=GRID_A, compact=1)
+		block = get_availability_grid_simple(start, end, room_type=GRID_A, compact=1, day_offset=2, day_limit=3)
+
+		self.assertEqual([c["for_date"] for c in block["columns"]], list(GRID_NIGHTS[2:5]))
+		self.assertEqual(block["window"]["total_days_in_range"], len(GRID_NIGHTS))
+		self.assertEqual(set(block["data"]), {GRID_A})
+		for field, values in block["data"][GRID_A].items():
+			self.assertEqual(values, full["data"][GRID_A][field][2:5])
+		self.assertEqual(block["data"][GRID_A]["occupied_count"], [_grid_cell(GRID_A, n)[1] for n in GRID_NIGHTS[2:5]])
+
+		# room type paging: the page holding B, one room type wide
+		names = frappe.get_all("Room Type", pluck="name", order_by="name asc")
+		page = get_availability_grid_simple(
+			start, end, compact=1, room_type_offset=names.index(GRID_B), room_type_limit=1
+		)
+		self.assertEqual(set(page["data"]), {GRID_B})
+		self.assertEqual(page["window"]["total_room_types_in_range"], len(names))
+
+	def test_grid_engine_pivots_one_scan_into_dense_arrays(self):
+		columns = days_between(GRID_NIGHTS[0], GRID_NIGHTS[-1])
+		grid = load_grid(columns, room_types=list(GRID_ROOMS), rates=True)
+
+		self.assertEqual(list(grid.inventory), [GRID_A, GRID_B])
+		for room_type in GRID_ROOMS:
+			nights = _grid_nights(room_type)
+			self.assertEqual([day["for_date"] for _, day in grid.nights(room_type)], list(nights))
+			self.assertEqual(list(grid.present[room_type]), [1 if n in nights else 0 for n in GRID_NIGHTS])
+			self.assertEqual(
+				grid.inventory[room_type]["total_available_units"],
+				[_grid_cell(room_type, n)[0] if n in nights else 0 for n in GRID_NIGHTS],
+			)
+			self.assertEqual(grid.rates[room_type][GRID_RATE_CODE], [_grid_price(room_type, n) for n in GRID_NIGHTS])
+
+			raw = get_availability_raw_data(GRID_NIGHTS[0], GRID_NIGHTS[-1], room_type)["data"][room_type]
+			self.assertEqual([c["for_date"] for c in raw], list(nights))
+
+		only_a = load_grid(columns, room_types=[GRID_A], rate_code=GRID_RATE_CODE, rates=True)
+		self.assertEqual(list(only_a.rates), [GRID_A])
+
+	def test_availability_delta_is_cells_or_scoped_reload(self):
+		self.assertEqual(_delta_payload(None, None, None)["reload"], 1)
+
+		room_types = set(GRID_ROOMS)
+		start, end = GRID_NIGHTS[0], next_for_date(GRID_NIGHTS[-1])
+		delta = _delta_payload(room_types, start, end)
+		self.assertNotIn("reload", delta)
+		self.assertEqual(delta["room_types"], sorted(room_types))
+		self.assertEqual(delta["fields"], list(INVENTORY_FIELDS))
+		self.assertEqual(
+			[(rt, for_date, tuple(values)) for rt, for_date, *values in delta["cells"]],
+			[(rt, n, _grid_cell(rt, n)) for rt in sorted(room_types) for n in _grid_nights(rt)],
+		)
+
+		cells = len(GRID_NIGHTS) + len(GRID_B_NIGHTS)
+		with patch.object(availability_push, "MAX_PUSH_CELLS", cells - 1):
+			wide = _delta_payload(room_types, start, end)
+		self.assertEqual(wide["reload"], 1)
+		self.assertNotIn("cells", wide)
+		self.assertEqual((wide["start"], wide["end"]), (start, end))
+
+	def test_ari_export_streams_every_row_in_chunks(self):
+		expected = [
+			[str(n), room_type, GRID_RATE_CODE, _grid_price(room_type, n)]
+			for n in GRID_NIGHTS
+			for room_type in GRID_ROOMS
+			if _grid_price(room_type, n) is not None
+		]
+		self.assertEqual(len(expected), len(GRID_NIGHTS) + len(GRID_B_PRICED))
+		fh = io.BytesIO()
+		summary = write_ari(
+			fh, "csv", chunk_rows=4, start_date=GRID_NIGHTS[0], end_date=GRID_NIGHTS[-1], rate_code=GRID_RATE_CODE
+		)
+
+		rows = list(csv.reader(io.StringIO(fh.getvalue().decode())))
+		self.assertEqual(rows[0], list(EXPORT_COLUMNS))
+		self.assertEqual([[r[0], r[1], r[2], float(r[3])] for r in rows[1:]], expected)
+		self.assertEqual(summary["rows"], len(expected))
+		self.assertEqual(summary["chunks"], -(-len(expected) // 4))
+
+		only_b = write_ari(io.BytesIO(), "csv", room_type=GRID_B, rate_code=GRID_RATE_CODE)
+		self.assertEqual(only_b["rows"], len(GRID_B_PRICED))
+		self.assertRaises(frappe.ValidationError, write_ari, io.BytesIO(), "xlsx")
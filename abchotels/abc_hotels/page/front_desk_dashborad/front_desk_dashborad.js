@@ -24,11 +24,13 @@ frappe.pages["front_desk_dashborad"].on_page_load = function (wrapper) {
       .kpi-card .card-body { padding: 16px; }
       .kpi-card .kpi-label { color: #6b7280; font-size: 12px; margin-bottom: 4px; }
       .kpi-card .kpi-value { font-size: 22px; font-weight: 700; line-height: 1.1; }
+      .kpi-chart { margin-top: 16px; }
       .kpi-pill { display:inline-block; margin-top:6px; font-size:11px; padding:2px 6px; border-radius:999px; background:#f3f4f6; color:#374151; border:1px solid #e5e7eb; }
     </style>
 
     <div class="p-4 space-y-4">
       <div id="kpis" class="kpi-grid"></div>
+      <div id="kpi-chart" class="card kpi-card kpi-chart"><div class="card-body"></div></div>
     </div>
   `);
 
@@ -42,6 +44,17 @@ frappe.pages["front_desk_dashborad"].on_page_load = function (wrapper) {
         change: () => loadData(),
     });
 
+    // 🔹 Occupancy trend rollup
+    const SERIES_DAYS = { day: 30, week: 84, month: 183 };
+    const rollupField = page.add_field({
+        fieldtype: "Select",
+        fieldname: "rollup",
+        label: __("Trend"),
+        options: ["day", "week", "month"],
+        default: "day",
+        change: () => loadSeries(),
+    });
+
     // Load business_date from settings
     frappe.call({
         method: "frappe.client.get_value",
@@ -97,6 +110,57 @@ frappe.pages["front_desk_dashborad"].on_page_load = function (wrapper) {
                 }
             },
         });
+        loadSeries();
+    }
+
+    // 🔹 Occupancy trend from the as-of date: one call for the whole range
+    function loadSeries() {
+        const dateStr = filter.get_value();
+        if (!dateStr) return;
+        const rollup = rollupField.get_value() || "day";
+        const endStr = frappe.datetime.add_days(dateStr, SERIES_DAYS[rollup] - 1);
+
+        frappe.call({
+            method: "abchotels.abc_hotels.api.reservation.get_dashboard_series",
+            args: {
+                start_date: cint(dateStr.replace(/-/g, "")),
+                end_date: cint(endStr.replace(/-/g, "")),
+                rollup,
+            },
+            callback: function (r) {
+                if (r.message) {
+                    renderSeries(r.message);
+                }
+            },
+        });
+    }
+
+    function renderSeries(series) {
+        const label = (period) => {
+            if (series.rollup === "month") {
+                const p = String(period);
+                return `${p.slice(0, 4)}-${p.slice(4, 6)}`;
+            }
+            if (series.rollup === "week") return period;
+            const p = String(period);
+            return frappe.datetime.str_to_user(`${p.slice(0, 4)}-${p.slice(4, 6)}-${p.slice(6, 8)}`);
+        };
+
+        new frappe.Chart("#kpi-chart .card-body", {
+            title: __("Occupancy %"),
+            type: "axis-mixed",
+            height: 260,
+            data: {
+                labels: series.period.map(label),
+                datasets: [
+                    { name: __("Occupancy %"), chartType: "line", values: series.occupancy_pct.map(flt) },
+                    { name: __("Arrivals"), chartType: "bar", values: series.arrivals },
+                    { name: __("Departures"), chartType: "bar", values: series.departures },
+                ],
+            },
+            colors: ["purple", "green", "red"],
+            axisOptions: { xIsSeries: 1 },
+        });
     }
 
     // 🔹 Render KPI cards
@@ -127,6 +191,7 @@ frappe.pages["front_desk_dashborad"].on_page_load = function (wrapper) {
                 card(__("In-House"), k.in_house, "green"),
                 card(__("Occupancy %"), k.occupancy_pct, "purple"),
                 card(__("Avg Room Rate"), k.adr, "teal", true),
+                card(__("RevPAR"), k.revpar, "teal", true),
                 card(__("Arrivals"), k.arrivals, "green", false, "arrivals"),
                 card(__("Departures"), k.departures, "red", false, "departures"),
             ].join(""),
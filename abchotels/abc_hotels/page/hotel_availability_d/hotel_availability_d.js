@@ -47,15 +47,59 @@ frappe.pages["hotel-availability-d"].on_page_load = function (wrapper) {
         </div>
     `).appendTo(page.body);
 
-    // Pagination state
+    // Pagination state; allData is the compact payload of the visible block:
+    // { room_type: { total_available_units: [...], occupied_count: [...], out_of_order_count: [...] } }
+    // with every array aligned to allColumns. Blocks are fetched from the server
+    // (one page of days x one page of room types) and the next one is prefetched.
     let allColumns = [];
     let allData = {};
     let currentPage = 0;
+    let totalPages = 1;
+    let roomTypeOffset = 0;
+    let totalRoomTypes = 0;
     const daysPerPage = 7;
+    const roomTypesPerPage = 30;
+    let blockCache = {};
+
+    page.add_button("↑ Room Types", () => showRoomTypes(-roomTypesPerPage), "btn-secondary");
+    page.add_button("↓ Room Types", () => showRoomTypes(roomTypesPerPage), "btn-secondary");
 
     // Auto-run once on load
     fetchAndRender();
 
+    // Live deltas after submits / cancels / rate loads (see utils/availability_push.py)
+    frappe.realtime.on("abc_availability_delta", applyDelta);
+
+    function overlapsBlock(delta) {
+        if (!allColumns.length) return false;
+        const first = allColumns[0].for_date;
+        const last = allColumns[allColumns.length - 1].for_date;
+        if (delta.start && delta.start > last) return false;
+        if (delta.end && delta.end <= first) return false;
+        return !delta.room_types || delta.room_types.some((rt) => rt in allData);
+    }
+
+    function applyDelta(delta) {
+        if (!delta || !overlapsBlock(delta)) return;
+        // Other cached blocks may be stale now; the next page fetches fresh
+        blockCache = {};
+        if (delta.reload) {
+            showPage(currentPage);
+            return;
+        }
+        const position = {};
+        allColumns.forEach((col, i) => (position[col.for_date] = i));
+        let patched = 0;
+        (delta.cells || []).forEach(([roomType, forDate, ...values]) => {
+            const series = allData[roomType];
+            const i = position[forDate];
+            if (!series || i === undefined) return;
+            delta.fields.forEach((field, f) => (series[field][i] = values[f]));
+            patched++;
+        });
+        if (patched) renderTable();
+    }
+
     function navigateDates(days) {
         const start_date = page.fields_dict.start_date.get_value();
         const end_date = page.fields_dict.end_date.get_value();
@@ -67,10 +111,39 @@ frappe.pages["hotel-availability-d"].on_page_load = function (wrapper) {
         page.fields_dict.end_date.set_value(new_end);
     }
 
+    function blockArgs(pageNo) {
+        const room_type = page.fields_dict.room_type.get_value();
+        return {
+            start_date: toIntYYYYMMDD(page.fields_dict.start_date.get_value()),
+            end_date: toIntYYYYMMDD(page.fields_dict.end_date.get_value()),
+            room_type: room_type || "",
+            compact: 1,
+            day_offset: pageNo * daysPerPage,
+            day_limit: daysPerPage,
+            room_type_offset: room_type ? 0 : roomTypeOffset,
+            room_type_limit: room_type ? 0 : roomTypesPerPage,
+        };
+    }
+
+    function loadBlock(pageNo) {
+        const args = blockArgs(pageNo);
+        const key = JSON.stringify(args);
+        if (!blockCache[key]) {
+            blockCache[key] = frappe
+                .call({
+                    method: "abchotels.abc_hotels.api.inventory.get_availability_grid_simple",
+                    type: "GET",
+                    args,
+                })
+                .then((r) => r.message || {});
+            blockCache[key].catch(() => delete blockCache[key]);
+        }
+        return blockCache[key];
+    }
+
     function fetchAndRender() {
         const start_date = page.fields_dict.start_date.get_value();
         const end_date = page.fields_dict.end_date.get_value();
-        const room_type = page.fields_dict.room_type.get_value();
 
         if (!start_date || !end_date) {
             frappe.msgprint("Please select both start and end dates.");
@@ -82,46 +155,51 @@ frappe.pages["hotel-availability-d"].on_page_load = function (wrapper) {
             return;
         }
 
-        // Convert dates to YYYYMMDD format
-        const start_int = toIntYYYYMMDD(start_date);
-        const end_int = toIntYYYYMMDD(end_date);
+        blockCache = {};
+        roomTypeOffset = 0;
+        showPage(0);
+    }
 
+    function showRoomTypes(step) {
+        const next = roomTypeOffset + step;
+        if (next < 0 || (step > 0 && next >= totalRoomTypes)) return;
+        roomTypeOffset = next;
+        showPage(currentPage);
+    }
+
+    function showPage(pageNo) {
         // Show loading
         $("#availability-table tbody").html(
             '<tr><td colspan="100%" class="text-center">Loading...</td></tr>',
         );
 
-        frappe.call({
-            method: "abchotels.abc_hotels.api.inventory.get_availability_grid_simple",
-            type: "GET",
-            args: {
-                start_date: start_int,
-                end_date: end_int,
-                room_type: room_type || "",
-            },
-            callback: (r) => {
-                const payload = r.message || {};
+        loadBlock(pageNo)
+            .then((payload) => {
+                const win = payload.window || {};
                 allColumns = payload.columns || [];
                 allData = payload.data || {};
-
-                currentPage = 0; // Reset to first page
+                currentPage = pageNo;
+                totalPages = Math.max(1, Math.ceil((win.total_days_in_range || 0) / daysPerPage));
+                totalRoomTypes = win.total_room_types_in_range || Object.keys(allData).length;
                 renderTable();
 
                 // Update page title
-                const room_count = Object.keys(allData).length;
-                const total_days = payload.total_days || 0;
+                const first = win.room_type_offset || 0;
+                const shown = Object.keys(allData).length;
                 page.set_title(
-                    `Hotel Availability (${room_count} room types, ${total_days} days)`,
+                    `Hotel Availability (room types ${shown ? first + 1 : 0}-${first + shown} of ${totalRoomTypes}, ${win.total_days_in_range || 0} days)`,
                 );
-            },
-            error: (err) => {
+
+                // Prefetch the next block so paging forward is instant
+                if (pageNo + 1 < totalPages) loadBlock(pageNo + 1);
+            })
+            .catch((err) => {
                 console.error(err);
                 frappe.msgprint("Failed to load availability data.");
                 $("#availability-table tbody").html(
                     '<tr><td colspan="100%" class="text-center text-danger">Failed to load data</td></tr>',
                 );
-            },
-        });
+            });
     }
 
     function renderTable() {
@@ -139,14 +217,11 @@ frappe.pages["hotel-availability-d"].on_page_load = function (wrapper) {
             return;
         }
 
-        // Get date columns (skip room_type column)
-        const dateColumns = allColumns.filter((col) => col.fieldname !== "room_type");
+        const dateColumns = allColumns;
 
-        // Calculate pagination for date columns
-        const totalPages = Math.ceil(dateColumns.length / daysPerPage);
-        const startIndex = currentPage * daysPerPage;
-        const endIndex = Math.min(startIndex + daysPerPage, dateColumns.length);
-        const visibleColumns = dateColumns.slice(startIndex, endIndex);
+        // The server already returned only this page of date columns
+        const startIndex = 0;
+        const visibleColumns = dateColumns;
 
         // Build header row with labels for the three subrows
         const headerCells = [
@@ -203,88 +278,62 @@ frappe.pages["hotel-availability-d"].on_page_load = function (wrapper) {
         }
 
         // Build data rows with subrows for each room type
-        Object.entries(allData).forEach(([roomType, daysData]) => {
+        Object.entries(allData).forEach(([roomType, series]) => {
             // Row 1: Available - light green background
             const availableCells = [
                 `<td rowspan="3" style="position: sticky; left: 0; background: white; font-weight: bold; padding: 12px; vertical-align: middle; border-right: 2px solid #dee2e6; z-index: 10;">${frappe.utils.escape_html(roomType)}</td>`,
                 `<td style="position: sticky; left: 200px; background: #d4edda; font-weight: bold; padding: 8px; text-align: center; border-right: 2px solid #dee2e6; color: #155724; z-index: 9;">AVAIL</td>`,
             ];
 
-            visibleColumns.forEach((col) => {
-                const dateMatch = col.fieldname.match(/date_(\d+)/);
-                if (dateMatch) {
-                    const forDate = parseInt(dateMatch[1]);
-                    const dayData = daysData.find((d) => d.for_date === forDate);
-                    const available = dayData ? dayData.total_available_units : 0;
-
-                    // Light green background for the whole row
-                    let weekendStyle = col.is_weekend
-                        ? "background-color: rgba(212, 237, 218, 0.7);"
-                        : "background-color: rgba(212, 237, 218, 0.3);";
-                    let colorClass = "text-success";
-                    if (available === 0) colorClass = "text-danger";
-                    else if (dayData && available <= dayData.total_count * 0.3)
-                        colorClass = "text-warning";
-
-                    availableCells.push(
-                        `<td class="text-center ${colorClass}" style="padding: 8px; font-weight: bold; font-size: 16px; ${weekendStyle}">${available}</td>`,
-                    );
-                } else {
-                    availableCells.push(
-                        `<td class="text-center text-muted" style="background-color: rgba(212, 237, 218, 0.3);">-</td>`,
-                    );
-                }
+            visibleColumns.forEach((col, index) => {
+                const i = startIndex + index;
+                const available = series.total_available_units[i];
+                const total = available + series.occupied_count[i] + series.out_of_order_count[i];
+
+                // Light green background for the whole row
+                let weekendStyle = col.is_weekend
+                    ? "background-color: rgba(212, 237, 218, 0.7);"
+                    : "background-color: rgba(212, 237, 218, 0.3);";
+                let colorClass = "text-success";
+                if (available === 0) colorClass = "text-danger";
+                else if (available <= total * 0.3) colorClass = "text-warning";
+
+                availableCells.push(
+                    `<td class="text-center ${colorClass}" style="padding: 8px; font-weight: bold; font-size: 16px; ${weekendStyle}">${available}</td>`,
+                );
             });
 
             // Row 2: Occupied - light blue background
             const occupiedCells = [
                 `<td style="position: sticky; left: 200px; background: #cce5ff; font-weight: bold; padding: 8px; text-align: center; border-right: 2px solid #dee2e6; color: #004085; z-index: 9;">OCC</td>`,
             ];
-            visibleColumns.forEach((col) => {
-                const dateMatch = col.fieldname.match(/date_(\d+)/);
-                if (dateMatch) {
-                    const forDate = parseInt(dateMatch[1]);
-                    const dayData = daysData.find((d) => d.for_date === forDate);
-                    const occupied = dayData ? dayData.occupied_count : 0;
-
-                    // Light blue background for the whole row
-                    const weekendStyle = col.is_weekend
-                        ? "background-color: rgba(204, 229, 255, 0.7);"
-                        : "background-color: rgba(204, 229, 255, 0.3);";
-                    occupiedCells.push(
-                        `<td class="text-center text-primary" style="padding: 6px; font-weight: 500; ${weekendStyle}">${occupied}</td>`,
-                    );
-                } else {
-                    occupiedCells.push(
-                        `<td class="text-center text-muted" style="background-color: rgba(204, 229, 255, 0.3);">-</td>`,
-                    );
-                }
+            visibleColumns.forEach((col, index) => {
+                const occupied = series.occupied_count[startIndex + index];
+
+                // Light blue background for the whole row
+                const weekendStyle = col.is_weekend
+                    ? "background-color: rgba(204, 229, 255, 0.7);"
+                    : "background-color: rgba(204, 229, 255, 0.3);";
+                occupiedCells.push(
+                    `<td class="text-center text-primary" style="padding: 6px; font-weight: 500; ${weekendStyle}">${occupied}</td>`,
+                );
             });
 
             // Row 3: Out of Order - light red background
             const oooCells = [
                 `<td style="position: sticky; left: 200px; background: #f8d7da; font-weight: bold; padding: 8px; text-align: center; border-right: 2px solid #dee2e6; color: #721c24; z-index: 9;">OOO</td>`,
             ];
-            visibleColumns.forEach((col) => {
-                const dateMatch = col.fieldname.match(/date_(\d+)/);
-                if (dateMatch) {
-                    const forDate = parseInt(dateMatch[1]);
-                    const dayData = daysData.find((d) => d.for_date === forDate);
-                    const ooo = dayData ? dayData.out_of_order_count : 0;
-
-                    // Light red background for the whole row
-                    const weekendStyle = col.is_weekend
-                        ? "background-color: rgba(248, 215, 218, 0.7);"
-                        : "background-color: rgba(248, 215, 218, 0.3);";
-                    const colorClass = ooo > 0 ? "text-danger" : "text-muted";
-                    oooCells.push(
-                        `<td class="text-center ${colorClass}" style="padding: 6px; ${weekendStyle}">${ooo}</td>`,
-                    );
-                } else {
-                    oooCells.push(
-                        `<td class="text-center text-muted" style="background-color: rgba(248, 215, 218, 0.3);">-</td>`,
-                    );
-                }
+            visibleColumns.forEach((col, index) => {
+                const ooo = series.out_of_order_count[startIndex + index];
+
+                // Light red background for the whole row
+                const weekendStyle = col.is_weekend
+                    ? "background-color: rgba(248, 215, 218, 0.7);"
+                    : "background-color: rgba(248, 215, 218, 0.3);";
+                const colorClass = ooo > 0 ? "text-danger" : "text-muted";
+                oooCells.push(
+                    `<td class="text-center ${colorClass}" style="padding: 6px; ${weekendStyle}">${ooo}</td>`,
+                );
             });
 
             // Add all three rows
@@ -297,18 +346,11 @@ frappe.pages["hotel-availability-d"].on_page_load = function (wrapper) {
 
         // Add global navigation functions
         window.prevPage = () => {
-            if (currentPage > 0) {
-                currentPage--;
-                renderTable();
-            }
+            if (currentPage > 0) showPage(currentPage - 1);
         };
 
         window.nextPage = () => {
-            const totalPages = Math.ceil(dateColumns.length / daysPerPage);
-            if (currentPage < totalPages - 1) {
-                currentPage++;
-                renderTable();
-            }
+            if (currentPage < totalPages - 1) showPage(currentPage + 1);
         };
     }
 
@@ -76,21 +76,42 @@ frappe.pages["room_type_rates"].on_page_load = function (wrapper) {
                     fieldtype: "Currency",
                     reqd: true,
                 },
+                {
+                    label: "Weekday Price",
+                    fieldname: "weekday_price",
+                    fieldtype: "Currency",
+                    description: "Optional; overrides Price on weekdays",
+                },
+                {
+                    label: "Weekend Price",
+                    fieldname: "weekend_price",
+                    fieldtype: "Currency",
+                    description: "Optional; overrides Price on weekend nights",
+                },
             ],
             primary_action_label: "Seed",
             primary_action(values) {
                 frappe.call({
-                    method: "abchotels.abc_hotels.api.inventory.seed_room_type_inventory_rate_codes",
+                    method: "abchotels.abc_hotels.api.rates.load_rate_rules",
                     args: {
-                        rate_code: values.rate_code,
-                        room_type: values.room_type,
-                        start_date: values.start_date,
-                        end_date: values.end_date,
-                        price: values.price,
+                        rules: [
+                            {
+                                rate_code: values.rate_code,
+                                room_type: values.room_type,
+                                start_date: values.start_date,
+                                end_date: values.end_date,
+                                price: values.price ?? null,
+                                weekday_price: values.weekday_price ?? null,
+                                weekend_price: values.weekend_price ?? null,
+                            },
+                        ],
                     },
                     callback: function (r) {
                         if (!r.exc) {
-                            frappe.msgprint("Rates seeded successfully!");
+                            const s = r.message || {};
+                            frappe.msgprint(
+                                `Rates seeded: ${s.inserted || 0} added, ${s.updated || 0} changed, ${s.unchanged || 0} unchanged.`
+                            );
                             d.hide();
                             fetchAndRender(); // refresh table
                         }
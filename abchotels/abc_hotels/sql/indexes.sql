@@ -0,0 +1,17 @@
+-- Composite indexes for the availability / rate lookups.
+-- Doctype tables only carry Frappe's default keys, so these are added here
+-- (idempotent; safe to re-run on every migrate).
+
+CREATE INDEX IF NOT EXISTS idx_room_type_for_date
+  ON `tabRoom Type Inventory` (room_type, for_date);
+
+CREATE INDEX IF NOT EXISTS idx_parent_rate_code
+  ON `tabRoom Type Inventory Rate Code` (parent, rate_code);
+
+-- date-only scans (grids, archival) across all room types
+CREATE INDEX IF NOT EXISTS idx_for_date
+  ON `tabRoom Type Inventory` (for_date);
+
+-- submitted stays still on the books (capture_otb_snapshot)
+CREATE INDEX IF NOT EXISTS idx_docstatus_check_out
+  ON `tabHotel Reservation` (docstatus, check_out_date);
@@ -79,6 +79,48 @@ CREATE PROCEDURE get_available_inventory(
   IN p_room_types_csv VARCHAR(4000)
 )
 BEGIN
+  DECLARE v_rest TEXT;
+  DECLARE v_item VARCHAR(140);
+
+  /* Filters go into session temp tables and are joined, so the
+     (room_type, for_date) / (parent, rate_code) indexes can be used
+     instead of evaluating FIND_IN_SET on every row in range. */
+  DROP TEMPORARY TABLE IF EXISTS tmp_filter_rate_code;
+  CREATE TEMPORARY TABLE tmp_filter_rate_code (
+    rate_code VARCHAR(140) COLLATE utf8mb4_unicode_ci PRIMARY KEY
+  ) ENGINE=Memory;
+
+  DROP TEMPORARY TABLE IF EXISTS tmp_filter_room_type;
+  CREATE TEMPORARY TABLE tmp_filter_room_type (
+    room_type VARCHAR(140) COLLATE utf8mb4_unicode_ci PRIMARY KEY
+  ) ENGINE=Memory;
+
+  SET v_rest = IFNULL(p_rate_codes_csv, '');
+  WHILE v_rest <> '' DO
+    SET v_item = TRIM(SUBSTRING_INDEX(v_rest, ',', 1));
+    SET v_rest = IF(LOCATE(',', v_rest) > 0, SUBSTRING(v_rest, LOCATE(',', v_rest) + 1), '');
+    IF v_item <> '' THEN
+      INSERT IGNORE INTO tmp_filter_rate_code (rate_code) VALUES (v_item);
+    END IF;
+  END WHILE;
+
+  SET v_rest = IFNULL(p_room_types_csv, '');
+  WHILE v_rest <> '' DO
+    SET v_item = TRIM(SUBSTRING_INDEX(v_rest, ',', 1));
+    SET v_rest = IF(LOCATE(',', v_rest) > 0, SUBSTRING(v_rest, LOCATE(',', v_rest) + 1), '');
+    IF v_item <> '' THEN
+      INSERT IGNORE INTO tmp_filter_room_type (room_type) VALUES (v_item);
+    END IF;
+  END WHILE;
+
+  -- empty filter = match all
+  IF (SELECT COUNT(*) FROM tmp_filter_rate_code) = 0 THEN
+    INSERT INTO tmp_filter_rate_code (rate_code) SELECT name FROM `tabRate Code`;
+  END IF;
+  IF (SELECT COUNT(*) FROM tmp_filter_room_type) = 0 THEN
+    INSERT INTO tmp_filter_room_type (room_type) SELECT name FROM `tabRoom Type`;
+  END IF;
+
   SELECT
     r.rate_code,
     r.room_type,
@@ -88,12 +130,10 @@ BEGIN
     AVG(r.rate_price)            AS rate_per_night,
     SUM(r.rate_price)            AS total_stay
   FROM room_type_inventory_rates r
+  JOIN tmp_filter_room_type frt ON frt.room_type = r.room_type
+  JOIN tmp_filter_rate_code frc ON frc.rate_code = r.rate_code
     WHERE r.for_date >= p_start
       AND r.for_date < p_end
-    -- Match rate codes if param not empty
-    AND (p_rate_codes_csv IS NULL OR p_rate_codes_csv = '' OR FIND_IN_SET(r.rate_code, p_rate_codes_csv))
-    -- Match room types if param not empty
-    AND (p_room_types_csv IS NULL OR p_room_types_csv = '' OR FIND_IN_SET(r.room_type, p_room_types_csv))
   GROUP BY
     r.room_type,
     r.total_count,
@@ -106,55 +146,136 @@ CREATE PROCEDURE apply_reservation_inventory(
   IN p_target_docstatus INT            -- 1 = Submit (hold), 2 = Cancel (release)
 )
 BEGIN
-  DECLARE v_sign INT;
- DECLARE done INT DEFAULT FALSE;
-  DECLARE v_inv_name VARCHAR(140);
-
-  -- Cursor to lock rows without returning results
-  DECLARE lock_cursor CURSOR FOR
-    SELECT d.inv_name
-    FROM tmp_inv_delta d
-    JOIN `tabRoom Type Inventory` t ON t.name = d.inv_name
-    FOR UPDATE;
-
-  DECLARE CONTINUE HANDLER FOR NOT FOUND SET done = TRUE;
-  -- Decide whether to subtract or add back
-  SET v_sign = IF(p_target_docstatus = 1 , 1 , -1);
-
-  -- Build temp table of rows to update
-  DROP TEMPORARY TABLE IF EXISTS tmp_inv_delta;
-  CREATE TEMPORARY TABLE tmp_inv_delta (
-    inv_name VARCHAR(140) PRIMARY KEY,
-    delta INT NOT NULL
-  ) ENGINE=Memory;
+  DECLARE v_room_type VARCHAR(140);
+  DECLARE v_start INT;
+  DECLARE v_end INT;
+  DECLARE v_rooms INT;
+  DECLARE v_nights INT;
+  DECLARE v_total INT;
+  DECLARE v_touched INT DEFAULT 0;
+  DECLARE v_conflicts TEXT;
 
-  INSERT INTO tmp_inv_delta (inv_name, delta)
   SELECT
-    inv.name                                   AS inv_name,
-    v_sign * r.number_of_rooms                 AS delta
+    r.room_type,
+    CAST(DATE_FORMAT(r.check_in_date, '%Y%m%d') AS UNSIGNED),
+    CAST(DATE_FORMAT(r.check_out_date, '%Y%m%d') AS UNSIGNED),
+    IFNULL(r.number_of_rooms, 0),
+    GREATEST(DATEDIFF(r.check_out_date, r.check_in_date), 0)
+  INTO v_room_type, v_start, v_end, v_rooms, v_nights
   FROM `tabHotel Reservation` r
-  JOIN room_type_inventory inv
-    ON inv.room_type = r.room_type
-   AND inv.for_date >= r.check_in_date and inv.for_date < r.check_out_date
   WHERE r.name = p_reservation_name;
 
-  OPEN lock_cursor;
-  lock_loop: LOOP
-    FETCH lock_cursor INTO v_inv_name;
-    IF done THEN
-      LEAVE lock_loop;
+  IF v_room_type IS NULL THEN
+    SELECT 'NOT_FOUND' AS status, 0 AS rows_touched, 0 AS total_delta, NULL AS conflict_dates;
+  ELSEIF p_target_docstatus = 1 THEN
+    SELECT IFNULL(MAX(total_count), 0) INTO v_total
+    FROM room_type_room_count
+    WHERE room_type = v_room_type;
+
+    /* One conditional range update: each night is locked and re-checked by
+       InnoDB as it is written, so concurrent holds serialize per night and
+       can never push occupied_count past the room count. Pending ledger
+       releases count too; the subquery is a locking read inside an UPDATE,
+       so it sees what the compactor has committed and never double counts. */
+    SAVEPOINT apply_reservation_hold;
+
+    UPDATE `tabRoom Type Inventory` inv
+    SET inv.occupied_count = inv.occupied_count + v_rooms
+    WHERE inv.room_type = v_room_type
+      AND inv.for_date >= v_start
+      AND inv.for_date < v_end
+      AND v_total - (IFNULL(inv.out_of_order_count, 0) + GREATEST(inv.occupied_count + IFNULL((
+            SELECT SUM(l.delta) FROM inventory_delta_ledger l
+            WHERE l.applied = 0 AND l.room_type = inv.room_type AND l.for_date = inv.for_date
+          ), 0), 0)) >= v_rooms;
+
+    SET v_touched = ROW_COUNT();
+
+    IF v_touched = v_nights THEN
+      -- audit trail only: the guarded update above already moved occupied_count
+      INSERT INTO inventory_delta_ledger (reservation, room_type, for_date, delta, reason, applied)
+      SELECT p_reservation_name, v_room_type, d.for_date, v_rooms, 'submit', 1
+      FROM dim_date d
+      WHERE d.for_date >= v_start AND d.for_date < v_end;
+
+      SELECT 'APPLIED' AS status, v_touched AS rows_touched, v_touched * v_rooms AS total_delta,
+             NULL AS conflict_dates;
+    ELSE
+      -- some night is full (or has no inventory row): undo the partial hold
+      ROLLBACK TO SAVEPOINT apply_reservation_hold;
+
+      SELECT GROUP_CONCAT(d.for_date ORDER BY d.for_date) INTO v_conflicts
+      FROM dim_date d
+      LEFT JOIN room_type_inventory inv
+        ON inv.room_type = v_room_type AND inv.for_date = d.for_date
+      WHERE d.for_date >= v_start
+        AND d.for_date < v_end
+        AND (inv.name IS NULL OR inv.total_available_units < v_rooms);
+
+      SELECT 'CONFLICT' AS status, 0 AS rows_touched, 0 AS total_delta, v_conflicts AS conflict_dates;
     END IF;
-  END LOOP;
-  CLOSE lock_cursor;
+  ELSE
+    /* Releases never touch the hot inventory rows: they are appended to the
+       ledger as pending deltas, read through room_type_inventory (and by the
+       hold guard above) and folded in by compact_inventory_ledger(). */
+    INSERT INTO inventory_delta_ledger (reservation, room_type, for_date, delta, reason, applied)
+    SELECT p_reservation_name, v_room_type, d.for_date, -v_rooms, 'cancel', 0
+    FROM dim_date d
+    WHERE d.for_date >= v_start AND d.for_date < v_end;
+
+    SET v_touched = ROW_COUNT();
+    SELECT 'RELEASED' AS status, v_touched AS rows_touched, -(v_touched * v_rooms) AS total_delta,
+           NULL AS conflict_dates;
+  END IF;
+END $$
+DROP PROCEDURE IF EXISTS compact_inventory_ledger $$
+CREATE PROCEDURE compact_inventory_ledger(
+  IN p_batch INT  -- max pending ledger rows folded per call
+)
+BEGIN
+  DROP TEMPORARY TABLE IF EXISTS tmp_ledger_batch;
+  CREATE TEMPORARY TABLE tmp_ledger_batch (id BIGINT UNSIGNED PRIMARY KEY) ENGINE=MEMORY;
+
+  -- the exact set of rows folded below (locking read: waits for in-flight inserts)
+  INSERT INTO tmp_ledger_batch (id)
+  SELECT l.id
+  FROM inventory_delta_ledger l
+  WHERE l.applied = 0
+  ORDER BY l.id
+  LIMIT p_batch;
+
+  /* lock the touched nights before writing any ledger row, the order a hold
+     takes them in (inventory row, then ledger), so the two cannot cycle */
+  SELECT COUNT(*) INTO @compact_locked
+  FROM `tabRoom Type Inventory` inv
+  WHERE (inv.room_type, inv.for_date) IN (
+    SELECT l.room_type, l.for_date
+    FROM inventory_delta_ledger l
+    JOIN tmp_ledger_batch b ON b.id = l.id
+  )
+  FOR UPDATE;
+
+  /* one row update per touched night, whatever the number of releases */
+  UPDATE `tabRoom Type Inventory` inv
+  JOIN (
+    SELECT l.room_type, l.for_date, SUM(l.delta) AS delta
+    FROM inventory_delta_ledger l
+    JOIN tmp_ledger_batch b ON b.id = l.id
+    GROUP BY l.room_type, l.for_date
+  ) p ON p.room_type = inv.room_type AND p.for_date = inv.for_date
+  SET inv.occupied_count = GREATEST(inv.occupied_count + p.delta, 0);
 
-  UPDATE `tabRoom Type Inventory` t
-  JOIN tmp_inv_delta d ON t.name = d.inv_name
-  SET t.occupied_count = t.occupied_count + d.delta;
+  SELECT ROW_COUNT() INTO @compacted_cells;
 
-  /* Optional: return a quick summary */
-  SELECT COUNT(*) AS rows_touched, SUM(delta) AS total_delta
-  FROM tmp_inv_delta;
+  UPDATE inventory_delta_ledger l
+  JOIN tmp_ledger_batch b ON b.id = l.id
+  SET l.applied = 1;
+
+  SELECT ROW_COUNT() AS compacted_rows, @compacted_cells AS touched_cells;
+
+  DROP TEMPORARY TABLE IF EXISTS tmp_ledger_batch;
 END $$
+
 DROP PROCEDURE IF EXISTS seed_room_type_inventory_rate_codes $$
 CREATE PROCEDURE seed_room_type_inventory_rate_codes(
   IN p_rate_code VARCHAR(255),
@@ -209,6 +330,336 @@ BEGIN
   SELECT ROW_COUNT() AS affected_rows;
 END$$
 
+DROP PROCEDURE IF EXISTS seed_inventory_tail $$
+CREATE PROCEDURE seed_inventory_tail(
+  IN p_room_type   VARCHAR(140),
+  IN p_start       INT,           -- inclusive, YYYYMMDD
+  IN p_end         INT,           -- inclusive, YYYYMMDD
+  IN p_name_prefix VARCHAR(32)    -- e.g. 'INVE-'
+)
+BEGIN
+  /* Seed one room type's nights and roll its latest rate-code prices forward.
+     Archived nights are never seeded again: history owns them. */
+  DECLARE v_template BIGINT UNSIGNED;
+  DECLARE v_created INT DEFAULT 0;
+  DECLARE v_rates INT DEFAULT 0;
+
+  INSERT IGNORE INTO `tabRoom Type Inventory`
+    (name, room_type, for_date, occupied_count, out_of_order_count)
+  SELECT
+    LEFT(CONCAT(p_name_prefix, p_room_type, '-', d.for_date), 140),
+    p_room_type,
+    d.for_date,
+    0,
+    0
+  FROM dim_date d
+  WHERE d.for_date BETWEEN p_start AND p_end
+    AND NOT EXISTS (
+      SELECT 1 FROM room_type_inventory_history h
+      WHERE h.room_type = p_room_type AND h.for_date = d.for_date
+    );
+
+  SET v_created = ROW_COUNT();
+
+  -- latest earlier night that carries rate codes; its prices are copied
+  SELECT inv.inv_key INTO v_template
+  FROM `tabRoom Type Inventory` inv
+  WHERE inv.room_type = p_room_type
+    AND inv.for_date < p_start
+    AND EXISTS (
+      SELECT 1 FROM `tabRoom Type Inventory Rate Code` irc WHERE irc.inv_key = inv.inv_key
+    )
+  ORDER BY inv.for_date DESC
+  LIMIT 1;
+
+  IF v_template IS NOT NULL THEN
+    INSERT IGNORE INTO `tabRoom Type Inventory Rate Code`
+      (name, parent, parenttype, parentfield, rate_code, rate_price)
+    SELECT
+      CONCAT(inv.name, '-', t.rate_code),
+      inv.name,
+      'Room Type Inventory',
+      'rate_codes',
+      t.rate_code,
+      t.rate_price
+    FROM `tabRoom Type Inventory` inv
+    JOIN `tabRoom Type Inventory Rate Code` t ON t.inv_key = v_template
+    WHERE inv.room_type = p_room_type
+      AND inv.for_date BETWEEN p_start AND p_end;
+
+    SET v_rates = ROW_COUNT();
+  END IF;
+
+  SELECT v_created AS created_rows, v_rates AS created_rate_rows;
+END $$
+
+DROP PROCEDURE IF EXISTS ensure_history_partitions $$
+CREATE PROCEDURE ensure_history_partitions(
+  IN p_table        VARCHAR(64),  -- room_type_inventory_history / room_type_rate_history
+  IN p_through_year INT           -- split pmax until this year has its own partition
+)
+BEGIN
+  DECLARE v_year INT;
+
+  SELECT IFNULL(MAX(CAST(SUBSTRING(PARTITION_NAME, 2) AS UNSIGNED)), YEAR(CURDATE()) - 1) INTO v_year
+  FROM information_schema.PARTITIONS
+  WHERE TABLE_SCHEMA = DATABASE()
+    AND TABLE_NAME = p_table
+    AND PARTITION_NAME REGEXP '^p[0-9]{4}$';
+
+  WHILE v_year < p_through_year DO
+    SET v_year = v_year + 1;
+    SET @ddl = CONCAT(
+      'ALTER TABLE `', p_table, '` REORGANIZE PARTITION pmax INTO (',
+      'PARTITION p', v_year, ' VALUES LESS THAN (', (v_year + 1) * 10000 + 101, '), ',
+      'PARTITION pmax VALUES LESS THAN MAXVALUE)'
+    );
+    PREPARE stmt FROM @ddl;
+    EXECUTE stmt;
+    DEALLOCATE PREPARE stmt;
+  END WHILE;
+END $$
+
+DROP PROCEDURE IF EXISTS archive_inventory_range $$
+CREATE PROCEDURE archive_inventory_range(
+  IN p_start INT,  -- inclusive, YYYYMMDD
+  IN p_end   INT   -- exclusive, YYYYMMDD
+)
+BEGIN
+  /* Copy nights [p_start, p_end) to the history tables, then delete them from
+     the live tables. A night already in history keeps its archived figures:
+     a live row that reappears for it (e.g. re-imported) is dropped, never
+     allowed to overwrite what was recorded. */
+  DECLARE v_nights INT DEFAULT 0;
+  DECLARE v_rates INT DEFAULT 0;
+
+  -- rates first, while "already archived" still means archived by an earlier run
+  INSERT INTO room_type_rate_history (room_type, for_date, rate_code, rate_price)
+  SELECT inv.room_type, inv.for_date, irc.rate_code, IFNULL(irc.rate_price, 0)
+  FROM `tabRoom Type Inventory` inv
+  JOIN `tabRoom Type Inventory Rate Code` irc ON irc.inv_key = inv.inv_key
+  WHERE inv.for_date >= p_start AND inv.for_date < p_end
+    AND NOT EXISTS (
+      SELECT 1 FROM room_type_inventory_history h
+      WHERE h.room_type = inv.room_type AND h.for_date = inv.for_date
+    )
+  ON DUPLICATE KEY UPDATE rate_price = room_type_rate_history.rate_price;
+
+  INSERT INTO room_type_inventory_history
+    (room_type, for_date, total_count, occupied_count, out_of_order_count)
+  SELECT
+    inv.room_type,
+    inv.for_date,
+    IFNULL(c.total_count, 0),
+    GREATEST(inv.occupied_count + IFNULL((
+      SELECT SUM(l.delta) FROM inventory_delta_ledger l
+      WHERE l.applied = 0 AND l.room_type = inv.room_type AND l.for_date = inv.for_date
+    ), 0), 0),
+    IFNULL(inv.out_of_order_count, 0)
+  FROM `tabRoom Type Inventory` inv
+  LEFT JOIN room_type_room_count c ON c.room_type = inv.room_type
+  WHERE inv.for_date >= p_start AND inv.for_date < p_end
+  ON DUPLICATE KEY UPDATE
+    total_count = room_type_inventory_history.total_count;
+
+  DELETE irc
+  FROM `tabRoom Type Inventory Rate Code` irc
+  JOIN `tabRoom Type Inventory` inv ON inv.inv_key = irc.inv_key
+  WHERE inv.for_date >= p_start AND inv.for_date < p_end;
+
+  SET v_rates = ROW_COUNT();
+
+  DELETE FROM `tabRoom Type Inventory`
+  WHERE for_date >= p_start AND for_date < p_end;
+
+  SET v_nights = ROW_COUNT();
+
+  -- pending releases of archived nights are already folded into the history row
+  UPDATE inventory_delta_ledger
+  SET applied = 1
+  WHERE applied = 0 AND for_date >= p_start AND for_date < p_end;
+
+  SELECT v_nights AS archived_nights, v_rates AS archived_rates;
+END $$
+
+DROP PROCEDURE IF EXISTS refresh_daily_kpi $$
+CREATE PROCEDURE refresh_daily_kpi(
+  IN p_start INT,        -- inclusive, YYYYMMDD
+  IN p_end   INT,        -- exclusive, YYYYMMDD
+  IN p_final TINYINT     -- 1 = night audit: (re)write and freeze the rows
+)
+BEGIN
+  /* Recompute daily_kpi for nights [p_start, p_end) in one set-based pass.
+     Frozen rows are only rewritten when p_final = 1. ADR is the average rate
+     on the books for the night (as the dashboard always reported it); RevPAR
+     is ADR x in-house over rooms not out of order. */
+  DECLARE v_start DATE DEFAULT STR_TO_DATE(p_start, '%Y%m%d');
+  DECLARE v_end   DATE DEFAULT STR_TO_DATE(p_end, '%Y%m%d');
+
+  INSERT INTO daily_kpi
+    (for_date, total_rooms, out_of_order, available, in_house,
+     occupancy_pct, adr, revpar, arrivals, departures, is_final)
+  SELECT
+    d.for_date,
+    IFNULL(i.total_rooms, 0),
+    IFNULL(i.out_of_order, 0),
+    IFNULL(i.available, 0),
+    IFNULL(i.in_house, 0),
+    IF(IFNULL(i.available, 0) > 0, ROUND(i.in_house / i.available * 100, 2), 0),
+    IFNULL(r.adr, 0),
+    IF(IFNULL(i.total_rooms, 0) - IFNULL(i.out_of_order, 0) > 0,
+       IFNULL(r.adr, 0) * i.in_house / (i.total_rooms - i.out_of_order), 0),
+    IFNULL(a.arrivals, 0),
+    IFNULL(dp.departures, 0),
+    IFNULL(p_final, 0)
+  FROM dim_date d
+  LEFT JOIN (
+    SELECT for_date,
+           SUM(total_count) total_rooms,
+           SUM(out_of_order_count) out_of_order,
+           SUM(total_available_units) available,
+           SUM(occupied_count) in_house
+    FROM room_type_inventory
+    WHERE for_date >= p_start AND for_date < p_end
+    GROUP BY for_date
+  ) i ON i.for_date = d.for_date
+  LEFT JOIN (
+    SELECT for_date, AVG(rate_price) adr
+    FROM room_type_inventory_rates
+    WHERE for_date >= p_start AND for_date < p_end
+    GROUP BY for_date
+  ) r ON r.for_date = d.for_date
+  LEFT JOIN (
+    SELECT check_in_date, COUNT(*) arrivals
+    FROM `tabHotel Reservation`
+    WHERE docstatus = 1 AND check_in_completed = 0
+      AND check_in_date >= v_start AND check_in_date < v_end
+    GROUP BY check_in_date
+  ) a ON a.check_in_date = d.date_actual
+  LEFT JOIN (
+    SELECT check_out_date, COUNT(*) departures
+    FROM `tabHotel Reservation`
+    WHERE docstatus = 1 AND check_out_completed = 0
+      AND check_out_date >= v_start AND check_out_date < v_end
+    GROUP BY check_out_date
+  ) dp ON dp.check_out_date = d.date_actual
+  LEFT JOIN daily_kpi k ON k.for_date = d.for_date
+  WHERE d.for_date >= p_start AND d.for_date < p_end
+    AND (p_final = 1 OR IFNULL(k.is_final, 0) = 0)
+  ON DUPLICATE KEY UPDATE
+    total_rooms = VALUES(total_rooms),
+    out_of_order = VALUES(out_of_order),
+    available = VALUES(available),
+    in_house = VALUES(in_house),
+    occupancy_pct = VALUES(occupancy_pct),
+    adr = VALUES(adr),
+    revpar = VALUES(revpar),
+    arrivals = VALUES(arrivals),
+    departures = VALUES(departures),
+    is_final = VALUES(is_final);
+
+  SELECT ROW_COUNT() AS affected_rows;
+END $$
+
+DROP PROCEDURE IF EXISTS capture_otb_snapshot $$
+CREATE PROCEDURE capture_otb_snapshot(
+  IN p_snapshot INT,     -- as-of business day, YYYYMMDD (first stay date captured)
+  IN p_end      INT      -- exclusive, YYYYMMDD
+)
+BEGIN
+  /* Rooms / revenue on the books per (room_type, stay_date) for stay dates
+     [p_snapshot, p_end), from submitted reservations in one grouped pass.
+     Only differences to otb_current go to otb_snapshot_delta (stay dates
+     that fell off the books get their negative), then otb_current catches
+     up. Capturing the same day again folds into that day's deltas; stay
+     dates before p_snapshot keep the figures they were last captured with. */
+  DECLARE v_start DATE DEFAULT STR_TO_DATE(p_snapshot, '%Y%m%d');
+  DECLARE v_end   DATE DEFAULT STR_TO_DATE(p_end, '%Y%m%d');
+
+  DROP TEMPORARY TABLE IF EXISTS tmp_otb;
+  CREATE TEMPORARY TABLE tmp_otb (
+    room_type VARCHAR(140) NOT NULL,
+    stay_date INT NOT NULL,
+    rooms     INT NOT NULL,
+    revenue   DECIMAL(21,9) NOT NULL,
+    PRIMARY KEY (room_type, stay_date)
+  ) DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+  INSERT INTO tmp_otb (room_type, stay_date, rooms, revenue)
+  SELECT r.room_type, d.for_date,
+         SUM(IFNULL(r.number_of_rooms, 0)),
+         SUM(IFNULL(r.number_of_rooms, 0) * IFNULL(r.base_rate_per_night, 0))
+  FROM `tabHotel Reservation` r
+  JOIN dim_date d
+    ON d.date_actual >= GREATEST(r.check_in_date, v_start)
+   AND d.date_actual < LEAST(r.check_out_date, v_end)
+  WHERE r.docstatus = 1
+    AND r.check_out_date > v_start
+    AND r.check_in_date < v_end
+  GROUP BY r.room_type, d.for_date;
+
+  INSERT INTO otb_snapshot_delta (stay_date, room_type, snapshot_date, rooms_delta, revenue_delta)
+  SELECT t.stay_date, t.room_type, p_snapshot,
+         t.rooms - IFNULL(c.rooms, 0), t.revenue - IFNULL(c.revenue, 0)
+  FROM tmp_otb t
+  LEFT JOIN otb_current c ON c.room_type = t.room_type AND c.stay_date = t.stay_date
+  WHERE c.room_type IS NULL OR c.rooms <> t.rooms OR c.revenue <> t.revenue
+  ON DUPLICATE KEY UPDATE
+    rooms_delta = rooms_delta + VALUES(rooms_delta),
+    revenue_delta = revenue_delta + VALUES(revenue_delta);
+
+  INSERT INTO otb_snapshot_delta (stay_date, room_type, snapshot_date, rooms_delta, revenue_delta)
+  SELECT c.stay_date, c.room_type, p_snapshot, -c.rooms, -c.revenue
+  FROM otb_current c
+  LEFT JOIN tmp_otb t ON t.room_type = c.room_type AND t.stay_date = c.stay_date
+  WHERE c.stay_date >= p_snapshot AND c.stay_date < p_end
+    AND t.room_type IS NULL
+  ON DUPLICATE KEY UPDATE
+    rooms_delta = rooms_delta + VALUES(rooms_delta),
+    revenue_delta = revenue_delta + VALUES(revenue_delta);
+
+  -- a re-capture that changed a stay date back leaves nothing to keep
+  DELETE FROM otb_snapshot_delta
+  WHERE snapshot_date = p_snapshot AND rooms_delta = 0 AND revenue_delta = 0;
+
+  DELETE c FROM otb_current c
+  LEFT JOIN tmp_otb t ON t.room_type = c.room_type AND t.stay_date = c.stay_date
+  WHERE c.stay_date >= p_snapshot AND c.stay_date < p_end
+    AND t.room_type IS NULL;
+
+  INSERT INTO otb_current (room_type, stay_date, rooms, revenue, snapshot_date)
+  SELECT room_type, stay_date, rooms, revenue, p_snapshot
+  FROM tmp_otb
+  ON DUPLICATE KEY UPDATE
+    rooms = VALUES(rooms),
+    revenue = VALUES(revenue),
+    snapshot_date = VALUES(snapshot_date);
+
+  DROP TEMPORARY TABLE IF EXISTS tmp_otb;
+
+  SELECT COUNT(*) AS delta_rows
+  FROM otb_snapshot_delta
+  WHERE snapshot_date = p_snapshot;
+END $$
+
+DROP PROCEDURE IF EXISTS refresh_room_type_room_count $$
+CREATE PROCEDURE refresh_room_type_room_count()
+BEGIN
+  /* Rebuild the materialized counts from scratch (triggers keep them current) */
+  INSERT INTO room_type_room_count (room_type, total_count)
+  SELECT rt.name, COUNT(r.name)
+  FROM `tabRoom Type` rt
+  LEFT JOIN `tabRoom Type Room` r ON r.room_type = rt.name
+  GROUP BY rt.name
+  ON DUPLICATE KEY UPDATE total_count = VALUES(total_count);
+
+  DELETE c FROM room_type_room_count c
+  LEFT JOIN `tabRoom Type` rt ON rt.name = c.room_type
+  WHERE rt.name IS NULL;
+
+  SELECT ROW_COUNT() AS removed_rows;
+END$$
+
 DROP PROCEDURE IF EXISTS switch_night_candidates $$
 CREATE PROCEDURE switch_night_candidates(p_audit_date DATE)
 BEGIN
@@ -40,3 +40,140 @@ CREATE TABLE IF NOT EXISTS dim_date (
   CONSTRAINT fk_dim_date_next FOREIGN KEY (next_day_id) REFERENCES dim_date(date_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- Materialized room count per room type; kept in sync by the triggers in
+-- triggers.sql so room_type_inventory no longer recounts `tabRoom Type Room`.
+CREATE TABLE IF NOT EXISTS room_type_room_count (
+  room_type   VARCHAR(140) NOT NULL,
+  total_count INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (room_type)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Append-only log of every occupied_count change (audit trail + write buffer).
+-- applied = 0 rows are pending releases that room_type_inventory adds on read
+-- until compact_inventory_ledger() folds them into occupied_count.
+CREATE TABLE IF NOT EXISTS inventory_delta_ledger (
+  id          BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+  reservation VARCHAR(140) NULL,
+  room_type   VARCHAR(140) NOT NULL,
+  for_date    INT NOT NULL,
+  delta       INT NOT NULL,
+  reason      VARCHAR(32) NOT NULL,
+  applied     TINYINT(1) NOT NULL DEFAULT 0,
+  created_at  DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+  PRIMARY KEY (id),
+  KEY idx_pending (applied, room_type, for_date),
+  KEY idx_reservation (reservation),
+  KEY idx_room_type_for_date (room_type, for_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Per room type high-water mark of `tabHotel Reservation`.modified already
+-- reconciled by controllers/occupancy_reconciliation.py.
+CREATE TABLE IF NOT EXISTS inventory_reconcile_checkpoint (
+  room_type     VARCHAR(140) NOT NULL,
+  last_modified DATETIME(6) NOT NULL,
+  updated_at    DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+  PRIMARY KEY (room_type)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Cold storage for past stay nights, moved out of `tabRoom Type Inventory` /
+-- `tabRoom Type Inventory Rate Code` by archive_inventory_range(). The live
+-- Frappe tables keep their `name` primary key and so cannot be partitioned by
+-- for_date; these can, and ensure_history_partitions() adds a year at a time.
+CREATE TABLE IF NOT EXISTS room_type_inventory_history (
+  room_type          VARCHAR(140) NOT NULL,
+  for_date           INT NOT NULL,
+  total_count        INT NOT NULL DEFAULT 0,
+  occupied_count     INT NOT NULL DEFAULT 0,
+  out_of_order_count INT NOT NULL DEFAULT 0,
+  archived_at        DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (room_type, for_date),
+  KEY idx_for_date (for_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+PARTITION BY RANGE (for_date) (
+  PARTITION p2024 VALUES LESS THAN (20250101),
+  PARTITION p2025 VALUES LESS THAN (20260101),
+  PARTITION p2026 VALUES LESS THAN (20270101),
+  PARTITION pmax  VALUES LESS THAN MAXVALUE
+);
+
+CREATE TABLE IF NOT EXISTS room_type_rate_history (
+  room_type  VARCHAR(140) NOT NULL,
+  for_date   INT NOT NULL,
+  rate_code  VARCHAR(140) NOT NULL,
+  rate_price DECIMAL(21,9) NOT NULL DEFAULT 0,
+  PRIMARY KEY (room_type, for_date, rate_code),
+  KEY idx_rate_code_for_date (rate_code, for_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+PARTITION BY RANGE (for_date) (
+  PARTITION p2024 VALUES LESS THAN (20250101),
+  PARTITION p2025 VALUES LESS THAN (20260101),
+  PARTITION p2026 VALUES LESS THAN (20270101),
+  PARTITION pmax  VALUES LESS THAN MAXVALUE
+);
+
+-- Compact surrogate keys: a small int per room type, and on every inventory /
+-- rate-code row inv_key = room_type id * 100000000 + for_date (BIGINT). The
+-- Frappe `name` stays the primary key; joins use inv_key instead of the
+-- 'INVE-<room type>-<date>' varchar. Triggers in triggers.sql fill new rows,
+-- backfill_inventory_keys() rewrites existing ones in batches.
+CREATE TABLE IF NOT EXISTS room_type_key (
+  id        INT UNSIGNED NOT NULL AUTO_INCREMENT,
+  room_type VARCHAR(140) NOT NULL,
+  PRIMARY KEY (id),
+  UNIQUE KEY uq_room_type (room_type)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+ALTER TABLE `tabRoom Type Inventory` ADD COLUMN IF NOT EXISTS inv_key BIGINT UNSIGNED NULL;
+ALTER TABLE `tabRoom Type Inventory Rate Code` ADD COLUMN IF NOT EXISTS inv_key BIGINT UNSIGNED NULL;
+
+-- Indexed here, next to the columns: indexes.sql may run before this file.
+-- (Not declared in the doctype JSON: Frappe's Int is a 32-bit int(11), and a
+-- schema sync would narrow the column below the keys it has to hold.)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_inv_key
+  ON `tabRoom Type Inventory` (inv_key);
+
+CREATE INDEX IF NOT EXISTS idx_inv_key_rate_code
+  ON `tabRoom Type Inventory Rate Code` (inv_key, rate_code);
+
+-- One row of front-desk KPIs per night, maintained by refresh_daily_kpi():
+-- patched for the business date and future nights as reservations / inventory
+-- change (see utils/daily_kpi.py), frozen (is_final = 1) by the night audit.
+CREATE TABLE IF NOT EXISTS daily_kpi (
+  for_date      INT NOT NULL,
+  total_rooms   INT NOT NULL DEFAULT 0,
+  out_of_order  INT NOT NULL DEFAULT 0,
+  available     INT NOT NULL DEFAULT 0,
+  in_house      INT NOT NULL DEFAULT 0,
+  occupancy_pct DECIMAL(7,2) NOT NULL DEFAULT 0,
+  adr           DECIMAL(21,9) NOT NULL DEFAULT 0,
+  revpar        DECIMAL(21,9) NOT NULL DEFAULT 0,
+  arrivals      INT NOT NULL DEFAULT 0,
+  departures    INT NOT NULL DEFAULT 0,
+  is_final      TINYINT(1) NOT NULL DEFAULT 0,
+  updated_at    TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (for_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- On-the-books pace, captured once per business day by capture_otb_snapshot()
+-- (see utils/otb_pace.py). otb_current is the last captured rooms / revenue per
+-- (room_type, stay_date); otb_snapshot_delta keeps only what changed at each
+-- capture, so the books as of day D are SUM(deltas WHERE snapshot_date <= D).
+CREATE TABLE IF NOT EXISTS otb_current (
+  room_type     VARCHAR(140) NOT NULL,
+  stay_date     INT NOT NULL,
+  rooms         INT NOT NULL DEFAULT 0,
+  revenue       DECIMAL(21,9) NOT NULL DEFAULT 0,
+  snapshot_date INT NOT NULL,
+  PRIMARY KEY (room_type, stay_date),
+  KEY idx_stay_date (stay_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS otb_snapshot_delta (
+  stay_date     INT NOT NULL,
+  room_type     VARCHAR(140) NOT NULL,
+  snapshot_date INT NOT NULL,
+  rooms_delta   INT NOT NULL DEFAULT 0,
+  revenue_delta DECIMAL(21,9) NOT NULL DEFAULT 0,
+  PRIMARY KEY (stay_date, room_type, snapshot_date),
+  KEY idx_snapshot_date (snapshot_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
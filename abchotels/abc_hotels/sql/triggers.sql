@@ -0,0 +1,106 @@
+DELIMITER $$
+
+/* Keep room_type_room_count in step with `tabRoom Type Room` */
+DROP TRIGGER IF EXISTS room_type_room_count_ai $$
+CREATE TRIGGER room_type_room_count_ai
+AFTER INSERT ON `tabRoom Type Room`
+FOR EACH ROW
+BEGIN
+  IF NEW.room_type IS NOT NULL THEN
+    INSERT INTO room_type_room_count (room_type, total_count)
+    VALUES (NEW.room_type, 1)
+    ON DUPLICATE KEY UPDATE total_count = total_count + 1;
+  END IF;
+END$$
+
+DROP TRIGGER IF EXISTS room_type_room_count_ad $$
+CREATE TRIGGER room_type_room_count_ad
+AFTER DELETE ON `tabRoom Type Room`
+FOR EACH ROW
+BEGIN
+  IF OLD.room_type IS NOT NULL THEN
+    UPDATE room_type_room_count
+    SET total_count = GREATEST(total_count - 1, 0)
+    WHERE room_type = OLD.room_type;
+  END IF;
+END$$
+
+-- re-typing a room (or renaming its room type) moves it between counters
+DROP TRIGGER IF EXISTS room_type_room_count_au $$
+CREATE TRIGGER room_type_room_count_au
+AFTER UPDATE ON `tabRoom Type Room`
+FOR EACH ROW
+BEGIN
+  IF NOT (NEW.room_type <=> OLD.room_type) THEN
+    IF OLD.room_type IS NOT NULL THEN
+      UPDATE room_type_room_count
+      SET total_count = GREATEST(total_count - 1, 0)
+      WHERE room_type = OLD.room_type;
+    END IF;
+    IF NEW.room_type IS NOT NULL THEN
+      INSERT INTO room_type_room_count (room_type, total_count)
+      VALUES (NEW.room_type, 1)
+      ON DUPLICATE KEY UPDATE total_count = total_count + 1;
+    END IF;
+  END IF;
+END$$
+
+/* Compact inventory keys (see room_type_key in tables.sql) */
+DROP TRIGGER IF EXISTS room_type_key_ai $$
+CREATE TRIGGER room_type_key_ai
+AFTER INSERT ON `tabRoom Type`
+FOR EACH ROW
+BEGIN
+  INSERT IGNORE INTO room_type_key (room_type) VALUES (NEW.name);
+END$$
+
+DROP TRIGGER IF EXISTS room_type_inventory_key_bi $$
+CREATE TRIGGER room_type_inventory_key_bi
+BEFORE INSERT ON `tabRoom Type Inventory`
+FOR EACH ROW
+BEGIN
+  DECLARE v_id INT UNSIGNED;
+  SELECT id INTO v_id FROM room_type_key WHERE room_type = NEW.room_type;
+  IF v_id IS NULL AND NEW.room_type IS NOT NULL THEN
+    INSERT IGNORE INTO room_type_key (room_type) VALUES (NEW.room_type);
+    SELECT id INTO v_id FROM room_type_key WHERE room_type = NEW.room_type;
+  END IF;
+  SET NEW.inv_key = v_id * 100000000 + NEW.for_date;
+END$$
+
+-- re-typed / re-dated / renamed room type: new key, carried to the rate rows
+DROP TRIGGER IF EXISTS room_type_inventory_key_bu $$
+CREATE TRIGGER room_type_inventory_key_bu
+BEFORE UPDATE ON `tabRoom Type Inventory`
+FOR EACH ROW
+BEGIN
+  DECLARE v_id INT UNSIGNED;
+  IF NOT (NEW.room_type <=> OLD.room_type AND NEW.for_date <=> OLD.for_date) THEN
+    SELECT id INTO v_id FROM room_type_key WHERE room_type = NEW.room_type;
+    IF v_id IS NULL AND NEW.room_type IS NOT NULL THEN
+      INSERT IGNORE INTO room_type_key (room_type) VALUES (NEW.room_type);
+      SELECT id INTO v_id FROM room_type_key WHERE room_type = NEW.room_type;
+    END IF;
+    SET NEW.inv_key = v_id * 100000000 + NEW.for_date;
+  END IF;
+END$$
+
+DROP TRIGGER IF EXISTS room_type_inventory_key_au $$
+CREATE TRIGGER room_type_inventory_key_au
+AFTER UPDATE ON `tabRoom Type Inventory`
+FOR EACH ROW
+BEGIN
+  IF NOT (NEW.inv_key <=> OLD.inv_key) THEN
+    UPDATE `tabRoom Type Inventory Rate Code` SET inv_key = NEW.inv_key WHERE parent = NEW.name;
+  END IF;
+END$$
+
+DROP TRIGGER IF EXISTS room_type_inventory_rate_code_key_bi $$
+CREATE TRIGGER room_type_inventory_rate_code_key_bi
+BEFORE INSERT ON `tabRoom Type Inventory Rate Code`
+FOR EACH ROW
+BEGIN
+  SET NEW.inv_key = (SELECT inv_key FROM `tabRoom Type Inventory` WHERE name = NEW.parent);
+END$$
+
+DELIMITER ;
@@ -4,22 +4,25 @@ DROP view IF EXISTS room_type_inventory;
 CREATE view room_type_inventory as
 select
 inv.name ,
+inv.inv_key ,
 inv.for_date ,
 inv.room_type ,
-inv.occupied_count ,
+GREATEST(inv.occupied_count + IFNULL(p.pending_delta, 0), 0) occupied_count ,
 rt.pay_master,
 inv.out_of_order_count ,
-COUNT(r.name) total_count,
-(COUNT(r.name) - (inv.out_of_order_count + inv.occupied_count)) total_available_units
+c.total_count,
+(c.total_count - (inv.out_of_order_count + GREATEST(inv.occupied_count + IFNULL(p.pending_delta, 0), 0))) total_available_units
 from `tabRoom Type Inventory` inv
  join `tabRoom Type` rt on rt.name = inv.room_type
- join `tabRoom Type Room` r on rt.name = r.room_type
- group by
-inv.name ,
-inv.for_date ,
-inv.room_type ,
-inv.occupied_count ,
-inv.out_of_order_count ;
+ -- materialized count (see room_type_room_count); no GROUP BY keeps the view mergeable
+ join room_type_room_count c on c.room_type = inv.room_type and c.total_count > 0
+ -- ledger deltas not yet compacted into occupied_count (kept small by the compactor)
+ left join (
+   select l.room_type, l.for_date, SUM(l.delta) pending_delta
+   from inventory_delta_ledger l
+   where l.applied = 0
+   group by l.room_type, l.for_date
+ ) p on p.room_type = inv.room_type and p.for_date = inv.for_date;
 
 
 
@@ -42,7 +45,7 @@ irc.rate_price,
 total_count,
 total_available_units
 from room_type_inventory inv
- join `tabRoom Type Inventory Rate Code` irc on inv.name = irc.parent
+ join `tabRoom Type Inventory Rate Code` irc on irc.inv_key = inv.inv_key
  join rate_code rc on irc.rate_code = rc.name;
 drop view if exists rate_code;
 
@@ -57,3 +60,36 @@ select rc.name,
 from `tabRate Code` rc
 join `tabCancelation Policy` cp on rc.cacnelation_policy =cp.name ;
 
+
+-- Live + archived nights for reporting; a for_date filter prunes the history
+-- partitions and only the recent live rows are read from the Frappe tables.
+drop view if exists room_type_inventory_all;
+create view room_type_inventory_all as
+select
+h.room_type,
+h.for_date,
+h.total_count,
+h.occupied_count,
+h.out_of_order_count,
+(h.total_count - (h.out_of_order_count + h.occupied_count)) total_available_units,
+1 is_archived
+from room_type_inventory_history h
+union all
+select
+inv.room_type,
+inv.for_date,
+inv.total_count,
+inv.occupied_count,
+inv.out_of_order_count,
+inv.total_available_units,
+0 is_archived
+from room_type_inventory inv;
+
+drop view if exists room_type_rates_all;
+create view room_type_rates_all as
+select h.room_type, h.for_date, h.rate_code, h.rate_price, 1 is_archived
+from room_type_rate_history h
+union all
+select inv.room_type, inv.for_date, irc.rate_code, irc.rate_price, 0 is_archived
+from `tabRoom Type Inventory` inv
+join `tabRoom Type Inventory Rate Code` irc on irc.inv_key = inv.inv_key;
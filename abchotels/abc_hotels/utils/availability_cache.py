@@ -0,0 +1,140 @@
+# abchotels/abc_hotels/utils/availability_cache.py
+from __future__ import annotations
+
+import datetime as _dt
+import hashlib
+import math
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+import frappe
+
+RESULT_TTL = 600  # seconds; versions make entries stale long before this on busy dates
+ENTRY_PREFIX = "abchotels:avail_cache:entry:"
+VERSION_PREFIX = "abchotels:avail_cache:ver:"
+STATS_PREFIX = "abchotels:avail_cache:stats:"
+ALL_ROOM_TYPES = "*"
+EPOCH = "epoch"  # bumped when a change is not tied to a date range
+
+
+def _months(start: int, end: int) -> list[int]:
+	"""YYYYMM buckets touched by nights [start, end) given as YYYYMMDD ints."""
+	if end <= start:
+		return []
+	first = start // 100
+	last_night = _dt.date(end // 10000, end // 100 % 100, end % 100) - _dt.timedelta(days=1)
+	last = last_night.year * 100 + last_night.month
+	out = []
+	ym = first
+	while ym <= last:
+		out.append(ym)
+		ym = ym + 1 if ym % 100 < 12 else (ym // 100 + 1) * 100 + 1
+	return out
+
+
+def _redis_key(key: str) -> str:
+	return frappe.cache.make_key(key)
+
+
+def _incr(stat: str, amount: int = 1) -> None:
+	# hit/miss counters only; cache correctness never depends on them
+	try:
+		frappe.cache.incrby(_redis_key(STATS_PREFIX + stat), amount)
+	except Exception:
+		frappe.logger("abchotels").warning(f"availability cache stat {stat!r} not counted", exc_info=True)
+
+
+def flush_entries() -> None:
+	"""
+	Drop every cached result. Fallback when a version bump fails: entries are
+	keyed by a hash of their query, so a room type's entries cannot be told apart.
+	"""
+	frappe.cache.delete_keys(ENTRY_PREFIX)
+
+
+def version_keys(room_types: Sequence[str], start: int, end: int) -> list[str]:
+	"""
+	Counters an entry depends on: one per (room_type, month), or the catch-all
+	(*, month) bucket when the query is not filtered by room type.
+	"""
+	scopes = list(room_types) or [ALL_ROOM_TYPES]
+	keys = [VERSION_PREFIX + EPOCH]
+	for ym in _months(start, end):
+		keys.extend(f"{VERSION_PREFIX}{rt}:{ym}" for rt in scopes)
+	return keys
+
+
+def current_versions(room_types: Sequence[str], start: int, end: int) -> dict[str, int]:
+	keys = version_keys(room_types, start, end)
+	values = frappe.cache.mget([_redis_key(k) for k in keys])
+	return {k: int(v or 0) for k, v in zip(keys, values, strict=True)}
+
+
+def entry_key(*params: Any) -> str:
+	raw = "|".join("" if p is None else str(p) for p in params)
+	return ENTRY_PREFIX + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def lookup(key: str, versions: dict[str, int]) -> Any | None:
+	"""Cached result when every version it was computed under is still current."""
+	entry = frappe.cache.get_value(key)
+	if entry and entry.get("versions") == versions:
+		_incr("hits")
+		return entry["result"]
+	_incr("misses")
+	if entry:
+		_incr("stale")
+	return None
+
+
+def store(key: str, versions: dict[str, int], result: Any, ttl: float | None = None) -> None:
+	"""
+	Cache `result` for RESULT_TTL, or `ttl` seconds when shorter: results net of
+	tentative holds must not outlive the first of them to expire, which bumps no version.
+	"""
+	expires = RESULT_TTL if ttl is None else max(1, min(RESULT_TTL, math.ceil(ttl)))
+	frappe.cache.set_value(key, {"versions": versions, "result": result}, expires_in_sec=expires)
+
+
+def bump_versions(room_types: Iterable[str] | None, start: int | None = None, end: int | None = None) -> None:
+	"""
+	Make cache entries overlapping the change stale.
+	No room types or no date range -> bump the epoch (everything goes stale).
+	"""
+	if room_types is None or start is None or end is None:
+		keys = [VERSION_PREFIX + EPOCH]
+	else:
+		keys = []
+		for ym in _months(start, end):
+			keys.append(f"{VERSION_PREFIX}{ALL_ROOM_TYPES}:{ym}")
+			keys.extend(f"{VERSION_PREFIX}{rt}:{ym}" for rt in set(room_types) if rt)
+	if not keys:
+		return
+	try:
+		pipe = frappe.cache.pipeline()
+		for k in keys:
+			pipe.incr(_redis_key(k))
+		pipe.execute()
+	except Exception:
+		# entries computed before the change would still match their versions
+		frappe.log_error(title="Availability cache version bump failed")
+		try:
+			flush_entries()
+		except Exception:
+			frappe.log_error(title="Availability cache flush failed")
+		return
+	_incr("invalidations")
+
+
+@frappe.whitelist()
+def get_availability_cache_stats(reset: int = 0) -> dict[str, int]:
+	"""Hit / miss / stale / invalidation counters for sizing the cache."""
+	frappe.only_for("System Manager")
+	names = ["hits", "misses", "stale", "invalidations"]
+	keys = [_redis_key(STATS_PREFIX + n) for n in names]
+	stats = {n: int(v or 0) for n, v in zip(names, frappe.cache.mget(keys), strict=True)}
+	lookups = stats["hits"] + stats["misses"]
+	stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0
+	if int(reset):
+		frappe.cache.delete(*keys)
+	return stats
@@ -0,0 +1,141 @@
+# abchotels/abc_hotels/utils/availability_grid.py
+"""
+Grid engine behind the availability / rates grid endpoints.
+
+One ordered scan of room_type_inventory (and, when asked, one of the rate
+rows) is pivoted into dense per-room-type arrays aligned with the calendar
+columns; the endpoints in api/inventory.py only format a Grid.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+import frappe
+from frappe.utils import cint, flt
+
+INVENTORY_FIELDS = ("total_available_units", "occupied_count", "out_of_order_count")
+
+INVENTORY_SCAN_SQL = """
+    SELECT inv.room_type, inv.for_date,
+           inv.total_available_units, inv.occupied_count, inv.out_of_order_count
+    FROM room_type_inventory inv
+    WHERE inv.for_date BETWEEN %(start)s AND %(end)s {conditions}
+    ORDER BY inv.room_type, inv.for_date
+"""
+
+RATES_SCAN_SQL = """
+    SELECT inv.room_type, irc.rate_code, inv.for_date, irc.rate_price
+    FROM `tabRoom Type Inventory` inv
+    JOIN `tabRoom Type Inventory Rate Code` irc ON irc.inv_key = inv.inv_key
+    WHERE inv.for_date BETWEEN %(start)s AND %(end)s {conditions}
+    ORDER BY inv.room_type, irc.rate_code, inv.for_date
+"""
+
+
+class Grid:
+	"""
+	Dense arrays aligned with `columns` (calendar days, see date_calendar):
+	  inventory[room_type][field] -> [int] (0 where the night has no row)
+	  present[room_type]          -> bytearray, 1 where the night has a row
+	  rates[room_type][rate_code] -> [float | None] (None where there is no price row)
+	Room types and rate codes keep the scan order (by name).
+	"""
+
+	def __init__(self, columns: Sequence[dict[str, Any]]):
+		self.columns = list(columns)
+		self.position = {d["for_date"]: i for i, d in enumerate(self.columns)}
+		self.inventory: dict[str, dict[str, list[int]]] = {}
+		self.present: dict[str, bytearray] = {}
+		self.rates: dict[str, dict[str, list[float | None]]] = {}
+
+	@property
+	def width(self) -> int:
+		return len(self.columns)
+
+	def nights(self, room_type: str) -> list[tuple[int, dict[str, Any]]]:
+		"""(column index, calendar day) of the nights `room_type` has inventory rows for."""
+		present = self.present.get(room_type) or b""
+		return [(i, day) for i, day in enumerate(self.columns) if present[i]]
+
+	def cell(self, room_type: str, i: int) -> dict[str, int]:
+		series = self.inventory[room_type]
+		return {field: series[field][i] for field in INVENTORY_FIELDS}
+
+
+def _conditions(room_types: Sequence[str] | None, rate_code: str | None, rate_sql: str):
+	conditions, params = "", {}
+	if room_types is not None:
+		conditions += " AND inv.room_type IN %(room_types)s"
+		params["room_types"] = tuple(room_types)
+	if rate_code:
+		conditions += rate_sql
+		params["rate_code"] = rate_code
+	return conditions, params
+
+
+def _scan_inventory(grid: Grid, bounds: dict[str, int], room_types, rate_code) -> None:
+	conditions, params = _conditions(
+		room_types,
+		rate_code,
+		"""
+        AND EXISTS (
+            SELECT 1 FROM `tabRoom Type Inventory Rate Code` irc
+            WHERE irc.inv_key = inv.inv_key AND irc.rate_code = %(rate_code)s
+        )""",
+	)
+	rows = frappe.db.sql(INVENTORY_SCAN_SQL.format(conditions=conditions), {**bounds, **params})
+	width, position = grid.width, grid.position
+	room_type = series = present = None
+	for rt, for_date, *values in rows:
+		i = position.get(for_date)
+		if i is None:
+			continue  # night outside the calendar has no column
+		if rt != room_type:
+			room_type = rt
+			series = [[0] * width for _ in INVENTORY_FIELDS]
+			present = bytearray(width)
+			grid.inventory[rt] = dict(zip(INVENTORY_FIELDS, series, strict=True))
+			grid.present[rt] = present
+		for arr, value in zip(series, values, strict=True):
+			arr[i] = cint(value)
+		present[i] = 1
+
+
+def _scan_rates(grid: Grid, bounds: dict[str, int], room_types, rate_code) -> None:
+	conditions, params = _conditions(room_types, rate_code, " AND irc.rate_code = %(rate_code)s")
+	rows = frappe.db.sql(RATES_SCAN_SQL.format(conditions=conditions), {**bounds, **params})
+	width, position = grid.width, grid.position
+	key = prices = None
+	for rt, rc, for_date, price in rows:
+		i = position.get(for_date)
+		if i is None:
+			continue
+		if (rt, rc) != key:
+			key = (rt, rc)
+			prices = grid.rates.setdefault(rt, {})[rc] = [None] * width
+		prices[i] = flt(price)
+
+
+def load_grid(
+	columns: Sequence[dict[str, Any]],
+	room_types: Sequence[str] | None = None,
+	rate_code: str | None = None,
+	inventory: bool = True,
+	rates: bool = False,
+) -> Grid:
+	"""
+	Fill a Grid over `columns` (ordered calendar days). `room_types=None` means
+	all room types; `rate_code` keeps inventory nights sold under that code and
+	only that code's prices.
+	"""
+	grid = Grid(columns)
+	if not grid.columns or (room_types is not None and not room_types):
+		return grid
+	bounds = {"start": grid.columns[0]["for_date"], "end": grid.columns[-1]["for_date"]}
+	if inventory:
+		_scan_inventory(grid, bounds, room_types, rate_code)
+	if rates:
+		_scan_rates(grid, bounds, room_types, rate_code)
+	return grid
@@ -0,0 +1,62 @@
+# abchotels/abc_hotels/utils/availability_push.py
+"""
+Realtime availability deltas for open grids and reservation forms.
+
+inventory_changed() calls push_inventory_delta() for every change it fans
+out. Small changes are published as compact cells
+
+    {"start": 20260101, "end": 20260105, "fields": [...],
+     "cells": [["DBL", 20260101, 4, 6, 0], ...]}
+
+(end exclusive); changes too wide to ship cell by cell, or not tied to a
+room type / date range, go out as {"reload": 1, ...scope} so subscribers
+refetch only if the scope overlaps what they show. Clients filter by
+their own window; the event is published once the transaction commits.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+
+import frappe
+
+from abchotels.abc_hotels.utils.availability_grid import INVENTORY_FIELDS
+
+EVENT = "abc_availability_delta"
+MAX_PUSH_CELLS = 2000  # larger changes are announced as a reload of their scope
+
+
+def _delta_payload(room_types: set | None, start: int | None, end: int | None) -> dict[str, Any]:
+	scope = {
+		"room_types": sorted(room_types) if room_types is not None else None,
+		"start": start,
+		"end": end,
+	}
+	if not room_types or not start or not end or end <= start:
+		return {"reload": 1, **scope}
+
+	rows = frappe.db.sql(
+		f"""
+        SELECT room_type, for_date, {", ".join(INVENTORY_FIELDS)}
+        FROM room_type_inventory
+        WHERE room_type IN %s AND for_date >= %s AND for_date < %s
+        ORDER BY room_type, for_date
+        LIMIT %s
+        """,
+		(tuple(room_types), start, end, MAX_PUSH_CELLS + 1),
+	)
+	if len(rows) > MAX_PUSH_CELLS:
+		return {"reload": 1, **scope}
+	return {**scope, "fields": list(INVENTORY_FIELDS), "cells": [list(r) for r in rows]}
+
+
+def push_inventory_delta(room_types: Iterable[str] | None, start: int | None, end: int | None) -> None:
+	"""Publish the current values of the changed cells (or a reload of their scope)."""
+	if frappe.flags.in_install or frappe.flags.in_migrate or frappe.flags.in_import:
+		return
+	try:
+		payload = _delta_payload(None if room_types is None else set(room_types), start, end)
+		frappe.publish_realtime(EVENT, payload, after_commit=True)
+	except Exception:
+		frappe.log_error(title="Availability delta push failed")
@@ -0,0 +1,233 @@
+# abchotels/abc_hotels/utils/daily_kpi.py
+"""
+daily_kpi snapshot (see sql/tables.sql): one precomputed row per night.
+
+- run_night_audit() finalizes the audited night (finalize_daily_kpi).
+- inventory_changed() schedules a refresh of the nights it touches, clipped to
+  the business date onwards (schedule_kpi_refresh), so past, frozen nights are
+  never rewritten by later edits.
+- Dashboards read rows (get_daily_kpi / kpi_rows) instead of aggregating
+  views; kpi_series computes a range live in one grouped query, taking
+  audited (final) nights from the snapshot.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import frappe
+from frappe.utils import add_days, cint, getdate, today
+
+from abchotels.abc_hotels.utils.inventory_events import from_for_date, next_for_date, to_for_date
+
+KPI_FIELDS = (
+	"total_rooms",
+	"out_of_order",
+	"available",
+	"in_house",
+	"occupancy_pct",
+	"adr",
+	"revpar",
+	"arrivals",
+	"departures",
+)
+REFRESH_QUEUE = "short"
+
+# rollup -> dim_date bucket; ISO week ("2026-W11") so weeks never split at new year
+ROLLUPS = {
+	"day": "n.for_date",
+	"week": "LEFT(n.week_of_year_iso, 8)",
+	"month": "n.year_actual * 100 + n.month_actual",
+}
+
+# One grouped pass over inventory, rates and reservations, aligned to dim_date.
+# Per night the figures match refresh_daily_kpi(); nights the audit froze keep
+# their snapshot row. Counts add up across a bucket; ratios are re-weighted
+# rather than averaged: occupancy over available units, ADR over room nights
+# sold, RevPAR over sellable rooms. A one-night bucket gives back the night.
+SERIES_SQL = """
+    SELECT
+      {bucket} AS period,
+      MIN(n.for_date) AS start_for_date,
+      MAX(n.for_date) AS end_for_date,
+      SUM(n.total_rooms) AS total_rooms,
+      SUM(n.out_of_order) AS out_of_order,
+      SUM(n.available) AS available,
+      SUM(n.in_house) AS in_house,
+      IF(SUM(n.available) > 0, ROUND(SUM(n.in_house) / SUM(n.available) * 100, 2), 0) AS occupancy_pct,
+      IF(SUM(n.in_house) > 0, SUM(n.adr * n.in_house) / SUM(n.in_house), AVG(n.adr)) AS adr,
+      IF(SUM(n.total_rooms - n.out_of_order) > 0,
+         SUM(n.revpar * (n.total_rooms - n.out_of_order)) / SUM(n.total_rooms - n.out_of_order), 0) AS revpar,
+      SUM(n.arrivals) AS arrivals,
+      SUM(n.departures) AS departures,
+      MIN(n.is_final) AS is_final
+    FROM (
+      SELECT
+        d.for_date, d.week_of_year_iso, d.year_actual, d.month_actual,
+        IF(k.is_final, k.total_rooms, IFNULL(i.total_rooms, 0)) AS total_rooms,
+        IF(k.is_final, k.out_of_order, IFNULL(i.out_of_order, 0)) AS out_of_order,
+        IF(k.is_final, k.available, IFNULL(i.available, 0)) AS available,
+        IF(k.is_final, k.in_house, IFNULL(i.in_house, 0)) AS in_house,
+        IF(k.is_final, k.adr, IFNULL(r.adr, 0)) AS adr,
+        IF(k.is_final, k.revpar,
+           IF(IFNULL(i.total_rooms, 0) - IFNULL(i.out_of_order, 0) > 0,
+              IFNULL(r.adr, 0) * i.in_house / (i.total_rooms - i.out_of_order), 0)) AS revpar,
+        IF(k.is_final, k.arrivals, IFNULL(a.arrivals, 0)) AS arrivals,
+        IF(k.is_final, k.departures, IFNULL(dp.departures, 0)) AS departures,
+        IFNULL(k.is_final, 0) AS is_final
+      FROM dim_date d
+      LEFT JOIN (
+        SELECT for_date,
+               SUM(total_count) total_rooms,
+               SUM(out_of_order_count) out_of_order,
+               SUM(total_available_units) available,
+               SUM(occupied_count) in_house
+        FROM room_type_inventory
+        WHERE for_date BETWEEN %(start)s AND %(end)s
+        GROUP BY for_date
+      ) i ON i.for_date = d.for_date
+      LEFT JOIN (
+        SELECT for_date, AVG(rate_price) adr
+        FROM room_type_inventory_rates
+        WHERE for_date BETWEEN %(start)s AND %(end)s
+        GROUP BY for_date
+      ) r ON r.for_date = d.for_date
+      LEFT JOIN (
+        SELECT check_in_date, COUNT(*) arrivals
+        FROM `tabHotel Reservation`
+        WHERE docstatus = 1 AND check_in_completed = 0
+          AND check_in_date BETWEEN %(start_date)s AND %(end_date)s
+        GROUP BY check_in_date
+      ) a ON a.check_in_date = d.date_actual
+      LEFT JOIN (
+        SELECT check_out_date, COUNT(*) departures
+        FROM `tabHotel Reservation`
+        WHERE docstatus = 1 AND check_out_completed = 0
+          AND check_out_date BETWEEN %(start_date)s AND %(end_date)s
+        GROUP BY check_out_date
+      ) dp ON dp.check_out_date = d.date_actual
+      LEFT JOIN daily_kpi k ON k.for_date = d.for_date
+      WHERE d.for_date BETWEEN %(start)s AND %(end)s
+    ) n
+    GROUP BY period
+    ORDER BY start_for_date
+"""
+
+
+def business_for_date() -> int:
+	return to_for_date(frappe.db.get_single_value("ABC Hotels Settings", "business_date") or today())
+
+
+def horizon_end() -> int:
+	"""First night past the inventory horizon (exclusive end, YYYYMMDD)."""
+	end = frappe.db.get_single_value("ABC Hotels Settings", "horizon_end_date")
+	return next_for_date(to_for_date(end)) if end else to_for_date(add_days(getdate(today()), 366))
+
+
+def refresh_daily_kpi(start, end=None, final: bool = False) -> int:
+	"""Recompute nights [start, end) (default: the single night `start`); no commit."""
+	start = to_for_date(start)
+	end = to_for_date(end) if end else next_for_date(start)
+	if end <= start:
+		return 0
+	row = frappe.db.sql("CALL refresh_daily_kpi(%s, %s, %s)", (start, end, 1 if final else 0), as_dict=True)
+	return cint(row[0].affected_rows) if row else 0
+
+
+def finalize_daily_kpi(for_date) -> int:
+	"""Night audit: write the night's final figures and freeze them."""
+	return refresh_daily_kpi(for_date, final=True)
+
+
+def run_kpi_refresh(start: int, end: int) -> None:
+	"""Background job for schedule_kpi_refresh."""
+	refresh_daily_kpi(start, end)
+	frappe.db.commit()
+
+
+def schedule_kpi_refresh(start=None, end=None) -> None:
+	"""
+	Queue a refresh of nights [start, end) from the business date onwards, once the
+	current transaction commits. No range means every night up to the horizon end.
+	"""
+	if frappe.flags.in_install or frappe.flags.in_migrate:
+		return
+	first = max(to_for_date(start) or 0, business_for_date())
+	last = to_for_date(end) or horizon_end()
+	if last <= first:
+		return
+	frappe.enqueue(
+		"abchotels.abc_hotels.utils.daily_kpi.run_kpi_refresh",
+		queue=REFRESH_QUEUE,
+		job_id=f"daily_kpi::{first}:{last}",
+		deduplicate=True,
+		enqueue_after_commit=True,
+		start=first,
+		end=last,
+	)
+
+
+def kpi_rows(start, end) -> list[dict[str, Any]]:
+	"""Snapshot rows for nights [start, end], in order."""
+	return frappe.db.sql(
+		f"""
+        SELECT for_date, {", ".join(KPI_FIELDS)}, is_final
+        FROM daily_kpi
+        WHERE for_date BETWEEN %s AND %s
+        ORDER BY for_date
+        """,
+		(to_for_date(start), to_for_date(end)),
+		as_dict=True,
+	)
+
+
+def kpi_series(start, end, rollup: str | None = None) -> dict[str, Any]:
+	"""
+	KPIs for nights [start, end] as parallel arrays, one entry per night (or per
+	ISO week / calendar month with `rollup`), from one grouped query (SERIES_SQL).
+	Read only: nothing is written to daily_kpi.
+	"""
+	rollup = (rollup or "day").lower()
+	if rollup not in ROLLUPS:
+		frappe.throw(f"Unsupported rollup {rollup!r}; use one of {', '.join(ROLLUPS)}")
+	start, end = to_for_date(start), to_for_date(end)
+	if end < start:
+		frappe.throw("end_date must not be before start_date")
+
+	params = {
+		"start": start,
+		"end": end,
+		"start_date": from_for_date(start),
+		"end_date": from_for_date(end),
+	}
+	rows = frappe.db.sql(SERIES_SQL.format(bucket=ROLLUPS[rollup]), params, as_dict=True)
+	columns = ("period", "start_for_date", "end_for_date", *KPI_FIELDS, "is_final")
+	return {
+		"start_date": start,
+		"end_date": end,
+		"rollup": rollup,
+		**{c: [r[c] for r in rows] for c in columns},
+	}
+
+
+def get_daily_kpi(for_date) -> dict[str, Any] | None:
+	"""The night's snapshot row, computed on the spot the first time it is asked for."""
+	for_date = to_for_date(for_date)
+	rows = kpi_rows(for_date, for_date)
+	if not rows:
+		refresh_daily_kpi(for_date)
+		rows = kpi_rows(for_date, for_date)
+	return rows[0] if rows else None
+
+
+def backfill_daily_kpi(start=None, end=None, days_per_call: int = 31) -> int:
+	"""Fill missing / stale non-final rows over [start, end) month by month (bench execute)."""
+	start = to_for_date(start) or business_for_date()
+	end = to_for_date(end) or horizon_end()
+	total = 0
+	while start < end:
+		stop = min(to_for_date(add_days(from_for_date(start), cint(days_per_call) or 31)), end)
+		total += refresh_daily_kpi(start, stop)
+		frappe.db.commit()
+		start = stop
+	return total
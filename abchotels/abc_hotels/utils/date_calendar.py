@@ -0,0 +1,116 @@
+# abchotels/abc_hotels/utils/date_calendar.py
+"""
+Worker-level copy of dim_date with grid labels preformatted, so endpoints
+build their date columns without querying the calendar table.
+
+Each worker loads the calendar once per site and keeps it until the shared
+version key in Redis moves; seed_dim_date() (and invalidate_calendar())
+bump that key, so every worker reloads on its next call.
+"""
+
+from __future__ import annotations
+
+import bisect
+import datetime as _dt
+from typing import Any
+
+import frappe
+from frappe.utils import add_days, cint, getdate, today
+
+from abchotels.abc_hotels.utils.inventory_events import from_for_date, to_for_date
+
+VERSION_KEY = "abchotels:calendar:version"
+
+# site -> {"version", "order": [for_date, ...], "days": {for_date: day}, "dates": {for_date: date}}
+_CALENDARS: dict[str, dict[str, Any]] = {}
+
+CALENDAR_SQL = """
+    SELECT for_date, date_actual, TRIM(day_name) AS day_name, day_of_month,
+           day_of_week, week_of_month, weekend_indr, month_name_abbreviated
+    FROM dim_date
+    ORDER BY for_date
+"""
+
+
+def calendar_version() -> int:
+	# a raw counter (incrby), not a pickled value: get_value() cannot read it
+	return int(frappe.cache.get(frappe.cache.make_key(VERSION_KEY)) or 0)
+
+
+def invalidate_calendar() -> None:
+	"""Make every worker reload dim_date on its next lookup."""
+	_CALENDARS.pop(frappe.local.site, None)
+	frappe.cache.incrby(frappe.cache.make_key(VERSION_KEY), 1)
+
+
+def _day(row) -> dict[str, Any]:
+	short, dom = row.day_name[:3], f"{cint(row.day_of_month):02d}"
+	return {
+		"for_date": cint(row.for_date),
+		"label_text": f"{short} {dom}",
+		"label_html": f"{short}<br/>{dom}",
+		"day_name": row.day_name,
+		"day_of_month": cint(row.day_of_month),
+		"day_of_week": cint(row.day_of_week),
+		"week_of_month": cint(row.week_of_month),
+		"weekend_indr": cint(row.weekend_indr),
+		"month_name_abbreviated": row.month_name_abbreviated,
+	}
+
+
+def _load(version: int) -> dict[str, Any]:
+	days, dates = {}, {}
+	for row in frappe.db.sql(CALENDAR_SQL, as_dict=True):
+		day = _day(row)
+		days[day["for_date"]] = day
+		dates[day["for_date"]] = row.date_actual
+	return {"version": version, "order": list(days), "days": days, "dates": dates}
+
+
+def _calendar() -> dict[str, Any]:
+	version = calendar_version()
+	cal = _CALENDARS.get(frappe.local.site)
+	if cal is None or cal["version"] != version:
+		cal = _CALENDARS[frappe.local.site] = _load(version)
+	return cal
+
+
+def days_between(start, end) -> list[dict[str, Any]]:
+	"""Calendar days with for_date in [start, end] (inclusive), in order. Do not mutate them."""
+	cal = _calendar()
+	start, end = to_for_date(start), to_for_date(end)
+	lo = bisect.bisect_left(cal["order"], start)
+	hi = bisect.bisect_right(cal["order"], end)
+	return [cal["days"][fd] for fd in cal["order"][lo:hi]]
+
+
+def get_day(for_date) -> dict[str, Any] | None:
+	return _calendar()["days"].get(to_for_date(for_date))
+
+
+def date_of(for_date) -> _dt.date:
+	"""YYYYMMDD -> date, from the calendar when it has the night."""
+	for_date = to_for_date(for_date)
+	return _calendar()["dates"].get(for_date) or from_for_date(for_date)
+
+
+def seed_dim_date(start, end, weekend_mode: str = "FRI_SAT", tz: str = "+03:00") -> None:
+	"""Seed dim_date over [start, end] and refresh every worker's calendar."""
+	frappe.db.sql("CALL seed_dim_date(%s, %s, %s, %s)", (start, end, weekend_mode, tz))
+	frappe.db.commit()
+	invalidate_calendar()
+
+
+def ensure_dim_date(through, weekend_mode: str = "FRI_SAT", tz: str = "+03:00") -> bool:
+	"""
+	Make sure dim_date reaches `through`, seeding from its last day up to the
+	end of that year (so a rolling horizon reseeds once a year, not daily).
+	Returns True when it had to seed.
+	"""
+	through = getdate(through)
+	last = frappe.db.sql("SELECT MAX(date_actual) FROM dim_date")[0][0]
+	if last and getdate(last) >= through:
+		return False
+	start = add_days(getdate(last), 1) if last else min(getdate(today()), through)
+	seed_dim_date(start, _dt.date(through.year, 12, 31), weekend_mode, tz)
+	return True
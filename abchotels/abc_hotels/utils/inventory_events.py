@@ -0,0 +1,104 @@
+# abchotels/abc_hotels/utils/inventory_events.py
+from __future__ import annotations
+
+import datetime as _dt
+from collections.abc import Iterable
+
+import frappe
+from frappe.utils import add_days, cint, getdate
+
+from abchotels.abc_hotels.utils import availability_cache
+from abchotels.abc_hotels.utils.availability_push import push_inventory_delta
+from abchotels.abc_hotels.utils.stay_index import invalidate_stay_index
+
+
+def to_for_date(value) -> int | None:
+	"""Date / 'YYYY-MM-DD' / YYYYMMDD -> YYYYMMDD int."""
+	if value in (None, ""):
+		return None
+	text = str(value)
+	if text.isdigit() and len(text) == 8:
+		return int(text)
+	return int(getdate(value).strftime("%Y%m%d"))
+
+
+def from_for_date(for_date: int) -> _dt.date:
+	"""20250831 -> date(2025, 8, 31)."""
+	for_date = int(for_date)
+	return _dt.date(for_date // 10000, for_date // 100 % 100, for_date % 100)
+
+
+def next_for_date(for_date: int) -> int:
+	"""20250831 -> 20250901 (exclusive end for a single night)."""
+	return to_for_date(add_days(from_for_date(for_date), 1))
+
+
+def inventory_changed(room_types: Iterable[str] | None = None, start=None, end=None) -> None:
+	"""
+	Single fan-out point (caches, stay indexes, realtime grid deltas, daily KPIs) after
+	inventory or rates change for `room_types` over nights [start, end).
+	`room_types=None` means every room type / all dates.
+	"""
+	room_types = None if room_types is None else {rt for rt in room_types if rt}
+	invalidate_stay_index(room_types)
+	availability_cache.bump_versions(room_types, to_for_date(start), to_for_date(end))
+	push_inventory_delta(room_types, to_for_date(start), to_for_date(end))
+
+	from abchotels.abc_hotels.utils.daily_kpi import schedule_kpi_refresh  # imports this module
+
+	# `end` is the departure night of a stay, whose departures count changes too
+	schedule_kpi_refresh(start, next_for_date(to_for_date(end)) if end else None)
+
+
+def reservation_scope(reservation_name: str) -> tuple[set, str | None, str | None]:
+	"""Room types (booked, assigned, and of assigned rooms) plus stay dates."""
+	res = frappe.db.get_value(
+		"Hotel Reservation",
+		reservation_name,
+		["room_type", "room_type_assigned", "check_in_date", "check_out_date"],
+		as_dict=True,
+	)
+	if not res:
+		return set(), None, None
+	room_types = {res.room_type, res.room_type_assigned}
+	room_types.update(
+		frappe.db.sql_list(
+			"""
+            SELECT DISTINCT r.room_type
+            FROM `tabReservation Room Assignment` a
+            JOIN `tabRoom Type Room` r ON r.name = a.room_type_room
+            WHERE a.parent = %s
+            """,
+			reservation_name,
+		)
+	)
+	room_types.discard(None)
+	return room_types, res.check_in_date, res.check_out_date
+
+
+def reservation_changed(reservation_name: str, after_commit: bool = False) -> None:
+	"""
+	Fan out a reservation's inventory change. With `after_commit`, the scope is read
+	now but caches are only bumped once the transaction commits, so a concurrent
+	reader cannot cache pre-commit state under the new versions.
+	"""
+	room_types, check_in, check_out = reservation_scope(reservation_name)
+	if not room_types:
+		return
+	if after_commit:
+		frappe.db.after_commit.add(lambda: inventory_changed(room_types, check_in, check_out))
+	else:
+		inventory_changed(room_types, check_in, check_out)
+
+
+def on_inventory_doc_change(doc, method=None) -> None:
+	"""doc_events hook for Room Type Room / Room Type Inventory edits made in the desk."""
+	room_types = {doc.get("room_type")}
+	before = doc.get_doc_before_save() if hasattr(doc, "get_doc_before_save") else None
+	if before:
+		room_types.add(before.get("room_type"))
+	if doc.doctype == "Room Type Inventory" and doc.get("for_date"):
+		inventory_changed(room_types, doc.for_date, next_for_date(cint(doc.for_date)))
+	else:
+		# room counts change every night of the room type
+		inventory_changed(room_types)
@@ -1,63 +1,25 @@
 # abchotels/abc_hotels/utils/inventory_helpers.py
 from __future__ import annotations
-from typing import Any, Mapping, Sequence, Optional, cast
+
 import datetime as _dt
+from collections.abc import Mapping, Sequence
+from typing import Any, Optional, cast
+
 import frappe
 from frappe.utils import getdate
-from typing import Optional, Any
-import frappe
+
+from abchotels.abc_hotels.utils.inventory_events import inventory_changed
+from abchotels.abc_hotels.utils.progress import ProgressReporter
+
 BULK_WINDOW_DAYS = 30
 NAME_PREFIX = "INVE-"
+PROGRESS_TITLE = "Inventory Population"
 # utils/inventory_helpers.py
 
-def _publish_progress(
-    percent: float,
-    title: str,
-    description: str,
-    target_user: Optional[str],
-    *,
-    created_so_far: Optional[int] = None,
-    failed_so_far: Optional[int] = None,
-    pairs: Optional[int] = None,
-    final: bool = False,
-) -> None:
-    """
-    Emit a progress tick (and optionally the final completion event).
-    - Always publishes a 'progress' event (with created_so_far if provided)
-    - If final=True, also publishes 'inventory_job_done' using the same target_user
-    """
-    try:
-        payload: dict[str, Any] = {
-            "percent": percent,
-            "title": title,
-            "description": description,
-        }
-        if created_so_far is not None:
-            payload["created_so_far"] = int(created_so_far)
-        if failed_so_far is not None:
-            payload["failed_so_far"] = int(failed_so_far)
-        if pairs is not None:
-            payload["pairs"] = pairs
-
-        if target_user:
-            frappe.publish_realtime("progress", payload, user=target_user, after_commit=False)
-        else:
-            frappe.publish_realtime("progress", payload, after_commit=False)
-
-        if final:
-            done = {
-                "created": int(created_so_far or 0),
-                "existing": None,
-                "failed": int(failed_so_far or 0),
-                "pairs": pairs,
-            }
-            if target_user:
-                frappe.publish_realtime("inventory_job_done", done, user=target_user)
-            else:
-                frappe.publish_realtime("inventory_job_done", done)
-
-    except Exception:
-        pass
+
+def inventory_progress(target_user: str | None, job_id: str | None = None) -> ProgressReporter:
+    """Reporter for the settings dialog: 'progress' ticks plus the final 'inventory_job_done'."""
+    return ProgressReporter(PROGRESS_TITLE, user=target_user, job_id=job_id, done_event="inventory_job_done")
 
 def _window_slices(start: _dt.date, end: _dt.date, days_per_window: int):
     cur = start
@@ -67,17 +29,36 @@ def _window_slices(start: _dt.date, end: _dt.date, days_per_window: int):
         yield cur, w_end
         cur = w_end + _dt.timedelta(days=1)
 
+def _seed_window(w_start: _dt.date, w_end: _dt.date, days_per_window: int) -> int:
+    """CALL seed_room_type_inventory() for one window and commit; returns its created_rows."""
+    cur = frappe.db._cursor
+    cur.callproc(
+        "seed_room_type_inventory",
+        (str(w_start), str(w_end), int(days_per_window), NAME_PREFIX),
+    )
+    row = cur.fetchone() if cur.description else None
+    created = int(row[0] or 0) if row else 0
+
+    # drain the CALL status result so the connection is reusable
+    while cur.nextset():
+        if cur.description:
+            cur.fetchall()
+
+    frappe.db.commit()
+    return created
+
+
 def bulk_insert_by_date_windows(
     start_date: str,
     end_date: str,
     days_per_window: int = BULK_WINDOW_DAYS,
-    target_user: Optional[str] = None,
+    target_user: str | None = None,
+    reporter: ProgressReporter | None = None,
 ) -> int:
     """
-    CALL seed_room_type_inventory() per date window and publish progress:
-      - pre-window (starting)
-      - post-window (finished)
-    Counts created rows by (post - pre) since the proc returns no result set.
+    CALL seed_room_type_inventory() per date window, reporting progress after
+    each window (coalesced by the reporter; the caller sends the final event).
+    Created rows come from the proc's own `created_rows` result (no COUNT scans).
     """
     start = getdate(start_date)
     end = getdate(end_date)
@@ -90,93 +71,132 @@ def bulk_insert_by_date_windows(
         return 0
 
     created_total = 0
-
-    # initial nudge
-    _publish_progress(
-        1.0,
-        "Inventory Population",
-        f"Starting {start} → {end}",
-        target_user,
-        created_so_far=0,
-        failed_so_far=0,
-        pairs=None,
-    )
+    failed_total = 0
+    reporter = reporter or inventory_progress(target_user)
+    reporter.update(1.0, f"Starting {start} → {end}", created_so_far=0, failed_so_far=0)
 
     for i, (w_start, w_end) in enumerate(windows, start=1):
-        # ---- pre-window progress
-        pct_before = round(min(95.0, ((i - 1) / total_windows) * 100.0), 2)
-        _publish_progress(
-            pct_before,
-            "Inventory Population",
-            f"Starting window {i}/{total_windows}: {w_start} → {w_end}",
-            target_user,
+        try:
+            created_total += _seed_window(w_start, w_end, days_per_window)
+        except Exception as e:
+            frappe.db.rollback()
+            failed_total += 1
+            frappe.logger("abchotels").error(f"Window {w_start}..{w_end} failed: {e}")
+
+        # keep 100% for the caller's finish()
+        reporter.update(
+            min(99.0, i / total_windows * 100.0),
+            f"Finished window {i}/{total_windows}: {w_start} → {w_end}",
             created_so_far=created_total,
+            failed_so_far=failed_total,
         )
 
-        # ---- run the window (measure delta since proc returns nothing)
-        try:
-            s_int = int(w_start.strftime("%Y%m%d"))
-            e_int = int(w_end.strftime("%Y%m%d"))
-
-            # pre-count
-            before_rows = frappe.db.sql(
-                """
-                SELECT COUNT(*) FROM `tabRoom Type Inventory`
-                WHERE for_date BETWEEN %s AND %s
-                """,
-                (s_int, e_int),
-                as_list=True,
-            )
-            before_cnt = int(before_rows[0][0]) if before_rows else 0
+    if created_total:
+        inventory_changed()
+    return created_total
 
-            # call proc for this window
-            cur = frappe.db._cursor
-            cur.callproc(
-                "seed_room_type_inventory",
-                (str(w_start), str(w_end), int(days_per_window), NAME_PREFIX),
-            )
 
-            # drain all result sets defensively
-            try:
-                while True:
-                    if cur.description:
-                        cur.fetchall()
-                    if not cur.nextset():
-                        break
-            except Exception:
-                pass
-
-            # commit so post-count sees inserted rows
-            try:
-                frappe.db.commit()
-            except Exception:
-                pass
-
-            # post-count
-            after_rows = frappe.db.sql(
-                """
-                SELECT COUNT(*) FROM `tabRoom Type Inventory`
-                WHERE for_date BETWEEN %s AND %s
-                """,
-                (s_int, e_int),
-                as_list=True,
-            )
-            after_cnt = int(after_rows[0][0]) if after_rows else 0
+# ---------------------------------------------------------------------------
+# Parallel mode: contiguous groups of windows run as separate background jobs
+# (one DB connection each); totals are merged through Redis counters and the
+# job finishing the last window sends the final event.
+# ---------------------------------------------------------------------------
 
-            created_window = max(0, after_cnt - before_cnt)
-            created_total += created_window
+SEED_RUN_PREFIX = "abchotels:seed_run:"
+SEED_RUN_TTL = 6 * 3600
 
-        except Exception as e:
-            frappe.logger("abchotels").error(f"Window {w_start}..{w_end} failed: {e}")
 
-        # ---- post-window progress (keep 100% for the controller final ping)
-        pct_after = round(min(99.0, (i / total_windows) * 100.0), 2)
-        _publish_progress(
-            pct_after,
-            "Inventory Population",
-            f"Finished window {i}/{total_windows}: {w_start} → {w_end}",
-            target_user,
-            created_so_far=created_total,
+def _run_key(run_id: str, field: str) -> str:
+    return frappe.cache.make_key(f"{SEED_RUN_PREFIX}{run_id}:{field}")
+
+
+def dispatch_parallel_windows(
+    start_date: str,
+    end_date: str,
+    workers: int,
+    days_per_window: int = BULK_WINDOW_DAYS,
+    target_user: str | None = None,
+    queue: str = "long",
+    run_id: str | None = None,
+) -> dict:
+    """Split [start_date..end_date] into `workers` groups of windows and enqueue one job per group."""
+    start = getdate(start_date)
+    end = getdate(end_date)
+    if not start or not end:
+        raise ValueError("Start or end date missing")
+
+    windows = [(str(s), str(e)) for s, e in _window_slices(start, end, days_per_window)]
+    if not windows:
+        return {"run_id": None, "jobs": [], "windows": 0}
+
+    workers = max(1, min(int(workers), len(windows)))
+    size = -(-len(windows) // workers)  # ceil
+    groups = [windows[i : i + size] for i in range(0, len(windows), size)]
+
+    run_id = run_id or frappe.generate_hash(length=10)
+    pipe = frappe.cache.pipeline()
+    for field in ("windows_done", "created", "failed"):
+        pipe.set(_run_key(run_id, field), 0, ex=SEED_RUN_TTL)
+    pipe.execute()
+
+    inventory_progress(target_user, job_id=run_id).update(
+        1.0, f"Starting {start} → {end} on {len(groups)} workers", created_so_far=0, failed_so_far=0
+    )
+
+    jobs = []
+    for group in groups:
+        job = frappe.enqueue(
+            "abchotels.abc_hotels.utils.inventory_helpers.seed_window_group",
+            queue=queue,
+            job_name=f"Populate Inventory {group[0][0]} → {group[-1][1]}",
+            run_id=run_id,
+            windows=group,
+            total_windows=len(windows),
+            days_per_window=int(days_per_window),
+            target_user=target_user,
         )
+        jobs.append(job.get_id())
+    return {"run_id": run_id, "jobs": jobs, "windows": len(windows)}
 
-    return created_total
+
+def seed_window_group(
+    run_id: str,
+    windows: Sequence[Sequence[str]],
+    total_windows: int,
+    days_per_window: int = BULK_WINDOW_DAYS,
+    target_user: str | None = None,
+) -> int:
+    """Background job for one group; reports run-wide totals after every window."""
+    reporter = inventory_progress(target_user, job_id=run_id)  # throttle shared by all groups
+    created_here = 0
+    for w_start, w_end in windows:
+        created = failed = 0
+        try:
+            created = _seed_window(getdate(w_start), getdate(w_end), days_per_window)
+        except Exception as e:
+            frappe.db.rollback()
+            failed = 1
+            frappe.logger("abchotels").error(f"Window {w_start}..{w_end} failed: {e}")
+        created_here += created
+
+        pipe = frappe.cache.pipeline()
+        pipe.incrby(_run_key(run_id, "created"), created)
+        pipe.incrby(_run_key(run_id, "failed"), failed)
+        pipe.incr(_run_key(run_id, "windows_done"))
+        created_total, failed_total, done = pipe.execute()
+
+        if done >= total_windows:
+            # windows can finish in any order; only the last one fans out and reports done
+            inventory_changed()
+            reporter.finish(
+                {"created": created_total, "existing": None, "failed": failed_total, "pairs": None},
+                description=f"Finished {total_windows} windows",
+            )
+        else:
+            reporter.update(
+                min(99.0, done / total_windows * 100.0),
+                f"Finished window {done}/{total_windows}: {w_start} → {w_end}",
+                created_so_far=created_total,
+                failed_so_far=failed_total,
+            )
+    return created_here
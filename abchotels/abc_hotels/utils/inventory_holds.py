@@ -0,0 +1,177 @@
+# abchotels/abc_hotels/utils/inventory_holds.py
+"""
+Tentative holds live only in Redis and expire on their own; they never touch
+`tabRoom Type Inventory`. get_availability subtracts active holds, and a
+submitted Hotel Reservation converts its hold (`inventory_hold`, set when a
+rate is picked on the form) into a real inventory delta.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+
+import frappe
+from frappe.rate_limiter import rate_limit
+from frappe.utils import cint
+
+from abchotels.abc_hotels.utils import availability_cache
+from abchotels.abc_hotels.utils.stay_index import for_date_to_ordinal
+
+HOLD_TTL = 900  # seconds a guest keeps rooms while checking out
+MAX_HOLD_TTL = 3600
+MAX_HOLD_ROOMS = 10  # rooms per hold; larger blocks go through a group booking
+HOLD_RATE_LIMIT = 20  # holds a client may place per HOLD_RATE_WINDOW
+HOLD_RATE_WINDOW = 600  # seconds
+HOLD_PREFIX = "abchotels:hold:"
+ROOM_TYPE_HOLDS_PREFIX = "abchotels:holds:"  # sorted set of hold ids scored by expiry
+LOCK_PREFIX = "abchotels:hold_lock:"
+
+
+def _key(key: str) -> str:
+	return frappe.cache.make_key(key)
+
+
+def _nights(start: int, end: int) -> list[int]:
+	return list(range(for_date_to_ordinal(start), for_date_to_ordinal(end)))
+
+
+def held_units(
+	room_types: Iterable[str], start: int, end: int, exclude_hold: str | None = None
+) -> dict[str, dict[int, int]]:
+	"""
+	Active holds overlapping nights [start, end):
+	{room_type: {night ordinal: rooms held}} (room types without holds omitted).
+	"""
+	now = time.time()
+	window = set(_nights(start, end))
+	out: dict[str, dict[int, int]] = {}
+	for rt in set(room_types):
+		zkey = _key(ROOM_TYPE_HOLDS_PREFIX + rt)
+		ids = [
+			i.decode() if isinstance(i, bytes) else i for i in frappe.cache.zrangebyscore(zkey, now, "+inf")
+		]
+		if exclude_hold:
+			ids = [i for i in ids if i != exclude_hold]
+		if not ids:
+			continue
+		per_night: dict[int, int] = defaultdict(int)
+		for raw in frappe.cache.mget([_key(HOLD_PREFIX + i) for i in ids]):
+			if not raw:
+				continue  # expired between the two reads
+			hold = json.loads(raw)
+			for night in _nights(hold["start"], hold["end"]):
+				if night in window:
+					per_night[night] += hold["rooms"]
+		if per_night:
+			out[rt] = dict(per_night)
+	return out
+
+
+def next_hold_expiry(room_types: Iterable[str]) -> float | None:
+	"""Epoch seconds at which the first active hold on any of `room_types` lapses."""
+	now = time.time()
+	first = None
+	for rt in set(room_types):
+		head = frappe.cache.zrangebyscore(
+			_key(ROOM_TYPE_HOLDS_PREFIX + rt), now, "+inf", start=0, num=1, withscores=True
+		)
+		if head and (first is None or head[0][1] < first):
+			first = head[0][1]
+	return first
+
+
+def _db_availability(room_type: str, start: int, end: int) -> dict[int, int]:
+	rows = frappe.db.sql(
+		"""
+        SELECT for_date, total_available_units
+        FROM room_type_inventory
+        WHERE room_type = %s AND for_date >= %s AND for_date < %s
+        """,
+		(room_type, start, end),
+	)
+	return {for_date_to_ordinal(d): cint(a) for d, a in rows}
+
+
+def short_nights(
+	room_type: str, start: int, end: int, rooms: int, exclude_hold: str | None = None
+) -> list[int]:
+	"""Night ordinals where DB availability minus other guests' holds is below `rooms`."""
+	available = _db_availability(room_type, start, end)
+	held = held_units([room_type], start, end, exclude_hold).get(room_type, {})
+	return [n for n in _nights(start, end) if available.get(n, 0) - held.get(n, 0) < rooms]
+
+
+def _bump(room_type: str, start: int, end: int) -> None:
+	availability_cache.bump_versions([room_type], start, end)
+
+
+@frappe.whitelist(methods=["POST"])
+@rate_limit(limit=HOLD_RATE_LIMIT, seconds=HOLD_RATE_WINDOW)
+def place_inventory_hold(room_type: str, start, end, rooms, ttl: int | None = None):
+	"""
+	Tentatively hold `rooms` (at most MAX_HOLD_ROOMS) of `room_type` for nights
+	[start, end) (YYYYMMDD ints). Needs a session and is rate limited per client.
+	Returns: {'hold_id', 'expires_in'}; raises when the rooms are no longer free.
+	"""
+	start, end, rooms = cint(start), cint(end), cint(rooms)
+	ttl = min(cint(ttl) or HOLD_TTL, MAX_HOLD_TTL)
+	if end <= start or rooms <= 0:
+		frappe.throw("Invalid hold request")
+	if rooms > MAX_HOLD_ROOMS:
+		frappe.throw(f"At most {MAX_HOLD_ROOMS} rooms can be held at once")
+
+	zkey = _key(ROOM_TYPE_HOLDS_PREFIX + room_type)
+	# serialize hold placement per room type; the DB is only read
+	with frappe.cache.lock(_key(LOCK_PREFIX + room_type), timeout=10, blocking_timeout=5):
+		# reads skip expired ids by score; they are pruned here, off the read path
+		frappe.cache.zremrangebyscore(zkey, "-inf", time.time())
+		if short_nights(room_type, start, end, rooms):
+			frappe.throw("The selected rooms are no longer available")
+
+		hold_id = frappe.generate_hash(length=16)
+		payload = {
+			"room_type": room_type,
+			"start": start,
+			"end": end,
+			"rooms": rooms,
+			"owner": frappe.session.user,
+		}
+		pipe = frappe.cache.pipeline()
+		pipe.set(_key(HOLD_PREFIX + hold_id), json.dumps(payload), ex=ttl)
+		pipe.zadd(zkey, {hold_id: time.time() + ttl})
+		pipe.execute()
+
+	_bump(room_type, start, end)
+	return {"hold_id": hold_id, "expires_in": ttl}
+
+
+def get_hold(hold_id: str) -> dict | None:
+	raw = frappe.cache.get(_key(HOLD_PREFIX + hold_id)) if hold_id else None
+	return json.loads(raw) if raw else None
+
+
+def drop_hold(hold_id: str) -> bool:
+	"""Release a hold regardless of who placed it (e.g. once its reservation is submitted)."""
+	hold = get_hold(hold_id)
+	if not hold:
+		return False
+	pipe = frappe.cache.pipeline()
+	pipe.delete(_key(HOLD_PREFIX + hold_id))
+	pipe.zrem(_key(ROOM_TYPE_HOLDS_PREFIX + hold["room_type"]), hold_id)
+	pipe.execute()
+	_bump(hold["room_type"], hold["start"], hold["end"])
+	return True
+
+
+@frappe.whitelist(methods=["POST"])
+def release_inventory_hold(hold_id: str):
+	"""Release a hold placed by the current user."""
+	hold = get_hold(hold_id)
+	if not hold:
+		return {"released": False}
+	if hold.get("owner") != frappe.session.user:
+		frappe.throw("You can only release your own holds", frappe.PermissionError)
+	return {"released": drop_hold(hold_id)}
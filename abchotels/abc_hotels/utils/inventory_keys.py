@@ -0,0 +1,74 @@
+# abchotels/abc_hotels/utils/inventory_keys.py
+"""
+Compact inventory keys: inv_key = room_type_key.id * KEY_FACTOR + for_date.
+New rows get theirs from the triggers in sql/triggers.sql; this module
+backfills rows that predate them, one bounded UPDATE per transaction.
+"""
+
+from __future__ import annotations
+
+import frappe
+from frappe.utils import cint
+
+KEY_FACTOR = 100000000  # for_date is YYYYMMDD (8 digits)
+BACKFILL_BATCH = 10000
+
+
+def inventory_key(room_type_id: int, for_date: int) -> int:
+	return int(room_type_id) * KEY_FACTOR + int(for_date)
+
+
+def _batched(sql: str, batch_size: int) -> int:
+	total = 0
+	while True:
+		frappe.db.sql(sql, batch_size)
+		changed = cint(frappe.db.sql("SELECT ROW_COUNT()")[0][0])
+		frappe.db.commit()
+		total += changed
+		if changed < batch_size:
+			return total
+
+
+def backfill_inventory_keys(batch_size: int = BACKFILL_BATCH) -> dict[str, int]:
+	"""Fill inv_key on existing inventory rows, then on their rate-code rows."""
+	batch_size = cint(batch_size) or BACKFILL_BATCH
+	frappe.db.sql("INSERT IGNORE INTO room_type_key (room_type) SELECT name FROM `tabRoom Type`")
+	frappe.db.sql(
+		"""
+        INSERT IGNORE INTO room_type_key (room_type)
+        SELECT DISTINCT room_type FROM `tabRoom Type Inventory`
+        WHERE inv_key IS NULL AND room_type IS NOT NULL
+        """
+	)
+	frappe.db.commit()
+
+	inventory = _batched(
+		f"""
+        UPDATE `tabRoom Type Inventory` inv
+        SET inv.inv_key = (
+          SELECT k.id FROM room_type_key k WHERE k.room_type = inv.room_type
+        ) * {KEY_FACTOR} + inv.for_date
+        WHERE inv.inv_key IS NULL
+          AND inv.room_type IS NOT NULL
+          AND inv.for_date IS NOT NULL
+        LIMIT %s
+        """,
+		batch_size,
+	)
+	# only rows whose parent already has a key, so orphans cannot stall the loop
+	rates = _batched(
+		"""
+        UPDATE `tabRoom Type Inventory Rate Code` irc
+        SET irc.inv_key = (
+          SELECT inv.inv_key FROM `tabRoom Type Inventory` inv WHERE inv.name = irc.parent
+        )
+        WHERE irc.inv_key IS NULL
+          AND EXISTS (
+            SELECT 1 FROM `tabRoom Type Inventory` inv
+            WHERE inv.name = irc.parent AND inv.inv_key IS NOT NULL
+          )
+        LIMIT %s
+        """,
+		batch_size,
+	)
+	return {"inventory_rows": inventory, "rate_rows": rates}
@@ -0,0 +1,89 @@
+# abchotels/abc_hotels/utils/inventory_ledger.py
+"""
+Every occupied_count change is appended to `inventory_delta_ledger`.
+Holds are applied in place (the overbooking guard needs the row) and logged with
+applied=1; releases are only logged (applied=0) and read through the
+room_type_inventory view and the hold guard until compact() folds them into the
+inventory rows.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+import frappe
+from frappe.utils import cint
+
+COMPACT_BATCH = 5000
+MAX_COMPACT_ROUNDS = 100  # per scheduler tick; the next tick picks up the rest
+
+# (reservation, room_type, for_date, delta, reason)
+LedgerEntry = tuple[str, str, int, int, str]
+
+
+def append(entries: Iterable[LedgerEntry], applied: bool = False) -> int:
+	"""Multi-row insert of ledger entries; returns the number of rows written."""
+	entries = list(entries)
+	if not entries:
+		return 0
+	flag = 1 if applied else 0
+	values = ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(entries))
+	frappe.db.sql(
+		f"""
+        INSERT INTO inventory_delta_ledger (reservation, room_type, for_date, delta, reason, applied)
+        VALUES {values}
+        """,
+		[x for e in entries for x in (*e, flag)],
+	)
+	return len(entries)
+
+
+def compact(batch_size: int = COMPACT_BATCH) -> dict[str, int]:
+	"""Fold pending rows batch by batch, committing each batch on its own."""
+	batch_size = cint(batch_size) or COMPACT_BATCH
+	rows = cells = rounds = 0
+	while rounds < MAX_COMPACT_ROUNDS:
+		try:
+			result = frappe.db.sql("CALL compact_inventory_ledger(%s)", batch_size, as_dict=True)
+		except Exception as e:
+			frappe.db.rollback()
+			if frappe.db.is_deadlocked(e) or frappe.db.is_timedout(e):
+				break  # lost to a booking; the next tick retries
+			raise
+		frappe.db.commit()
+		rounds += 1
+		folded = cint(result[0].compacted_rows) if result else 0
+		rows += folded
+		cells += cint(result[0].touched_cells) if result else 0
+		if folded < batch_size:
+			break
+	return {"compacted_rows": rows, "touched_cells": cells, "rounds": rounds}
+
+
+def compact_inventory_ledger() -> None:
+	"""scheduler_events entry point."""
+	compact()
+
+
+@frappe.whitelist()
+def get_inventory_ledger_status() -> dict[str, Any]:
+	"""Pending backlog, for checking the compactor keeps up."""
+	frappe.only_for("System Manager")
+	row = frappe.db.sql(
+		"""
+        SELECT COUNT(*) AS pending_rows,
+               COUNT(DISTINCT room_type, for_date) AS pending_cells,
+               MIN(created_at) AS oldest_pending
+        FROM inventory_delta_ledger
+        WHERE applied = 0
+        """,
+		as_dict=True,
+	)[0]
+	return row
+
+
+def entries_for_stay(
+	reservation: str, room_type: str, nights: Sequence[int], delta: int, reason: str
+) -> list:
+	return [(reservation, room_type, d, delta, reason) for d in nights]
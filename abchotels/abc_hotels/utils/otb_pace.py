@@ -0,0 +1,147 @@
+# abchotels/abc_hotels/utils/otb_pace.py
+"""
+On-the-books (OTB) pace and pickup.
+
+Once per business day capture_otb_snapshot() records the rooms / revenue on
+the books per (room_type, stay_date) from that day onwards, storing only the
+changes since the previous capture (otb_snapshot_delta, see sql/tables.sql).
+The books as of any past day are the sum of the deltas captured up to it, so
+pace_report() answers "as of" questions from that table alone, never from
+`tabHotel Reservation`.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+import frappe
+from frappe.utils import add_days, cint, flt
+
+from abchotels.abc_hotels.utils.daily_kpi import business_for_date, horizon_end
+from abchotels.abc_hotels.utils.date_calendar import date_of, days_between
+from abchotels.abc_hotels.utils.inventory_events import to_for_date
+
+PICKUP_DAYS = 7
+LAST_YEAR_DAYS = 364  # 52 weeks back: same weekday a year earlier
+
+
+def last_snapshot_date() -> int:
+	return cint(frappe.db.sql("SELECT MAX(snapshot_date) FROM otb_snapshot_delta")[0][0])
+
+
+def capture_otb_snapshot(snapshot_date=None, end=None) -> int:
+	"""
+	Capture the books as of `snapshot_date` (default: business date) for stay
+	dates up to `end` (exclusive, default: the horizon end); no commit.
+	Returns the number of delta rows the day holds.
+	"""
+	snapshot = to_for_date(snapshot_date) or business_for_date()
+	last = last_snapshot_date()
+	if last and snapshot < last:
+		frappe.throw(f"On-the-books already captured as of {last}; cannot capture {snapshot}")
+	end = to_for_date(end) or horizon_end()
+	if end <= snapshot:
+		return 0
+	row = frappe.db.sql("CALL capture_otb_snapshot(%s, %s)", (snapshot, end), as_dict=True)
+	return cint(row[0].delta_rows) if row else 0
+
+
+def snapshot_otb() -> None:
+	"""scheduler_events entry point (daily); the night audit captures too."""
+	capture_otb_snapshot()
+	frappe.db.commit()
+
+
+def _shift(for_date: int, days: int) -> int:
+	return to_for_date(add_days(date_of(for_date), days))
+
+
+def otb_as_of(
+	start: int, end: int, as_of: Sequence[int], room_type: str | None = None
+) -> dict[int, list[tuple]]:
+	"""
+	{stay_date: [(rooms, revenue) per entry of `as_of`]} for stay dates
+	[start, end], in one grouped pass over the deltas.
+	"""
+	if not as_of:
+		return {}
+	params: dict[str, Any] = {"start": start, "end": end, "max_as_of": max(as_of)}
+	columns = []
+	for i, day in enumerate(as_of):
+		params[f"as_of_{i}"] = day
+		columns.append(f"SUM(IF(snapshot_date <= %(as_of_{i})s, rooms_delta, 0))")
+		columns.append(f"SUM(IF(snapshot_date <= %(as_of_{i})s, revenue_delta, 0))")
+	condition = ""
+	if room_type:
+		condition = " AND room_type = %(room_type)s"
+		params["room_type"] = room_type
+
+	rows = frappe.db.sql(
+		f"""
+        SELECT stay_date, {", ".join(columns)}
+        FROM otb_snapshot_delta
+        WHERE stay_date BETWEEN %(start)s AND %(end)s
+          AND snapshot_date <= %(max_as_of)s {condition}
+        GROUP BY stay_date
+        """,
+		params,
+	)
+	return {
+		cint(stay_date): [(cint(values[j]), flt(values[j + 1])) for j in range(0, len(values), 2)]
+		for stay_date, *values in rows
+	}
+
+
+def pace_report(
+	start,
+	end,
+	as_of=None,
+	room_type: str | None = None,
+	pickup_days: int = PICKUP_DAYS,
+) -> dict[str, Any]:
+	"""
+	Per stay date in [start, end]: the books as of `as_of` (default: the last
+	capture), pickup since `pickup_days` earlier, and last year's books for
+	the same weekday at the same lead time.
+	"""
+	start, end = to_for_date(start), to_for_date(end)
+	as_of = to_for_date(as_of) or last_snapshot_date() or business_for_date()
+	pickup_days = cint(pickup_days) or PICKUP_DAYS
+	pickup_from = _shift(as_of, -pickup_days)
+	ly_as_of = _shift(as_of, -LAST_YEAR_DAYS)
+
+	current = otb_as_of(start, end, (as_of, pickup_from), room_type)
+	last_year = otb_as_of(
+		_shift(start, -LAST_YEAR_DAYS), _shift(end, -LAST_YEAR_DAYS), (ly_as_of,), room_type
+	)
+
+	empty = (0, 0.0)
+	rows = []
+	for day in days_between(start, end):
+		stay_date = day["for_date"]
+		(rooms, revenue), (rooms_then, revenue_then) = current.get(stay_date) or (empty, empty)
+		ly_stay_date = _shift(stay_date, -LAST_YEAR_DAYS)
+		ly_rooms, ly_revenue = (last_year.get(ly_stay_date) or [empty])[0]
+		rows.append(
+			{
+				"stay_date": stay_date,
+				"label_text": day["label_text"],
+				"rooms": rooms,
+				"revenue": revenue,
+				"pickup_rooms": rooms - rooms_then,
+				"pickup_revenue": revenue - revenue_then,
+				"ly_stay_date": ly_stay_date,
+				"ly_rooms": ly_rooms,
+				"ly_revenue": ly_revenue,
+			}
+		)
+	return {
+		"start_date": start,
+		"end_date": end,
+		"as_of": as_of,
+		"pickup_from": pickup_from,
+		"ly_as_of": ly_as_of,
+		"room_type": room_type,
+		"rows": rows,
+	}
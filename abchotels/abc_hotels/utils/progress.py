@@ -0,0 +1,107 @@
+# abchotels/abc_hotels/utils/progress.py
+"""
+Rate-limited realtime progress for long jobs.
+
+    reporter = ProgressReporter("Inventory Population", user=user, job_id=job_id,
+                                done_event="inventory_job_done")
+    reporter.update(40, "Window 4/10", created_so_far=1200)   # coalesced
+    reporter.finish({"created": 3000, "failed": 0})            # always delivered
+
+Ticks are coalesced to one publish per `min_interval` seconds per job id; the
+throttle lives in Redis, so several workers reporting on the same job share
+it. The latest state is never lost: finish() (or flush()) publishes it.
+Every payload carries `job_id`, so clients can follow one job among several.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+import frappe
+
+THROTTLE_PREFIX = "abchotels:progress:"
+DEFAULT_MIN_INTERVAL = 1.0  # seconds between publishes of one job
+
+
+class ProgressReporter:
+	def __init__(
+		self,
+		title: str,
+		user: str | None = None,
+		job_id: str | None = None,
+		event: str = "progress",
+		done_event: str | None = None,
+		min_interval: float = DEFAULT_MIN_INTERVAL,
+	):
+		self.title = title
+		self.user = user
+		self.job_id = job_id or frappe.generate_hash(length=10)
+		self.event = event
+		self.done_event = done_event
+		self.min_interval = min_interval
+		self._last_publish = 0.0
+		self._pending: dict[str, Any] | None = None
+		self.published = 0
+		self.coalesced = 0
+
+	def _payload(self, percent: float, description: str, counters: dict[str, Any]) -> dict[str, Any]:
+		payload = {
+			"job_id": self.job_id,
+			"title": self.title,
+			"percent": round(min(max(float(percent), 0.0), 100.0), 2),
+			"description": description,
+		}
+		payload.update({k: v for k, v in counters.items() if v is not None})
+		return payload
+
+	def _slot_free(self) -> bool:
+		"""Local check first, then one shared Redis slot per job id."""
+		now = time.monotonic()
+		if now - self._last_publish < self.min_interval:
+			return False
+		try:
+			return bool(
+				frappe.cache.set(
+					frappe.cache.make_key(THROTTLE_PREFIX + self.job_id),
+					1,
+					nx=True,
+					px=int(self.min_interval * 1000),
+				)
+			)
+		except Exception:
+			return True  # no Redis throttle: fall back to the local one
+
+	def _publish(self, event: str, payload: dict[str, Any]) -> None:
+		try:
+			if self.user:
+				frappe.publish_realtime(event, payload, user=self.user, after_commit=False)
+			else:
+				frappe.publish_realtime(event, payload, after_commit=False)
+			self.published += 1
+		except Exception:
+			pass
+
+	def update(self, percent: float, description: str = "", **counters: Any) -> bool:
+		"""Record the latest state; publish it only if the job's rate allows. Returns True if sent."""
+		self._pending = self._payload(percent, description, counters)
+		if not self._slot_free():
+			self.coalesced += 1
+			return False
+		self.flush()
+		return True
+
+	def flush(self) -> None:
+		"""Publish the latest pending state now, regardless of the rate limit."""
+		if self._pending is None:
+			return
+		self._publish(self.event, self._pending)
+		self._last_publish = time.monotonic()
+		self._pending = None
+
+	def finish(self, result: dict[str, Any] | None = None, description: str = "Finished") -> None:
+		"""Final 100% tick plus `done_event` (when configured); never throttled."""
+		self._pending = self._payload(100.0, description, dict(result or {}))
+		self.flush()
+		if self.done_event:
+			self._publish(self.done_event, {"job_id": self.job_id, **(result or {})})
@@ -0,0 +1,233 @@
+# abchotels/abc_hotels/utils/stay_index.py
+from __future__ import annotations
+
+import datetime as _dt
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+import frappe
+
+CACHE_KEY = "abchotels:stay_index:v2"  # room_type -> (generation, index)
+GENERATION_PREFIX = "abchotels:stay_index:gen:"  # raw counters bumped on invalidation
+ALL_ROOM_TYPES = "*"
+INDEX_TTL = 24 * 3600  # backstop only; generations keep entries current
+
+# sentinels for nights that have no row for a rate code
+_NO_AVAIL = 1 << 30
+_NO_OCC = -(1 << 30)
+
+# IN-list filter so idx_room_type_for_date can serve it (see sql/indexes.sql)
+INDEX_SCAN_SQL = """
+    SELECT
+      r.room_type,
+      r.rate_code,
+      r.for_date,
+      r.total_count,
+      r.occupied_count,
+      r.total_available_units,
+      r.rate_price
+    FROM room_type_inventory_rates r
+    WHERE r.room_type IN %s
+      AND r.pay_master is false
+    ORDER BY r.room_type, r.rate_code, r.for_date
+"""
+
+
+def for_date_to_ordinal(for_date: int) -> int:
+	"""20250831 -> proleptic ordinal, so consecutive nights differ by 1."""
+	for_date = int(for_date)
+	return _dt.date(for_date // 10000, for_date // 100 % 100, for_date % 100).toordinal()
+
+
+class SparseTable:
+	"""Static range-min/range-max table: O(n log n) build, O(1) query over [lo, hi)."""
+
+	def __init__(self, values: Sequence[int], fn=min):
+		self.fn = fn
+		self.levels: list[list[int]] = [list(values)]
+		width = 1
+		while width * 2 <= len(values):
+			prev = self.levels[-1]
+			self.levels.append([fn(prev[i], prev[i + width]) for i in range(len(values) - width * 2 + 1)])
+			width *= 2
+
+	def query(self, lo: int, hi: int) -> int:
+		k = (hi - lo).bit_length() - 1
+		row = self.levels[k]
+		return self.fn(row[lo], row[hi - (1 << k)])
+
+
+class RateSeries:
+	"""
+	One (room_type, rate_code) over its inventory horizon:
+	  - prefix sums of price and of nights present -> stay total / average in O(1)
+	  - sparse tables over availability / occupancy -> bottleneck night in O(1)
+	"""
+
+	def __init__(self, nights: Sequence[dict[str, Any]]):
+		first = for_date_to_ordinal(nights[0]["for_date"])
+		last = for_date_to_ordinal(nights[-1]["for_date"])
+		size = last - first + 1
+
+		prices = [0.0] * size
+		present = [0] * size
+		avail = [_NO_AVAIL] * size
+		occupied = [_NO_OCC] * size
+		for n in nights:
+			i = for_date_to_ordinal(n["for_date"]) - first
+			prices[i] = float(n["rate_price"] or 0)
+			present[i] = 1
+			avail[i] = int(n["total_available_units"] or 0)
+			occupied[i] = int(n["occupied_count"] or 0)
+
+		self.first = first
+		self.size = size
+		self.price_prefix = [0.0] * (size + 1)
+		self.count_prefix = [0] * (size + 1)
+		for i in range(size):
+			self.price_prefix[i + 1] = self.price_prefix[i] + prices[i]
+			self.count_prefix[i + 1] = self.count_prefix[i] + present[i]
+		self.min_avail = SparseTable(avail, min)
+		self.max_occupied = SparseTable(occupied, max)
+
+	def stay(self, start_ord: int, end_ord: int, held: dict[int, int] | None = None) -> dict[str, Any] | None:
+		"""
+		Aggregate nights in [start_ord, end_ord); None when no night has a rate.
+		`held` ({night ordinal: rooms}) are tentative holds to subtract; only then
+		is availability walked night by night instead of read from the sparse table.
+		"""
+		lo = max(start_ord - self.first, 0)
+		hi = min(end_ord - self.first, self.size)
+		if hi <= lo:
+			return None
+		nights = self.count_prefix[hi] - self.count_prefix[lo]
+		if not nights:
+			return None
+		total = self.price_prefix[hi] - self.price_prefix[lo]
+		if held:
+			avail = self.min_avail.levels[0]
+			min_available = min(
+				avail[i] - held.get(self.first + i, 0) for i in range(lo, hi) if avail[i] != _NO_AVAIL
+			)
+		else:
+			min_available = self.min_avail.query(lo, hi)
+		return {
+			"max_occupied": self.max_occupied.query(lo, hi),
+			"min_available_units": min_available,
+			"rate_per_night": total / nights,
+			"total_stay": total,
+		}
+
+
+class RoomTypeStayIndex:
+	"""All rate series of one room type, as cached in Redis."""
+
+	def __init__(self, room_type: str, total_count: int = 0):
+		self.room_type = room_type
+		self.total_count = total_count
+		self.series: dict[str, RateSeries] = {}
+
+	def query(
+		self,
+		start: int,
+		end: int,
+		rate_codes: Iterable[str] | None = None,
+		held: dict[int, int] | None = None,
+	) -> list[dict[str, Any]]:
+		start_ord = for_date_to_ordinal(start)
+		end_ord = for_date_to_ordinal(end)
+		wanted = set(rate_codes) if rate_codes else None
+
+		out = []
+		for rate_code, series in self.series.items():
+			if wanted is not None and rate_code not in wanted:
+				continue
+			agg = series.stay(start_ord, end_ord, held)
+			if agg:
+				agg.update(
+					{"room_type": self.room_type, "rate_code": rate_code, "total_count": self.total_count}
+				)
+				out.append(agg)
+		return out
+
+
+def build_stay_indexes(room_types: Sequence[str]) -> dict[str, RoomTypeStayIndex]:
+	"""One ordered scan of room_type_inventory_rates for the given room types."""
+	indexes = {rt: RoomTypeStayIndex(rt) for rt in room_types}
+	if not room_types:
+		return indexes
+
+	rows = frappe.db.sql(INDEX_SCAN_SQL, (tuple(room_types),), as_dict=True)
+	return index_rows(rows, indexes)
+
+
+def index_rows(
+	rows: Sequence[dict[str, Any]], indexes: dict[str, RoomTypeStayIndex] | None = None
+) -> dict[str, RoomTypeStayIndex]:
+	"""Fold rows ordered by (room_type, rate_code, for_date) into per-room-type indexes."""
+	indexes = indexes if indexes is not None else {}
+	i = 0
+	while i < len(rows):
+		j = i
+		key = (rows[i]["room_type"], rows[i]["rate_code"])
+		while j < len(rows) and (rows[j]["room_type"], rows[j]["rate_code"]) == key:
+			j += 1
+		room_type, rate_code = key
+		index = indexes.setdefault(room_type, RoomTypeStayIndex(room_type))
+		index.total_count = int(rows[i]["total_count"] or 0)
+		index.series[rate_code] = RateSeries(rows[i:j])
+		i = j
+	return indexes
+
+
+def _generations(room_types: Sequence[str]) -> dict[str, tuple]:
+	"""(global, per room type) invalidation counters, read before the rows an index is built from."""
+	keys = [GENERATION_PREFIX + ALL_ROOM_TYPES] + [GENERATION_PREFIX + rt for rt in room_types]
+	values = [int(v or 0) for v in frappe.cache.mget([frappe.cache.make_key(k) for k in keys])]
+	return {rt: (values[0], v) for rt, v in zip(room_types, values[1:], strict=True)}
+
+
+def get_stay_indexes(room_types: Sequence[str] | None = None) -> dict[str, RoomTypeStayIndex]:
+	"""
+	Cached indexes for `room_types` (all non pay-master room types when empty).
+	Missing entries are built together in one query and stored back.
+
+	Entries carry the generation read before their rows were scanned; an index
+	built from rows that predate a concurrent invalidation is never served.
+	"""
+	if not room_types:
+		room_types = frappe.get_all("Room Type", filters={"pay_master": 0}, pluck="name")
+
+	generations = _generations(room_types)
+	indexes: dict[str, RoomTypeStayIndex] = {}
+	missing = []
+	for rt in room_types:
+		cached = frappe.cache.hget(CACHE_KEY, rt)
+		if cached is None or cached[0] != generations[rt]:
+			missing.append(rt)
+		else:
+			indexes[rt] = cached[1]
+
+	if missing:
+		for rt, index in build_stay_indexes(missing).items():
+			frappe.cache.hset(CACHE_KEY, rt, (generations.get(rt), index))
+			indexes[rt] = index
+		frappe.cache.expire(frappe.cache.make_key(CACHE_KEY), INDEX_TTL)
+	return indexes
+
+
+def invalidate_stay_index(room_types: Iterable[str] | None = None) -> None:
+	"""Drop cached indexes; everything when `room_types` is None."""
+	if room_types is None:
+		frappe.cache.incrby(frappe.cache.make_key(GENERATION_PREFIX + ALL_ROOM_TYPES), 1)
+		frappe.cache.delete_value(CACHE_KEY)
+		return
+	room_types = {rt for rt in room_types if rt}
+	if not room_types:
+		return
+	pipe = frappe.cache.pipeline()
+	for rt in room_types:
+		pipe.incr(frappe.cache.make_key(GENERATION_PREFIX + rt))
+	pipe.execute()
+	for rt in room_types:
+		frappe.cache.hdel(CACHE_KEY, rt)
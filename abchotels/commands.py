@@ -0,0 +1,40 @@
+# abchotels/commands.py
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("export-ari")
+@click.option("--output", required=True, help="File to write (overwritten)")
+@click.option("--format", "fmt", type=click.Choice(["csv", "parquet"]), default="csv")
+@click.option("--start-date", help="First night, YYYY-MM-DD or YYYYMMDD")
+@click.option("--end-date", help="Last night, YYYY-MM-DD or YYYYMMDD")
+@click.option("--room-type")
+@click.option("--rate-code")
+@click.option("--chunk-rows", type=int, default=5000, help="Rows fetched and written per chunk")
+@pass_context
+def export_ari(context, output, fmt, start_date, end_date, room_type, rate_code, chunk_rows):
+	"""Stream availability, rates and inventory to a CSV / Parquet file."""
+	import frappe
+
+	from abchotels.abc_hotels.api.ari_export import write_ari
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		with open(output, "wb") as fh:
+			summary = write_ari(
+				fh,
+				fmt,
+				chunk_rows,
+				start_date=start_date,
+				end_date=end_date,
+				room_type=room_type,
+				rate_code=rate_code,
+			)
+		click.echo(f"{summary['rows']} rows ({summary['chunks']} chunks) -> {output}")
+	finally:
+		frappe.destroy()
+
+
+commands = [export_ari]
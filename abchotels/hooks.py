@@ -24,6 +24,38 @@ website_route_rules = [
 after_install = "abchotels.setup.installer.after_install"
 after_migrate = "abchotels.setup.installer.after_migrate"
 
+doc_events = {
+    "Room Type Room": {
+        "on_update": "abchotels.abc_hotels.utils.inventory_events.on_inventory_doc_change",
+        "on_trash": "abchotels.abc_hotels.utils.inventory_events.on_inventory_doc_change",
+    },
+    "Room Type Inventory": {
+        "on_update": "abchotels.abc_hotels.utils.inventory_events.on_inventory_doc_change",
+    },
+    "Room Type": {
+        "after_insert": "abchotels.abc_hotels.controllers.inventory_horizon.on_room_type_insert",
+    },
+}
+
+scheduler_events = {
+    "cron": {
+        # fold buffered inventory releases (see utils/inventory_ledger.py)
+        "* * * * *": ["abchotels.abc_hotels.utils.inventory_ledger.compact_inventory_ledger"],
+    },
+    "daily_long": [
+        # roll the inventory horizon and seed its missing tail (see controllers/inventory_horizon.py)
+        "abchotels.abc_hotels.controllers.inventory_horizon.roll_inventory_horizon",
+        # move past nights to the partitioned history tables (see controllers/inventory_archive.py)
+        "abchotels.abc_hotels.controllers.inventory_archive.archive_past_inventory",
+        # capture on-the-books deltas for pace / pickup (see utils/otb_pace.py)
+        "abchotels.abc_hotels.utils.otb_pace.snapshot_otb",
+    ],
+    "hourly_long": [
+        # incremental occupancy drift repair (see controllers/occupancy_reconciliation.py)
+        "abchotels.abc_hotels.controllers.occupancy_reconciliation.scheduled_reconciliation",
+    ],
+}
+
 
 fixtures = [
     {"doctype": "Room Type"},
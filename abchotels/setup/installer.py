@@ -43,10 +43,31 @@ def seed_roles():
 
 
 def _seed_dim_date_default() -> None:
-    frappe.db.sql(
-        "CALL seed_dim_date(%s, %s, %s, %s)",
-        ("2025-08-27", "2026-12-31", "FRI_SAT", "+03:00"),
-    )
+    from abchotels.abc_hotels.utils.date_calendar import seed_dim_date
+
+    seed_dim_date("2025-08-27", "2026-12-31", "FRI_SAT", "+03:00")
+
+
+def _refresh_room_type_room_count() -> None:
+    frappe.db.sql("CALL refresh_room_type_room_count()")
+
+
+def _backfill_inventory_keys():
+    from abchotels.abc_hotels.utils.inventory_keys import backfill_inventory_keys
+
+    return backfill_inventory_keys()
+
+
+def _backfill_daily_kpi():
+    from abchotels.abc_hotels.utils.daily_kpi import backfill_daily_kpi
+
+    return backfill_daily_kpi()
+
+
+def _ensure_history_partitions() -> None:
+    from abchotels.abc_hotels.controllers.inventory_archive import ensure_history_partitions
+
+    ensure_history_partitions()
 
 
 def _safe(label: str, fn, **kwargs):
@@ -76,6 +97,10 @@ def after_migrate():
     _safe("seed_roles_and_permissions", seed_roles)
     _safe("run_sql", migrate_db)
     _safe("seed_dim_date", _seed_dim_date_default)
+    _safe("refresh_room_type_room_count", _refresh_room_type_room_count)
+    _safe("ensure_history_partitions", _ensure_history_partitions)
+    _safe("backfill_inventory_keys", _backfill_inventory_keys)
+    _safe("backfill_daily_kpi", _backfill_daily_kpi)
     _safe("seed_module_profiles",      seed_module_profiles)
     return {"ok": True}
 